@@ -0,0 +1,109 @@
+"""Compare hot queries with and without server-side prepared statements.
+
+Runs each query ``--runs`` times on the remote configured in ``.env``
+(``DB_REMOTE_*``), first with plain cursors and then with the prepared
+statement cache of :class:`~src.triple_db_manager.TripleDBManager`, and
+prints the mean and p95 latency of both plus the gain per query.
+
+    python benchmarks/prepared_statements.py --runs 500 --cliente 1
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.triple_db_manager import TripleDBManager  # noqa: E402
+
+
+def hot_queries(args):
+    """Queries run on every login / screen load, with sample parameters."""
+    return [
+        (
+            "AuthManager.login",
+            "SELECT u.id_usuario, u.usuario, r.nombre as rol, u.id_cliente, u.id_empleado, e.cargo, e.id_sucursal "
+            "FROM Usuario u JOIN Rol r ON u.id_rol = r.id_rol "
+            "LEFT JOIN Empleado e ON u.id_empleado = e.id_empleado "
+            "WHERE u.usuario = %s AND u.contrasena = %s",
+            (args.usuario, "0" * 64),
+        ),
+        (
+            "ClienteView._cargar_reservas_cliente",
+            "SELECT ra.id_reserva, a.fecha_hora_salida, a.fecha_hora_entrada, a.id_vehiculo, v.modelo, v.placa, a.valor, ra.saldo_pendiente, ra.abono, es.descripcion "
+            "FROM Reserva_alquiler ra "
+            "JOIN Alquiler a ON ra.id_alquiler = a.id_alquiler "
+            "JOIN Vehiculo v ON a.id_vehiculo = v.placa "
+            "LEFT JOIN Estado_reserva es ON ra.id_estado_reserva = es.id_estado "
+            "WHERE a.id_cliente = %s "
+            "ORDER BY a.fecha_hora_salida DESC",
+            (args.cliente,),
+        ),
+        (
+            "ClienteView._obtener_descuento_activo",
+            "SELECT id_descuento, descripcion, valor "
+            "FROM Descuento_alquiler "
+            "WHERE fecha_inicio <= %s AND fecha_fin >= %s "
+            "LIMIT 1",
+            ("2025-01-10 00:00:00", "2025-01-05 00:00:00"),
+        ),
+        (
+            "ClienteView._realizar_abono (saldo)",
+            "SELECT saldo_pendiente FROM Reserva_alquiler WHERE id_reserva = %s",
+            (args.reserva,),
+        ),
+    ]
+
+
+def measure(db, query, params, runs):
+    """Return per-execution latencies in milliseconds."""
+    timings = []
+    # Warm-up: open the pooled connection and, when enabled, prepare once
+    db._exec_mysql(db._pool1.acquire(), query, params)
+    for _ in range(runs):
+        conn = db._pool1.acquire()
+        started = time.perf_counter()
+        db._exec_mysql(conn, query, params)
+        timings.append((time.perf_counter() - started) * 1000.0)
+    return timings
+
+
+def p95(values):
+    return sorted(values)[max(0, int(len(values) * 0.95) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--usuario", default="admin@alquiler.com")
+    parser.add_argument("--cliente", type=int, default=1)
+    parser.add_argument("--reserva", type=int, default=1)
+    args = parser.parse_args()
+
+    db = TripleDBManager()
+    statement_cache_size = db._pool1.statement_cache_size or 32
+    try:
+        print(f"{'consulta':42} {'plano ms':>10} {'prep. ms':>10} {'p95 plano':>10} {'p95 prep.':>10} {'mejora':>8}")
+        for name, query, params in hot_queries(args):
+            db._pool1.statement_cache_size = 0
+            plain = measure(db, query, params, args.runs)
+            db._pool1.statement_cache_size = statement_cache_size
+            prepared = measure(db, query, params, args.runs)
+            plain_mean = statistics.mean(plain)
+            prepared_mean = statistics.mean(prepared)
+            gain = (plain_mean - prepared_mean) / plain_mean * 100 if plain_mean else 0.0
+            print(
+                f"{name:42} {plain_mean:10.3f} {prepared_mean:10.3f} "
+                f"{p95(plain):10.3f} {p95(prepared):10.3f} {gain:7.1f}%"
+            )
+        print("pool:", {k: v for k, v in db.get_pool_stats()["remote1"].items() if k.startswith("statement")})
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Compare the sales reports with their previous queries over ``Alquiler``.
+
+Loads the SQL actually built by :mod:`src.services.reports` (half-open
+``[inicio, fin)`` ranges over the ``ventas_diarias`` rollup) and the previous
+``MONTH()/YEAR()`` or ``strftime()`` filters on ``Alquiler``, prints the plan
+chosen for each one and the mean latency over ``--runs`` executions.
+
+Run it against the remote configured in ``.env`` (``DB_REMOTE_*``) after
+loading ``data/data_inserts_faker.sql`` and applying the migrations
+(``python -m src.mysql_migrations``), or against a SQLite file:
+
+    python benchmarks/report_ranges.py --mes 3 --anio 2024 --runs 50
+    python benchmarks/report_ranges.py --sqlite data/local.sqlite
+"""
+
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.services import reports  # noqa: E402
+
+
+class _Recorder:
+    """Stand-in db manager that records the query a report builds."""
+
+    def __init__(self, offline):
+        self.offline = offline
+        self.calls = []
+
+    def execute_query(self, query, params=None):
+        self.calls.append((query, params))
+        return []
+
+
+def legacy_queries(sqlite, mes, anio):
+    """Previous report filters, kept here only for comparison."""
+    if sqlite:
+        mes_f = "strftime('%m', fecha_hora_salida) = ? AND strftime('%Y', fecha_hora_salida) = ?"
+        mes_p = (f"{mes:02d}", str(anio))
+        return [
+            ("ventas_por_sucursal", f"SELECT id_sucursal, SUM(valor) FROM Alquiler WHERE {mes_f} GROUP BY id_sucursal", mes_p),
+            ("ventas_por_vendedor", f"SELECT id_empleado, SUM(valor) FROM Alquiler WHERE {mes_f} GROUP BY id_empleado", mes_p),
+            ("ventas_mensuales",
+             "SELECT CAST(strftime('%m', fecha_hora_salida) AS INTEGER) as mes, SUM(valor) FROM Alquiler "
+             "WHERE strftime('%Y', fecha_hora_salida) = ? GROUP BY mes ORDER BY mes", (str(anio),)),
+        ]
+    mes_f = "MONTH(fecha_hora_salida) = %s AND YEAR(fecha_hora_salida) = %s"
+    return [
+        ("ventas_por_sucursal", f"SELECT id_sucursal, SUM(valor) FROM Alquiler WHERE {mes_f} GROUP BY id_sucursal", (mes, anio)),
+        ("ventas_por_vendedor", f"SELECT id_empleado, SUM(valor) FROM Alquiler WHERE {mes_f} GROUP BY id_empleado", (mes, anio)),
+        ("ventas_mensuales",
+         "SELECT MONTH(fecha_hora_salida) as mes, SUM(valor) FROM Alquiler "
+         "WHERE YEAR(fecha_hora_salida) = %s GROUP BY mes ORDER BY mes", (anio,)),
+    ]
+
+
+def range_queries(sqlite, mes, anio):
+    recorder = _Recorder(offline=sqlite)
+    reports.ventas_por_sucursal(recorder, mes, anio)
+    reports.ventas_por_vendedor(recorder, mes, anio)
+    reports.ventas_mensuales(recorder, anio)
+    names = ("ventas_por_sucursal", "ventas_por_vendedor", "ventas_mensuales")
+    return [(name, query, params) for name, (query, params) in zip(names, recorder.calls)]
+
+
+def plan(conn, sqlite, query, params):
+    """One-line summary of the plan chosen for ``query``."""
+    cursor = conn.cursor()
+    try:
+        if sqlite:
+            cursor.execute("EXPLAIN QUERY PLAN " + query, params)
+            return "; ".join(row[-1] for row in cursor.fetchall())
+        cursor.execute("EXPLAIN " + query, params)
+        columns = [c.lower() for c in cursor.column_names]
+        row = dict(zip(columns, cursor.fetchall()[0]))
+        return f"type={row.get('type')} key={row.get('key')} rows={row.get('rows')} {row.get('extra') or ''}".strip()
+    finally:
+        cursor.close()
+
+
+def measure(conn, query, params, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        cursor.fetchall()
+        cursor.close()
+        timings.append((time.perf_counter() - started) * 1000.0)
+    return timings
+
+
+def connect(args):
+    if args.sqlite:
+        return sqlite3.connect(args.sqlite)
+    from dotenv import load_dotenv
+    import mysql.connector
+    from src.mysql_migrations import remote_configs
+
+    load_dotenv()
+    config = remote_configs().get("remote1")
+    if config is None:
+        sys.exit("DB_REMOTE_HOST no está configurado; usa --sqlite RUTA")
+    return mysql.connector.connect(**config)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--mes", type=int, default=1)
+    parser.add_argument("--anio", type=int, default=2024)
+    parser.add_argument("--sqlite", help="ruta de una base SQLite en lugar del remoto")
+    args = parser.parse_args()
+
+    sqlite = bool(args.sqlite)
+    conn = connect(args)
+    try:
+        legacy = legacy_queries(sqlite, args.mes, args.anio)
+        ranged = range_queries(sqlite, args.mes, args.anio)
+        print(f"{'reporte':22} {'legacy ms':>11} {'actual ms':>10} {'mejora':>8}")
+        plans = []
+        for (name, old_q, old_p), (_, new_q, new_p) in zip(legacy, ranged):
+            old_ms = statistics.mean(measure(conn, old_q, old_p, args.runs))
+            new_ms = statistics.mean(measure(conn, new_q, new_p, args.runs))
+            gain = (old_ms - new_ms) / old_ms * 100 if old_ms else 0.0
+            print(f"{name:22} {old_ms:11.3f} {new_ms:10.3f} {gain:7.1f}%")
+            plans.append((name, plan(conn, sqlite, old_q, old_p), plan(conn, sqlite, new_q, new_p)))
+        print()
+        for name, old_plan, new_plan in plans:
+            print(f"{name}\n  legacy: {old_plan}\n  actual: {new_plan}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+-- Índices secundarios para los filtros más usados por las vistas
+
+-- Reservas de un cliente ordenadas por fecha (ClienteView)
+CREATE INDEX idx_alquiler_cliente_salida ON Alquiler (id_cliente, fecha_hora_salida);
+
+-- Alquileres de una sucursal en un rango de fechas (reportes)
+CREATE INDEX idx_alquiler_sucursal_salida ON Alquiler (id_sucursal, fecha_hora_salida);
+
+-- Reservas por estado, con el alquiler para el JOIN (EmpleadoVentasView)
+CREATE INDEX idx_reserva_estado_alquiler ON Reserva_alquiler (id_estado_reserva, id_alquiler);
+
+-- Abonos de una reserva por fecha (abonos, borrado de clientes)
+CREATE INDEX idx_abono_reserva_fecha ON Abono_reserva (id_reserva, fecha_hora);
+
+-- Vehículos de una sucursal por estado (vehículos disponibles, mantenimiento)
+CREATE INDEX idx_vehiculo_sucursal_estado ON Vehiculo (id_sucursal, id_estado_vehiculo);
+
+-- Usuario(usuario) ya es UNIQUE en sql_bases.sql y sirve al login
@@ -0,0 +1,5 @@
+-- Reportes de ventas por rango de fechas (src/services/reports.py)
+
+-- El rango [inicio, fin) sobre fecha_hora_salida recorre solo el tramo del
+-- índice correspondiente
+CREATE INDEX idx_alquiler_salida ON Alquiler (fecha_hora_salida);
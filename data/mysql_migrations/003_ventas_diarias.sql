@@ -0,0 +1,89 @@
+-- Ventas diarias preagregadas para los reportes de gerencia
+--
+-- Una fila por (día, sucursal, empleado) con la suma de Alquiler.valor y el
+-- número de alquileres. La mantienen los triggers de Alquiler, así que los
+-- reportes leen O(días) filas en lugar de O(alquileres). Las sucursales o
+-- empleados nulos se guardan como 0 (forman parte de la clave primaria) y
+-- las filas que bajan a n = 0 se conservan; los reportes las descartan.
+--
+-- Es seguro volver a ejecutarlo: recrea los triggers y reconstruye la tabla
+-- desde Alquiler. Aplicarlo sin escrituras en curso sobre Alquiler.
+
+CREATE TABLE IF NOT EXISTS ventas_diarias (
+  fecha        DATE NOT NULL,
+  id_sucursal  INT UNSIGNED NOT NULL DEFAULT 0,
+  id_empleado  INT UNSIGNED NOT NULL DEFAULT 0,
+  total        DECIMAL(14,2) NOT NULL DEFAULT 0,
+  n            INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (fecha, id_sucursal, id_empleado)
+) ENGINE=InnoDB;
+
+DROP TRIGGER IF EXISTS trg_alquiler_ventas_insert;
+DROP TRIGGER IF EXISTS trg_alquiler_ventas_update;
+DROP TRIGGER IF EXISTS trg_alquiler_ventas_delete;
+
+DELIMITER $$
+CREATE TRIGGER trg_alquiler_ventas_insert
+AFTER INSERT ON Alquiler
+FOR EACH ROW
+BEGIN
+    IF NEW.fecha_hora_salida IS NOT NULL THEN
+        INSERT INTO ventas_diarias (fecha, id_sucursal, id_empleado, total, n)
+        VALUES (DATE(NEW.fecha_hora_salida), COALESCE(NEW.id_sucursal, 0),
+                COALESCE(NEW.id_empleado, 0), COALESCE(NEW.valor, 0), 1)
+        ON DUPLICATE KEY UPDATE total = total + COALESCE(NEW.valor, 0), n = n + 1;
+    END IF;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER trg_alquiler_ventas_update
+AFTER UPDATE ON Alquiler
+FOR EACH ROW
+BEGIN
+    -- Solo cambios que mueven el agregado (no estados, fechas de entrada...)
+    IF NOT (OLD.fecha_hora_salida <=> NEW.fecha_hora_salida
+            AND OLD.valor <=> NEW.valor
+            AND OLD.id_sucursal <=> NEW.id_sucursal
+            AND OLD.id_empleado <=> NEW.id_empleado) THEN
+        IF OLD.fecha_hora_salida IS NOT NULL THEN
+            UPDATE ventas_diarias
+            SET total = total - COALESCE(OLD.valor, 0), n = n - 1
+            WHERE fecha = DATE(OLD.fecha_hora_salida)
+              AND id_sucursal = COALESCE(OLD.id_sucursal, 0)
+              AND id_empleado = COALESCE(OLD.id_empleado, 0);
+        END IF;
+        IF NEW.fecha_hora_salida IS NOT NULL THEN
+            INSERT INTO ventas_diarias (fecha, id_sucursal, id_empleado, total, n)
+            VALUES (DATE(NEW.fecha_hora_salida), COALESCE(NEW.id_sucursal, 0),
+                    COALESCE(NEW.id_empleado, 0), COALESCE(NEW.valor, 0), 1)
+            ON DUPLICATE KEY UPDATE total = total + COALESCE(NEW.valor, 0), n = n + 1;
+        END IF;
+    END IF;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER trg_alquiler_ventas_delete
+AFTER DELETE ON Alquiler
+FOR EACH ROW
+BEGIN
+    IF OLD.fecha_hora_salida IS NOT NULL THEN
+        UPDATE ventas_diarias
+        SET total = total - COALESCE(OLD.valor, 0), n = n - 1
+        WHERE fecha = DATE(OLD.fecha_hora_salida)
+          AND id_sucursal = COALESCE(OLD.id_sucursal, 0)
+          AND id_empleado = COALESCE(OLD.id_empleado, 0);
+    END IF;
+END$$
+DELIMITER ;
+
+-- Carga inicial desde los alquileres existentes
+DELETE FROM ventas_diarias;
+
+INSERT INTO ventas_diarias (fecha, id_sucursal, id_empleado, total, n)
+SELECT DATE(fecha_hora_salida), COALESCE(id_sucursal, 0), COALESCE(id_empleado, 0),
+       COALESCE(SUM(valor), 0), COUNT(*)
+FROM Alquiler
+WHERE fecha_hora_salida IS NOT NULL
+GROUP BY DATE(fecha_hora_salida), COALESCE(id_sucursal, 0), COALESCE(id_empleado, 0);
@@ -410,3 +410,79 @@ BEGIN
     VALUES (NEW.correo, SHA2(NEW.documento, 256), rid, NEW.id_empleado);
 END$$
 DELIMITER ;
+
+-- Ventas diarias preagregadas para los reportes, mantenidas por triggers
+-- (mismas definiciones que data/mysql_migrations/003_ventas_diarias.sql)
+CREATE TABLE ventas_diarias (
+  fecha        DATE NOT NULL,
+  id_sucursal  INT UNSIGNED NOT NULL DEFAULT 0,
+  id_empleado  INT UNSIGNED NOT NULL DEFAULT 0,
+  total        DECIMAL(14,2) NOT NULL DEFAULT 0,
+  n            INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (fecha, id_sucursal, id_empleado)
+) ENGINE=InnoDB;
+
+DELIMITER $$
+CREATE TRIGGER trg_alquiler_ventas_insert
+AFTER INSERT ON Alquiler
+FOR EACH ROW
+BEGIN
+    IF NEW.fecha_hora_salida IS NOT NULL THEN
+        INSERT INTO ventas_diarias (fecha, id_sucursal, id_empleado, total, n)
+        VALUES (DATE(NEW.fecha_hora_salida), COALESCE(NEW.id_sucursal, 0),
+                COALESCE(NEW.id_empleado, 0), COALESCE(NEW.valor, 0), 1)
+        ON DUPLICATE KEY UPDATE total = total + COALESCE(NEW.valor, 0), n = n + 1;
+    END IF;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER trg_alquiler_ventas_update
+AFTER UPDATE ON Alquiler
+FOR EACH ROW
+BEGIN
+    -- Solo cambios que mueven el agregado (no estados, fechas de entrada...)
+    IF NOT (OLD.fecha_hora_salida <=> NEW.fecha_hora_salida
+            AND OLD.valor <=> NEW.valor
+            AND OLD.id_sucursal <=> NEW.id_sucursal
+            AND OLD.id_empleado <=> NEW.id_empleado) THEN
+        IF OLD.fecha_hora_salida IS NOT NULL THEN
+            UPDATE ventas_diarias
+            SET total = total - COALESCE(OLD.valor, 0), n = n - 1
+            WHERE fecha = DATE(OLD.fecha_hora_salida)
+              AND id_sucursal = COALESCE(OLD.id_sucursal, 0)
+              AND id_empleado = COALESCE(OLD.id_empleado, 0);
+        END IF;
+        IF NEW.fecha_hora_salida IS NOT NULL THEN
+            INSERT INTO ventas_diarias (fecha, id_sucursal, id_empleado, total, n)
+            VALUES (DATE(NEW.fecha_hora_salida), COALESCE(NEW.id_sucursal, 0),
+                    COALESCE(NEW.id_empleado, 0), COALESCE(NEW.valor, 0), 1)
+            ON DUPLICATE KEY UPDATE total = total + COALESCE(NEW.valor, 0), n = n + 1;
+        END IF;
+    END IF;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER trg_alquiler_ventas_delete
+AFTER DELETE ON Alquiler
+FOR EACH ROW
+BEGIN
+    IF OLD.fecha_hora_salida IS NOT NULL THEN
+        UPDATE ventas_diarias
+        SET total = total - COALESCE(OLD.valor, 0), n = n - 1
+        WHERE fecha = DATE(OLD.fecha_hora_salida)
+          AND id_sucursal = COALESCE(OLD.id_sucursal, 0)
+          AND id_empleado = COALESCE(OLD.id_empleado, 0);
+    END IF;
+END$$
+DELIMITER ;
+
+-- Índices secundarios (mismos que data/mysql_migrations/, que los agregan a
+-- bases ya creadas)
+CREATE INDEX idx_alquiler_cliente_salida ON Alquiler (id_cliente, fecha_hora_salida);
+CREATE INDEX idx_alquiler_sucursal_salida ON Alquiler (id_sucursal, fecha_hora_salida);
+CREATE INDEX idx_reserva_estado_alquiler ON Reserva_alquiler (id_estado_reserva, id_alquiler);
+CREATE INDEX idx_abono_reserva_fecha ON Abono_reserva (id_reserva, fecha_hora);
+CREATE INDEX idx_vehiculo_sucursal_estado ON Vehiculo (id_sucursal, id_estado_vehiculo);
+CREATE INDEX idx_alquiler_salida ON Alquiler (fecha_hora_salida);
@@ -0,0 +1,50 @@
+-- Cola de reintentos compacta e indexada
+
+-- Texto SQL internado: cada sentencia distinta se guarda una sola vez y las
+-- filas de retry_queue la referencian por id.
+CREATE TABLE IF NOT EXISTS retry_statements (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sql_text TEXT NOT NULL UNIQUE
+);
+
+ALTER TABLE retry_queue ADD COLUMN statement_id INTEGER REFERENCES retry_statements(id);
+
+INSERT OR IGNORE INTO retry_statements (sql_text)
+SELECT DISTINCT operation FROM retry_queue
+WHERE operation IS NOT NULL AND operation <> '';
+
+UPDATE retry_queue
+SET statement_id = (
+        SELECT id FROM retry_statements WHERE sql_text = retry_queue.operation
+    ),
+    operation = NULL
+WHERE operation IS NOT NULL AND operation <> '';
+
+CREATE INDEX IF NOT EXISTS idx_retry_queue_target ON retry_queue (target, id);
+CREATE INDEX IF NOT EXISTS idx_retry_queue_created_at ON retry_queue (created_at);
+CREATE INDEX IF NOT EXISTS idx_retry_queue_statement ON retry_queue (statement_id);
+
+-- Pendientes por destino, mantenido por triggers para consultarlo en O(1)
+CREATE TABLE IF NOT EXISTS retry_queue_counts (
+    target TEXT PRIMARY KEY,
+    pending INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR REPLACE INTO retry_queue_counts (target, pending)
+SELECT COALESCE(target, ''), COUNT(*) FROM retry_queue GROUP BY COALESCE(target, '');
+
+CREATE TRIGGER IF NOT EXISTS trg_retry_queue_count_insert
+AFTER INSERT ON retry_queue
+BEGIN
+    INSERT INTO retry_queue_counts (target, pending)
+    VALUES (COALESCE(NEW.target, ''), 1)
+    ON CONFLICT(target) DO UPDATE SET pending = pending + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_retry_queue_count_delete
+AFTER DELETE ON retry_queue
+BEGIN
+    UPDATE retry_queue_counts
+    SET pending = pending - 1
+    WHERE target = COALESCE(OLD.target, '');
+END;
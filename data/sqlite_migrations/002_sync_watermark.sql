@@ -0,0 +1,12 @@
+-- Marcas de agua de la sincronización remota -> local
+
+-- Una fila por tabla sincronizada. column_name es la columna usada como marca
+-- (updated_at o la clave primaria) y value el mayor valor ya copiado.
+-- last_full_sync registra la última copia completa de la tabla.
+CREATE TABLE IF NOT EXISTS sync_watermark (
+    table_name TEXT PRIMARY KEY,
+    column_name TEXT NOT NULL,
+    value,
+    last_full_sync TEXT,
+    synced_at TEXT DEFAULT (datetime('now'))
+);
@@ -0,0 +1,30 @@
+-- Índices secundarios de la base local (mismos filtros que las vistas en MySQL)
+
+-- Login: Usuario(usuario) ya tiene índice por ser UNIQUE; Rol y Empleado se
+-- unen por clave primaria.
+
+-- Reservas de un cliente por fecha y alquileres de una sucursal por fecha
+CREATE INDEX IF NOT EXISTS idx_alquiler_cliente_salida ON Alquiler (id_cliente, fecha_hora_salida);
+CREATE INDEX IF NOT EXISTS idx_alquiler_sucursal_salida ON Alquiler (id_sucursal, fecha_hora_salida);
+
+-- Reservas por estado y JOIN Reserva_alquiler -> Alquiler
+CREATE INDEX IF NOT EXISTS idx_reserva_estado_alquiler ON Reserva_alquiler (id_estado_reserva, id_alquiler);
+CREATE INDEX IF NOT EXISTS idx_reserva_alquiler ON Reserva_alquiler (id_alquiler);
+
+-- Abonos de una reserva por fecha
+CREATE INDEX IF NOT EXISTS idx_abono_reserva_fecha ON Abono_reserva (id_reserva, fecha_hora);
+
+-- Vehículos de una sucursal por estado
+CREATE INDEX IF NOT EXISTS idx_vehiculo_sucursal_estado ON Vehiculo (id_sucursal, id_estado_vehiculo);
+
+-- Ventana de 7 días de la sincronización: DELETE ... WHERE <fecha> < date('now','-7 day')
+CREATE INDEX IF NOT EXISTS idx_alquiler_salida ON Alquiler (fecha_hora_salida);
+CREATE INDEX IF NOT EXISTS idx_reserva_fecha ON Reserva_alquiler (fecha_hora);
+CREATE INDEX IF NOT EXISTS idx_abono_fecha ON Abono_reserva (fecha_hora);
+
+-- Registros pendientes de subir (get_pending_*): índices parciales que solo
+-- contienen las filas con pendiente = 1, por lo que se mantienen pequeños
+CREATE INDEX IF NOT EXISTS idx_cliente_pendiente ON Cliente (id_cliente) WHERE pendiente = 1;
+CREATE INDEX IF NOT EXISTS idx_usuario_pendiente ON Usuario (id_usuario) WHERE pendiente = 1;
+CREATE INDEX IF NOT EXISTS idx_reserva_legacy_pendiente ON Reserva (id_reserva) WHERE pendiente = 1;
+CREATE INDEX IF NOT EXISTS idx_abono_legacy_pendiente ON Abono (id_abono) WHERE pendiente = 1;
@@ -0,0 +1,69 @@
+-- Ventas diarias preagregadas (misma tabla que data/mysql_migrations/003_ventas_diarias.sql)
+--
+-- La sincronización copia ventas_diarias completa desde la base remota, que
+-- tiene todo el histórico; localmente Alquiler solo guarda 7 días. Los
+-- triggers mantienen la tabla con los alquileres creados sin conexión.
+CREATE TABLE IF NOT EXISTS ventas_diarias (
+    fecha TEXT NOT NULL,
+    id_sucursal INTEGER NOT NULL DEFAULT 0,
+    id_empleado INTEGER NOT NULL DEFAULT 0,
+    total REAL NOT NULL DEFAULT 0,
+    n INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (fecha, id_sucursal, id_empleado)
+);
+
+-- Mientras haya una fila aquí los triggers no hacen nada. LocalSync la
+-- inserta dentro de la transacción que copia o recorta Alquiler, así esas
+-- filas no se cuentan dos veces (ya vienen en la copia de ventas_diarias)
+-- y la ventana de 7 días no borra el histórico.
+CREATE TABLE IF NOT EXISTS rollup_suspend (
+    id INTEGER PRIMARY KEY
+);
+
+INSERT OR REPLACE INTO ventas_diarias (fecha, id_sucursal, id_empleado, total, n)
+SELECT date(fecha_hora_salida), COALESCE(id_sucursal, 0), COALESCE(id_empleado, 0),
+       COALESCE(SUM(valor), 0), COUNT(*)
+FROM Alquiler
+WHERE fecha_hora_salida IS NOT NULL
+GROUP BY date(fecha_hora_salida), COALESCE(id_sucursal, 0), COALESCE(id_empleado, 0);
+
+CREATE TRIGGER IF NOT EXISTS trg_alquiler_ventas_insert
+AFTER INSERT ON Alquiler
+WHEN NEW.fecha_hora_salida IS NOT NULL
+ AND NOT EXISTS (SELECT 1 FROM rollup_suspend)
+BEGIN
+    INSERT INTO ventas_diarias (fecha, id_sucursal, id_empleado, total, n)
+    VALUES (date(NEW.fecha_hora_salida), COALESCE(NEW.id_sucursal, 0),
+            COALESCE(NEW.id_empleado, 0), COALESCE(NEW.valor, 0), 1)
+    ON CONFLICT(fecha, id_sucursal, id_empleado)
+    DO UPDATE SET total = total + excluded.total, n = n + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_alquiler_ventas_update
+AFTER UPDATE OF fecha_hora_salida, valor, id_sucursal, id_empleado ON Alquiler
+WHEN NOT EXISTS (SELECT 1 FROM rollup_suspend)
+BEGIN
+    UPDATE ventas_diarias
+    SET total = total - COALESCE(OLD.valor, 0), n = n - 1
+    WHERE fecha = date(OLD.fecha_hora_salida)
+      AND id_sucursal = COALESCE(OLD.id_sucursal, 0)
+      AND id_empleado = COALESCE(OLD.id_empleado, 0);
+    INSERT INTO ventas_diarias (fecha, id_sucursal, id_empleado, total, n)
+    SELECT date(NEW.fecha_hora_salida), COALESCE(NEW.id_sucursal, 0),
+           COALESCE(NEW.id_empleado, 0), COALESCE(NEW.valor, 0), 1
+    WHERE NEW.fecha_hora_salida IS NOT NULL
+    ON CONFLICT(fecha, id_sucursal, id_empleado)
+    DO UPDATE SET total = total + excluded.total, n = n + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_alquiler_ventas_delete
+AFTER DELETE ON Alquiler
+WHEN OLD.fecha_hora_salida IS NOT NULL
+ AND NOT EXISTS (SELECT 1 FROM rollup_suspend)
+BEGIN
+    UPDATE ventas_diarias
+    SET total = total - COALESCE(OLD.valor, 0), n = n - 1
+    WHERE fecha = date(OLD.fecha_hora_salida)
+      AND id_sucursal = COALESCE(OLD.id_sucursal, 0)
+      AND id_empleado = COALESCE(OLD.id_empleado, 0);
+END;
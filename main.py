@@ -1,6 +1,7 @@
 import sys
 import os
 import logging
+import threading
 from dotenv import load_dotenv
 
 # Configuración centralizada de logging
@@ -30,33 +31,39 @@ def setup_connection_logging():
     return conn_logger
 
 # --- PRUEBA DE CONEXIÓN ANTES DE IMPORTAR PyQt5 ---
+# Solo en STARTUP_MODE=blocking: en modo "background" la ventana de login se
+# muestra de inmediato y el estado de los remotos lo detecta el monitor.
+load_dotenv()
+from src.config import Config
+
 offline_mode = False
-try:
-    import mysql.connector
-    load_dotenv()
-    config = {
-        'host': os.getenv('DB_REMOTE_HOST'),
-        'user': os.getenv('DB_REMOTE_USER'),
-        'password': os.getenv('DB_REMOTE_PASSWORD'),
-        'database': os.getenv('DB_REMOTE_NAME'),
-        'port': os.getenv('DB_REMOTE_PORT'),
-        'connection_timeout': 4,
-    }
-    print("[TEST-CONN-MAIN] Intentando conectar antes de importar PyQt5...")
-    conn = mysql.connector.connect(**config)
-    print("[TEST-CONN-MAIN] Conexión directa exitosa!")
-    cursor = conn.cursor()
-    cursor.execute("SELECT 1")
-    result = cursor.fetchone()
-    print(f"[TEST-CONN-MAIN] Resultado SELECT 1: {result}")
-    cursor.close()
-    conn.close()
-    print("[TEST-CONN-MAIN] Conexión cerrada correctamente.")
-except Exception as e:
-    offline_mode = True
-    print(f"[TEST-CONN-MAIN] Error de conexión directa: {e}")
-    logger.error(f"[TEST-CONN-MAIN] Error de conexión directa: {e}")
-    print("[TEST-CONN-MAIN] Se continuará en modo offline")
+if Config.STARTUP_MODE == "blocking":
+    try:
+        import mysql.connector
+        load_dotenv()
+        config = {
+            'host': os.getenv('DB_REMOTE_HOST'),
+            'user': os.getenv('DB_REMOTE_USER'),
+            'password': os.getenv('DB_REMOTE_PASSWORD'),
+            'database': os.getenv('DB_REMOTE_NAME'),
+            'port': os.getenv('DB_REMOTE_PORT'),
+            'connection_timeout': 4,
+        }
+        print("[TEST-CONN-MAIN] Intentando conectar antes de importar PyQt5...")
+        conn = mysql.connector.connect(**config)
+        print("[TEST-CONN-MAIN] Conexión directa exitosa!")
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+        result = cursor.fetchone()
+        print(f"[TEST-CONN-MAIN] Resultado SELECT 1: {result}")
+        cursor.close()
+        conn.close()
+        print("[TEST-CONN-MAIN] Conexión cerrada correctamente.")
+    except Exception as e:
+        offline_mode = True
+        print(f"[TEST-CONN-MAIN] Error de conexión directa: {e}")
+        logger.error(f"[TEST-CONN-MAIN] Error de conexión directa: {e}")
+        print("[TEST-CONN-MAIN] Se continuará en modo offline")
 
 # --- IMPORTS PyQt5 y módulos dependientes ---
 from PyQt5.QtWidgets import QApplication, QDialog, QMessageBox
@@ -71,6 +78,9 @@ from src.views.gerente_view import GerenteView
 from src.views.empleado_ventas_view import EmpleadoVentasView
 from src.views.empleado_caja_view import EmpleadoCajaView
 from src.views.empleado_mantenimiento_view import EmpleadoMantenimientoView
+from src.views.query_executor import QueryExecutor
+from src.views import async_support
+from src.async_db_manager import AsyncTripleDBManager
 from src.styles import MODERN_QSS
 
 
@@ -87,21 +97,39 @@ class AlquilerApp:
         # Inicializar gestores
         setup_connection_logging()
         self.db_manager = TripleDBManager()
-        self.db_manager.ping_remotes()
-        self.offline = offline_mode or self.db_manager.offline
+        blocking = Config.STARTUP_MODE == "blocking"
+        if blocking:
+            self.db_manager.ping_remotes()
+        # En modo background aún no se conoce el estado de los remotos: el
+        # hilo de monitoreo los comprueba sin retrasar la ventana de login
+        self.offline = offline_mode or (blocking and self.db_manager.offline)
         if self.offline:
             logger.warning("Trabajando en modo offline")
         if hasattr(self.db_manager, "start_worker"):
             # Iniciar hilo de sincronización en segundo plano si está disponible
             self.db_manager.start_worker()
+        if not blocking and hasattr(self.db_manager, "start_background_sync"):
+            # Copia remota -> SQLite sin retrasar la ventana de login; el
+            # progreso se muestra en LoginView
+            self.db_manager.start_background_sync()
         if hasattr(self.db_manager, "update_maintenance_states"):
-            try:
-                self.db_manager.update_maintenance_states()
-            except Exception as exc:
-                logger.error("Error updating maintenance states: %s", exc)
+            if blocking:
+                self._update_maintenance_states()
+            else:
+                threading.Thread(
+                    target=self._update_maintenance_states,
+                    name="maintenance-states",
+                    daemon=True,
+                ).start()
         self.auth_manager = AuthManager(self.db_manager)
         logger.info("Gestores inicializados correctamente")
 
+    def _update_maintenance_states(self):
+        try:
+            self.db_manager.update_maintenance_states()
+        except Exception as exc:
+            logger.error("Error updating maintenance states: %s", exc)
+
     def _cleanup(self):
         """Stop background services before exiting."""
         if hasattr(self, "backup_manager"):
@@ -109,9 +137,13 @@ class AlquilerApp:
                 self.backup_manager.backup_on_shutdown()
             except Exception as exc:  # pragma: no cover - cleanup errors
                 logger.error("Error during shutdown backup: %s", exc)
-        if hasattr(self.db_manager, "stop_worker"):
+        # Let running view queries finish before the pools close
+        QueryExecutor.shared().wait(5000)
+        async_support.close_async_db(getattr(self, "loop", None))
+        if hasattr(self.db_manager, "close"):
             try:
-                self.db_manager.stop_worker()
+                # Stops the worker threads and closes pooled connections
+                self.db_manager.close()
             except Exception as exc:  # pragma: no cover - cleanup errors
                 logger.error("Error stopping worker: %s", exc)
 
@@ -119,6 +151,11 @@ class AlquilerApp:
         logger.info("Iniciando aplicación...")
         app = QApplication(sys.argv)
         app.setStyleSheet(MODERN_QSS)
+        # Con qasync instalado, asyncio corre sobre el bucle de Qt y las vistas
+        # pueden usar AsyncTripleDBManager; sin él todo sigue igual
+        self.loop = async_support.install_event_loop(app)
+        if self.loop is not None:
+            async_support.set_async_db(AsyncTripleDBManager(self.db_manager))
         if self.offline:
             QMessageBox.warning(
                 None,
@@ -136,7 +173,7 @@ class AlquilerApp:
             self.show_role_view(user_data) # Pass user_data directly
 
             # Start the main application event loop after the role view is shown
-            sys.exit(app.exec_())
+            sys.exit(async_support.run_event_loop(app, self.loop))
         else:
             logger.info("Login cancelado por el usuario - cerrando aplicación")
             self._cleanup()
@@ -0,0 +1,193 @@
+import os
+import time
+import asyncio
+import logging
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import aiomysql
+except Exception:  # pragma: no cover - optional dependency
+    aiomysql = None
+
+from .triple_db_manager import TripleDBManager, _is_statement_error
+
+# aiomysql errors caused by the statement rather than the connection
+_AIO_STATEMENT_ERRORS = tuple(
+    getattr(aiomysql, name) for name in ("ProgrammingError", "IntegrityError", "DataError")
+    if aiomysql is not None and hasattr(aiomysql, name)
+)
+
+
+class AsyncTripleDBManager:
+    """asyncio front end for :class:`TripleDBManager`.
+
+    ``insert``/``update``/``delete``/``select``/``execute_query`` are
+    coroutines with the same arguments as the synchronous API. Writes keep
+    the replication and retry-queue logic of the wrapped manager and run on
+    a small thread pool (``DB_ASYNC_WORKERS``). SQLite is always accessed
+    through that pool. Remote SELECTs use ``aiomysql`` connection pools when
+    the package is installed. They still go through the manager's cache,
+    local-first tables, read policy and circuit breakers. Without
+    ``aiomysql`` every call falls back to the thread pool.
+
+    Read-your-writes is tracked by the wrapped manager, so a coroutine sees
+    the writes made from the GUI thread, the view workers and other
+    coroutines alike.
+
+    Example
+    -------
+    >>> db = AsyncTripleDBManager()
+    >>> rows = await db.select("SELECT id_marca, nombre_marca FROM Marca_vehiculo")
+    >>> await db.update("UPDATE Cliente SET nombre=%s WHERE id_cliente=%s", ("Ana", 1))
+    >>> await db.close()
+    """
+
+    def __init__(self, db=None, use_aiomysql=None):
+        self.logger = logging.getLogger(__name__)
+        self._owns_db = db is None
+        self.db = TripleDBManager() if db is None else db
+        workers = max(1, int(os.getenv("DB_ASYNC_WORKERS", "4")))
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="async-db")
+        if use_aiomysql is None:
+            use_aiomysql = os.getenv("DB_ASYNC_DRIVER", "aiomysql").strip().lower() == "aiomysql"
+        self.native = bool(use_aiomysql and aiomysql is not None)
+        if use_aiomysql and aiomysql is None:
+            self.logger.info("aiomysql not installed; remote queries run on the thread pool")
+        self._aio_pools = {}
+        self._aio_lock = None
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+
+    def _aio_config(self, name):
+        if name == "remote1":
+            config, pool = self.db._config_remote1(), self.db._pool1
+        else:
+            config, pool = self.db._config_remote2(), self.db._pool2
+        return {
+            "host": config["host"],
+            "port": int(config["port"] or 3306),
+            "user": config["user"],
+            "password": config["password"] or "",
+            "db": config["database"],
+            "connect_timeout": config["connection_timeout"],
+            "autocommit": True,
+            "minsize": 1,
+            "maxsize": pool.size,
+        }
+
+    async def _aio_pool(self, name):
+        if self._aio_lock is None:
+            self._aio_lock = asyncio.Lock()
+        async with self._aio_lock:
+            pool = self._aio_pools.get(name)
+            if pool is None:
+                pool = await aiomysql.create_pool(**self._aio_config(name))
+                self._aio_pools[name] = pool
+            return pool
+
+    # ------------------------------------------------------------------
+    # CRUD public API
+    # ------------------------------------------------------------------
+    async def insert(self, query, params=None):
+        return await self._write(self.db.insert, query, params)
+
+    async def update(self, query, params=None):
+        return await self._write(self.db.update, query, params)
+
+    async def delete(self, query, params=None):
+        return await self._write(self.db.delete, query, params)
+
+    async def _write(self, method, query, params):
+        return await self._run(method, query, params)
+
+    async def select(self, query, params=None):
+        if not self.native:
+            return await self._run(self.db.select, query, params)
+        # Same cache, local-first, read order and statistics as db.select
+        db = self.db
+        plan = db.plan_read(query, params)
+        if plan.cached is not None:
+            return plan.cached
+        if plan.local:
+            rows = await self._run(db._read_sqlite, query, params)
+            if rows is not None:
+                return plan.finish(rows, "local")
+        for name in plan.remotes():
+            found, rows = await self._select_remote(name, query, params)
+            if found:
+                return plan.finish(rows, name)
+        rows = await self._run(db._read_sqlite, query, params)
+        return plan.finish(rows, "sqlite")
+
+    async def _select_remote(self, name, query, params):
+        """aiomysql counterpart of ``TripleDBManager._select_remote``."""
+        db = self.db
+        breaker = db._breakers[name]
+        if not breaker.allow():
+            return False, None
+        try:
+            pool = await self._aio_pool(name)
+            conn = await pool.acquire()
+        except Exception as exc:
+            self.logger.error("Async %s connection failed: %s", name, exc)
+            db.health.report(name, False)
+            breaker.record_failure()
+            return False, None
+        db.health.report(name, True)
+        started = time.monotonic()
+        try:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query, params or ())
+                rows = list(await cursor.fetchall())
+        except Exception as exc:  # pragma: no cover - network errors
+            self.logger.error("Async select %s failed: %s", name, exc)
+            conn.close()
+            if _is_statement_error(exc) or isinstance(exc, _AIO_STATEMENT_ERRORS):
+                breaker.record_success()
+            else:
+                breaker.record_failure()
+                db.health.check_now(name)
+            return False, None
+        finally:
+            pool.release(conn)
+        breaker.record_success()
+        db._record_read(name, time.monotonic() - started)
+        return True, rows
+
+    async def execute_query(self, query, params=None, fetch=True, return_lastrowid=False):
+        """Async version of :meth:`TripleDBManager.execute_query`."""
+        if fetch:
+            return await self.select(query, params)
+        lowered = query.strip().lower()
+        if return_lastrowid or lowered.startswith("insert"):
+            return await self.insert(query, params)
+        if lowered.startswith("delete"):
+            return await self.delete(query, params)
+        return await self.update(query, params)
+
+    async def execute_query_with_headers(self, query, params=None):
+        return await self._run(self.db.execute_query_with_headers, query, params)
+
+    async def close(self):
+        """Close the aiomysql pools, the thread pool and (if owned) the manager."""
+        for pool in self._aio_pools.values():
+            pool.close()
+            await pool.wait_closed()
+        self._aio_pools.clear()
+        self._executor.shutdown(wait=True)
+        if self._owns_db:
+            await asyncio.get_running_loop().run_in_executor(None, self.db.close)
+
+    def __getattr__(self, name):
+        # Non-query helpers (get_read_stats, health, offline...) are shared
+        if name == "db":
+            raise AttributeError(name)
+        return getattr(self.db, name)
@@ -8,7 +8,14 @@ from dotenv import load_dotenv
 
 
 class BackupManager:
-    """Handle SQLite database backups with rotation and integrity checks."""
+    """Handle SQLite database backups with rotation and integrity checks.
+
+    The local database runs in WAL mode, so recent commits may only live in
+    the ``-wal`` file next to it. Backups therefore go through SQLite's online
+    backup API instead of copying the main file, and restores remove the
+    stale ``-wal``/``-shm`` files so they are not replayed over the restored
+    copy.
+    """
 
     def __init__(self, db_path=None, backup_dir=None, max_backups=3):
         load_dotenv()
@@ -34,11 +41,27 @@ class BackupManager:
         except Exception as exc:
             self.logger.error("Failed to ensure backup directory %s: %s", self.backup_dir, exc)
 
+    def _wal_files(self):
+        """Return the WAL and shared-memory side files of the database."""
+        return [f"{self.db_path}-wal", f"{self.db_path}-shm"]
+
+    def _remove_wal_files(self):
+        for path in self._wal_files():
+            try:
+                if os.path.exists(path):
+                    os.remove(path)
+                    self.logger.info("Removed stale WAL file: %s", path)
+            except Exception as exc:
+                self.logger.error("Failed to remove WAL file %s: %s", path, exc)
+
     def _has_enough_space(self):
         """Return True if there is enough free disk space for a copy."""
         try:
             usage = shutil.disk_usage(self.backup_dir)
             db_size = os.path.getsize(self.db_path)
+            wal = self._wal_files()[0]
+            if os.path.exists(wal):
+                db_size += os.path.getsize(wal)
             self.logger.info("Free space: %s bytes", usage.free)
             if usage.free < db_size:
                 self.logger.error(
@@ -71,7 +94,7 @@ class BackupManager:
             timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
             name = f"backup_{backup_type}_{timestamp}.db"
             dest = os.path.join(self.backup_dir, name)
-            shutil.copy2(self.db_path, dest)
+            self._copy_database(dest)
             self.logger.info("Backup created: %s", dest)
             self.cleanup_old_backups(backup_type)
             return dest
@@ -79,6 +102,18 @@ class BackupManager:
             self.logger.error("Failed to create backup: %s", exc)
             return None
 
+    def _copy_database(self, dest):
+        """Write a consistent snapshot of the database (WAL included) to ``dest``."""
+        src = sqlite3.connect(self.db_path)
+        dst = sqlite3.connect(dest)
+        try:
+            src.backup(dst)
+            # Keep the backup as a single self-contained file
+            dst.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            dst.close()
+            src.close()
+
     def cleanup_old_backups(self, backup_type):
         """Remove excess backups and optionally compress older ones."""
         self.logger.info("Cleaning up old backups for type %s", backup_type)
@@ -117,6 +152,7 @@ class BackupManager:
         """Restore the database from the specified backup file."""
         self.logger.info("Restoring database from %s", backup_file)
         try:
+            self._remove_wal_files()
             shutil.copy2(backup_file, self.db_path)
             self.logger.info("Database restored from %s", backup_file)
         except Exception as exc:
@@ -183,6 +219,7 @@ class BackupManager:
                     self.logger.info("Restoring database from %s", latest)
                     self.restore_from_backup(latest)
                 else:
+                    self._remove_wal_files()
                     open(self.db_path, "w").close()
                     self.logger.warning(
                         "No valid backups found. Created new empty database: %s",
@@ -0,0 +1,117 @@
+import time
+import logging
+import threading
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Per-server circuit breaker for the read path.
+
+    ``closed``: requests go through; ``failure_threshold`` consecutive
+    failures open the circuit. ``open``: requests are rejected without
+    touching the network until ``cooldown`` seconds have passed.
+    ``half_open``: up to ``half_open_max`` trial requests are let through; a
+    success closes the circuit and a failure opens it again for another
+    cooldown.
+
+    Rejected requests are counted in ``short_circuited`` so the time saved
+    on a server that is down shows up in :meth:`stats`.
+    """
+
+    def __init__(self, name, failure_threshold=3, cooldown=30.0, half_open_max=1):
+        self.name = name
+        self.logger = logging.getLogger(__name__)
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.cooldown = max(0.0, float(cooldown))
+        self.half_open_max = max(1, int(half_open_max))
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trials = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "allowed": 0,
+            "short_circuited": 0,
+            "successes": 0,
+            "failures": 0,
+            "opened": 0,
+        }
+
+    @property
+    def state(self):
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+            self._state = HALF_OPEN
+            self._trials = 0
+
+    def _open(self):
+        if self._state != OPEN:
+            self._stats["opened"] += 1
+            self.logger.warning("Circuit %s opened", self.name)
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._trials = 0
+
+    def allow(self):
+        """Return True if a request may be sent to the server now."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == OPEN or (
+                self._state == HALF_OPEN and self._trials >= self.half_open_max
+            ):
+                self._stats["short_circuited"] += 1
+                return False
+            if self._state == HALF_OPEN:
+                self._trials += 1
+            self._stats["allowed"] += 1
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._stats["successes"] += 1
+            self._failures = 0
+            if self._state != CLOSED:
+                self.logger.info("Circuit %s closed", self.name)
+            self._state = CLOSED
+            self._trials = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._stats["failures"] += 1
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._open()
+
+    def trip(self):
+        """Open the circuit now (e.g. the health monitor saw the server go down)."""
+        with self._lock:
+            self._failures = max(self._failures, self.failure_threshold)
+            self._open()
+
+    def reset(self):
+        """Close the circuit now (e.g. the health monitor saw the server recover)."""
+        with self._lock:
+            if self._state != CLOSED:
+                self.logger.info("Circuit %s closed", self.name)
+            self._state = CLOSED
+            self._failures = 0
+            self._trials = 0
+
+    def stats(self):
+        with self._lock:
+            self._maybe_half_open()
+            data = dict(self._stats)
+            data["state"] = self._state
+            data["consecutive_failures"] = self._failures
+            if self._state == OPEN:
+                data["retry_in"] = round(
+                    max(0.0, self.cooldown - (time.monotonic() - self._opened_at)), 1
+                )
+            return data
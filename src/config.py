@@ -21,3 +21,31 @@ class Config:
     # Tiempo de bloqueo en segundos cuando se supera el número de intentos
     BLOCK_TIME = 600  # 10 minutos
     PASSWORD_HASH = "sha256"
+
+    # Ajustes de la base local SQLite
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    # Valor negativo = tamaño en KiB (-16000 ~ 16 MB por conexión)
+    SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', '-16000'))
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(64 * 1024 * 1024)))
+    # Milisegundos que una conexión espera un bloqueo antes de fallar
+    SQLITE_BUSY_TIMEOUT = int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000'))
+    # Segundos entre checkpoints del WAL ejecutados por el hilo de monitoreo
+    SQLITE_CHECKPOINT_INTERVAL = int(os.getenv('SQLITE_CHECKPOINT_INTERVAL', '300'))
+
+    # Sincronización remota -> local: segundos entre copias completas de cada
+    # tabla; entre ellas solo se traen filas nuevas según su marca de agua
+    SYNC_FULL_INTERVAL = int(os.getenv('SYNC_FULL_INTERVAL', '86400'))
+    # Filas leídas de la base remota y aplicadas en SQLite por lote
+    SYNC_CHUNK_SIZE = int(os.getenv('SYNC_CHUNK_SIZE', '1000'))
+    # Hilos que copian tablas en paralelo (1 = secuencial)
+    SYNC_WORKERS = int(os.getenv('SYNC_WORKERS', '4'))
+
+    # Arranque: "background" muestra la interfaz de inmediato y sincroniza en
+    # segundo plano; "blocking" conserva la comprobación y copia previas
+    STARTUP_MODE = os.getenv('STARTUP_MODE', 'background').strip().lower()
+    # Segundos que una consulta local espera a que su tabla termine de copiarse
+    STARTUP_SYNC_WAIT = float(os.getenv('STARTUP_SYNC_WAIT', '5'))
+
+    # Hilos del ejecutor compartido que corre las consultas de las vistas
+    VIEW_QUERY_THREADS = int(os.getenv('VIEW_QUERY_THREADS', '4'))
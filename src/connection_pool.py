@@ -0,0 +1,320 @@
+import time
+import logging
+import threading
+from collections import OrderedDict, deque
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection could be checked out before the timeout."""
+
+
+class PooledConnection:
+    """Wrapper returned by :class:`ConnectionPool`.
+
+    It proxies every attribute to the underlying driver connection. Calling
+    ``close()`` hands the connection back to the pool instead of closing the
+    socket, so existing ``conn.close()`` calls keep working unchanged.
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self._broken = False
+        self._released = False
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.last_checked = self.created_at
+        # SQL text -> server-side prepared cursor, least recently used first
+        self._statements = OrderedDict()
+
+    @property
+    def raw(self):
+        return self._raw
+
+    def prepared_cursor(self, query):
+        """Return ``(cursor, reused)`` with a prepared statement for ``query``.
+
+        The cursor stays open and cached on this connection so the next
+        execution of the same SQL skips the server-side parse. Callers must
+        not close it; it is closed when evicted (LRU, ``statement_cache_size``
+        per connection) or when the connection is discarded. Pass the
+        ``sys.intern``-ed SQL to ``cursor.execute``: the driver only skips the
+        prepare when it is the very object executed last time.
+        """
+        cursor = self._statements.get(query)
+        if cursor is not None:
+            self._statements.move_to_end(query)
+            self._pool._count("statement_hits")
+            return cursor, True
+        cursor = self._raw.cursor(prepared=True)
+        self._statements[query] = cursor
+        self._pool._count("statement_misses")
+        while len(self._statements) > self._pool.statement_cache_size:
+            _query, old = self._statements.popitem(last=False)
+            self._close_cursor(old)
+            self._pool._count("statement_evictions")
+        return cursor, False
+
+    def forget_statement(self, query):
+        """Drop the cached statement for ``query`` (e.g. after an error)."""
+        cursor = self._statements.pop(query, None)
+        if cursor is not None:
+            self._close_cursor(cursor)
+
+    def close_statements(self):
+        for cursor in self._statements.values():
+            self._close_cursor(cursor)
+        self._statements.clear()
+
+    @staticmethod
+    def _close_cursor(cursor):
+        try:
+            # Deallocates the statement on the server
+            cursor.close()
+        except Exception:  # pragma: no cover - dead connection
+            pass
+
+    def invalidate(self):
+        """Mark the connection as unusable so it is discarded on release."""
+        self._broken = True
+
+    def close(self):
+        if self._released:
+            return
+        self._released = True
+        self._pool.release(self)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.invalidate()
+        self.close()
+        return False
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of connections to a single server.
+
+    Parameters
+    ----------
+    name : str
+        Label used in logs and statistics (``remote1``, ``remote2``...).
+    factory : callable
+        Function returning a new driver connection.
+    size : int
+        Maximum number of open connections (idle + in use).
+    timeout : float
+        Seconds to wait for a free connection before raising
+        :class:`PoolTimeoutError`.
+    max_idle : float
+        Idle connections older than this many seconds are closed.
+    health_check_interval : float
+        Idle connections unused for longer than this are pinged on checkout.
+    statement_cache_size : int
+        Prepared statements kept per connection (0 disables them).
+    """
+
+    def __init__(self, name, factory, size=5, timeout=5.0, max_idle=300.0,
+                 health_check_interval=30.0, statement_cache_size=0):
+        self.name = name
+        self.logger = logging.getLogger(__name__)
+        self._factory = factory
+        self.size = max(1, int(size))
+        self.timeout = float(timeout)
+        self.max_idle = float(max_idle)
+        self.health_check_interval = float(health_check_interval)
+        self.statement_cache_size = max(0, int(statement_cache_size))
+        self._idle = deque()
+        self._in_use = 0
+        self._total = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats = {
+            "created": 0,
+            "closed": 0,
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "health_check_failures": 0,
+            "evicted_idle": 0,
+            "statement_hits": 0,
+            "statement_misses": 0,
+            "statement_evictions": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Checkout / release
+    # ------------------------------------------------------------------
+    def acquire(self, timeout=None):
+        """Return a healthy :class:`PooledConnection`.
+
+        Raises :class:`PoolTimeoutError` when the pool is exhausted for longer
+        than ``timeout`` and propagates driver errors raised while opening a
+        new connection.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waited = False
+        while True:
+            create = False
+            candidate = None
+            with self._cond:
+                if self._closed:
+                    raise PoolTimeoutError(f"Pool {self.name} is closed")
+                self._evict_idle_locked()
+                if self._idle:
+                    candidate = self._idle.pop()
+                    self._in_use += 1
+                elif self._total < self.size:
+                    self._total += 1
+                    self._in_use += 1
+                    create = True
+                else:
+                    if not waited:
+                        waited = True
+                        self._stats["waits"] += 1
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeoutError(
+                            f"Timed out after {timeout}s waiting for a {self.name} connection"
+                        )
+                    self._cond.wait(remaining)
+                    continue
+
+            if create:
+                try:
+                    raw = self._factory()
+                except Exception:
+                    with self._cond:
+                        self._total -= 1
+                        self._in_use -= 1
+                        self._cond.notify()
+                    raise
+                conn = PooledConnection(self, raw)
+                with self._cond:
+                    self._stats["created"] += 1
+                    self._stats["checkouts"] += 1
+                return conn
+
+            if self._is_healthy(candidate):
+                candidate._released = False
+                candidate._broken = False
+                with self._cond:
+                    self._stats["checkouts"] += 1
+                return candidate
+            # Stale connection: drop it and loop to get another one.
+            self._discard(candidate)
+
+    def release(self, conn):
+        """Return ``conn`` to the pool, or close it when it is broken."""
+        if conn._broken:
+            self._discard(conn)
+            return
+        conn.last_used = time.monotonic()
+        with self._cond:
+            self._in_use -= 1
+            if self._closed:
+                self._total -= 1
+                self._stats["closed"] += 1
+                close_now = True
+            else:
+                self._idle.append(conn)
+                close_now = False
+            self._cond.notify()
+        if close_now:
+            self._close_raw(conn)
+
+    def _discard(self, conn):
+        with self._cond:
+            self._in_use -= 1
+            self._total -= 1
+            self._stats["closed"] += 1
+            self._cond.notify()
+        self._close_raw(conn)
+
+    # ------------------------------------------------------------------
+    # Health checks and eviction
+    # ------------------------------------------------------------------
+    def _is_healthy(self, conn):
+        now = time.monotonic()
+        if now - conn.last_checked < self.health_check_interval:
+            return True
+        try:
+            ok = conn.raw.is_connected()
+        except Exception:
+            ok = False
+        conn.last_checked = now
+        if not ok:
+            with self._cond:
+                self._stats["health_check_failures"] += 1
+            self.logger.warning("Pool %s: discarding dead connection", self.name)
+        return ok
+
+    def _evict_idle_locked(self):
+        """Close idle connections unused for longer than ``max_idle``."""
+        if not self._idle:
+            return
+        cutoff = time.monotonic() - self.max_idle
+        keep = deque()
+        expired = []
+        for conn in self._idle:
+            (expired if conn.last_used < cutoff else keep).append(conn)
+        if not expired:
+            return
+        self._idle = keep
+        self._total -= len(expired)
+        self._stats["evicted_idle"] += len(expired)
+        self._stats["closed"] += len(expired)
+        for conn in expired:
+            self._close_raw(conn)
+
+    def evict_idle(self):
+        """Public hook to trim idle connections outside of a checkout."""
+        with self._cond:
+            self._evict_idle_locked()
+
+    def _count(self, key):
+        with self._cond:
+            self._stats[key] += 1
+
+    def _close_raw(self, conn):
+        conn.close_statements()
+        try:
+            conn.raw.close()
+        except Exception:  # pragma: no cover - closing a dead socket
+            pass
+
+    # ------------------------------------------------------------------
+    # Shutdown and statistics
+    # ------------------------------------------------------------------
+    def close_all(self):
+        """Close idle connections and refuse further checkouts."""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._total -= len(idle)
+            self._stats["closed"] += len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            self._close_raw(conn)
+
+    def stats(self):
+        """Return a snapshot of the pool counters."""
+        with self._cond:
+            data = dict(self._stats)
+            data.update(
+                {
+                    "size": self.size,
+                    "in_use": self._in_use,
+                    "idle": len(self._idle),
+                    "open": self._total,
+                }
+            )
+        return data
@@ -8,6 +8,8 @@ except Exception:  # pragma: no cover - if connector missing
 from dotenv import load_dotenv
 
 from .sqlite_manager import SQLiteManager
+from .local_sync import LocalSync, tables_in_query
+from .config import Config
 
 
 class DBManager:
@@ -19,6 +21,17 @@ class DBManager:
         self.logger = logging.getLogger(__name__)
         self.offline = False  # Inicializa en modo remoto por defecto
         self._sqlite = SQLiteManager()
+        self._local_sync = LocalSync(self._sqlite)
+        if Config.STARTUP_MODE == "blocking":
+            self._startup_sync_blocking()
+        else:
+            # La interfaz arranca de inmediato; las consultas locales esperan
+            # (hasta STARTUP_SYNC_WAIT segundos) a que su tabla esté copiada
+            print("[SYNC] Sincronizando datos críticos en segundo plano...")
+            self.logger.info("[SYNC] Sincronizando datos críticos en segundo plano...")
+            self._local_sync.start_background(self._open_remote, on_error=self._on_startup_sync_error)
+
+    def _startup_sync_blocking(self):
         # Intentar sincronizar datos críticos al iniciar si hay conexión
         try:
             conn = self.connect()
@@ -33,6 +46,34 @@ class DBManager:
             print(f"[SYNC][ERROR] Error al sincronizar datos críticos al iniciar: {e}")
             self.logger.error(f"Error al sincronizar datos críticos al iniciar: {e}")
 
+    def _on_startup_sync_error(self, exc):
+        """The background startup sync could not reach the remote server."""
+        self.logger.error(f"Error al sincronizar datos críticos al iniciar: {exc}")
+        self.offline = True
+        self.was_offline = True
+
+    def add_sync_listener(self, callback):
+        """Register ``callback(table, done, total, stats)`` for sync progress."""
+        self._local_sync.add_listener(callback)
+
+    def remove_sync_listener(self, callback):
+        self._local_sync.remove_listener(callback)
+
+    def is_syncing(self):
+        """Return True while the startup sync is still copying tables."""
+        return self._local_sync.running
+
+    def _wait_for_local_tables(self, query):
+        """Give the running sync a chance to copy the tables ``query`` reads.
+
+        On timeout the query simply runs against the existing local copy.
+        """
+        tables = tables_in_query(query)
+        if tables and not self._local_sync.wait_for_tables(tables, Config.STARTUP_SYNC_WAIT):
+            self.logger.info(
+                "[SYNC][INFO] Tablas %s aún sincronizando; usando la copia local existente", tables
+            )
+
     def is_sqlite(self):
         """Return True if operating in offline SQLite mode."""
         return self.offline
@@ -119,6 +160,8 @@ class DBManager:
             conn = self.connect()
             self.logger.info(f"Conexión establecida: {conn is not None}")
             if self.is_sqlite():
+                if fetch:
+                    self._wait_for_local_tables(query)
                 query = query.replace('%s', '?')
                 self.logger.info(f"Consulta adaptada para SQLite: {query}")
                 # Si estamos offline y es un INSERT, guardar como pendiente en SQLite
@@ -274,6 +317,7 @@ class DBManager:
             print(f"[DB_EXEC_HEADERS] Params: {params}")
             conn = self.connect()
             if self.is_sqlite():
+                self._wait_for_local_tables(query)
                 query = query.replace('%s', '?')
             if conn is None:
                 return None, []
@@ -437,107 +481,43 @@ class DBManager:
         print("[SYNC][INFO] Subida de datos locales pendientes finalizada.")
         self.logger.info("[SYNC][INFO] Subida de datos locales pendientes finalizada.")
 
-    def sync_critical_data_to_local(self):
-        """Sincroniza datos críticos de la base remota a la base local SQLite."""
+    def sync_critical_data_to_local(self, full=False):
+        """Sincroniza datos críticos de la base remota a la base local SQLite.
+
+        Solo se copian las filas nuevas desde la última marca de agua de cada
+        tabla (ver :mod:`src.local_sync`); ``full=True`` fuerza la copia
+        completa. Devuelve las estadísticas por tabla.
+        """
         if self.offline:
             print("[SYNC][INFO] Sincronización omitida, modo sin conexión.")
             self.logger.info("[SYNC][INFO] Sincronización omitida, modo sin conexión.")
-            return
+            return {}
         print("[SYNC][INFO] Iniciando sincronización de datos críticos...")
         self.logger.info("[SYNC][INFO] Iniciando sincronización de datos críticos...")
-        tablas = [
-            # (nombre_tabla, columnas, clave primaria, si es autoincrement)
-            ("Rol", ["id_rol", "nombre"], "id_rol", True),
-            ("Tipo_documento", ["id_tipo_documento", "descripcion"], "id_tipo_documento", True),
-            ("Codigo_postal", ["id_codigo_postal", "pais", "departamento", "ciudad"], "id_codigo_postal", False),
-            ("Estado_vehiculo", ["id_estado", "descripcion"], "id_estado", True),
-            ("Marca_vehiculo", ["id_marca", "nombre_marca"], "id_marca", True),
-            ("Color_vehiculo", ["id_color", "nombre_color"], "id_color", True),
-            ("Tipo_vehiculo", ["id_tipo", "descripcion", "capacidad", "combustible", "tarifa_dia"], "id_tipo", True),
-            ("Blindaje_vehiculo", ["id_blindaje", "descripcion"], "id_blindaje", True),
-            ("Transmision_vehiculo", ["id_transmision", "descripcion"], "id_transmision", True),
-            ("Cilindraje_vehiculo", ["id_cilindraje", "descripcion"], "id_cilindraje", True),
-            ("Sucursal", ["id_sucursal", "nombre", "direccion", "telefono", "gerente", "id_codigo_postal"], "id_sucursal", True),
-            ("Seguro_vehiculo", ["id_seguro", "estado", "descripcion", "vencimiento", "costo"], "id_seguro", True),
-            ("Tipo_empleado", ["id_tipo_empleado", "descripcion"], "id_tipo_empleado", True),
-            ("Empleado", ["id_empleado", "documento", "nombre", "telefono", "correo", "cargo"], "id_empleado", True),
-            ("Cliente", ["id_cliente", "documento", "nombre", "telefono", "correo"], "id_cliente", True),
-            ("Usuario", ["id_usuario", "usuario", "contrasena", "id_rol", "id_cliente", "id_empleado"], "id_usuario", True),
-            ("Vehiculo", ["placa", "n_chasis", "modelo", "kilometraje", "id_marca", "id_color", "id_tipo_vehiculo", "id_blindaje", "id_transmision", "id_cilindraje", "id_seguro_vehiculo", "id_estado_vehiculo", "id_proveedor", "id_sucursal"], "placa", False),
-            ("Medio_pago", ["id_medio_pago", "descripcion"], "id_medio_pago", True),
-            ("Estado_alquiler", ["id_estado", "descripcion"], "id_estado", True),
-            ("Licencia_conduccion", ["id_licencia", "estado", "fecha_emision", "fecha_vencimiento", "id_categoria"], "id_licencia", True),
-            ("Categoria_licencia", ["id_categoria", "descripcion"], "id_categoria", True),
-            ("Taller_mantenimiento", ["id_taller", "nombre", "direccion", "telefono"], "id_taller", True),
-            ("Tipo_mantenimiento", ["id_tipo", "descripcion"], "id_tipo", True),
-            ("Proveedor_vehiculo", ["id_proveedor", "nombre", "direccion", "telefono", "correo"], "id_proveedor", True),
-            ("Alquiler", ["id_alquiler", "fecha_hora_salida", "valor", "fecha_hora_entrada", "id_vehiculo", "id_cliente", "id_sucursal", "id_medio_pago", "id_estado", "id_seguro", "id_descuento"], "id_alquiler", True),
-            ("Reserva_alquiler", ["id_reserva", "fecha_hora", "abono", "saldo_pendiente", "id_estado_reserva", "id_alquiler"], "id_reserva", True),
-            ("Abono_reserva", ["id_abono", "valor", "fecha_hora", "id_reserva", "id_medio_pago"], "id_abono", True),
-        ]
-        conn_remota = self.connect()
-        conn_local = self._sqlite.connect()
-        for nombre, columnas, pk, autoinc in tablas:
-            try:
-                cursor_remota = conn_remota.cursor()
-                cursor_local = conn_local.cursor()
-                cols_str = ', '.join(columnas)
-                if nombre == "Alquiler":
-                    cursor_remota.execute(
-                        f"SELECT {cols_str} FROM {nombre} WHERE fecha_hora_salida >= DATE_SUB(NOW(), INTERVAL 7 DAY)"
-                    )
-                elif nombre == "Reserva_alquiler":
-                    cursor_remota.execute(
-                        f"SELECT {cols_str} FROM {nombre} WHERE fecha_hora >= DATE_SUB(NOW(), INTERVAL 7 DAY)"
-                    )
-                elif nombre == "Abono_reserva":
-                    cursor_remota.execute(
-                        f"SELECT {cols_str} FROM {nombre} WHERE fecha_hora >= DATE_SUB(NOW(), INTERVAL 7 DAY)"
-                    )
-                else:
-                    cursor_remota.execute(f"SELECT {cols_str} FROM {nombre}")
-                rows = cursor_remota.fetchall()
-                for row in rows:
-                    placeholders = ', '.join(['?'] * len(columnas))
-                    update_str = ', '.join([f'{col}=?' for col in columnas])
-                    cursor_local.execute(
-                        f"UPDATE {nombre} SET {update_str} WHERE {pk}=?",
-                        tuple(row) + (row[columnas.index(pk)],),
-                    )
-                    if cursor_local.rowcount == 0:
-                        cursor_local.execute(
-                            f"INSERT OR IGNORE INTO {nombre} ({cols_str}) VALUES ({placeholders})",
-                            row,
-                        )
-                if nombre == "Alquiler":
-                    cursor_local.execute(
-                        "DELETE FROM Alquiler WHERE fecha_hora_salida < date('now','-7 day')"
-                    )
-                elif nombre == "Reserva_alquiler":
-                    cursor_local.execute(
-                        "DELETE FROM Reserva_alquiler WHERE fecha_hora < date('now','-7 day')"
-                    )
-                elif nombre == "Abono_reserva":
-                    cursor_local.execute(
-                        "DELETE FROM Abono_reserva WHERE fecha_hora < date('now','-7 day')"
-                    )
-                conn_local.commit()
-                cursor_remota.close()
-                cursor_local.close()
-                print(f"[SYNC][INFO] Sincronizada tabla {nombre} ({len(rows)} registros)")
-                self.logger.info(f"[SYNC][INFO] Sincronizada tabla {nombre} ({len(rows)} registros)")
-            except Exception as exc:
-                print(f"[SYNC][ERROR] Error sincronizando tabla {nombre}: {exc}")
-                self.logger.error(f"[SYNC][ERROR] Error sincronizando tabla {nombre}: {exc}")
-        conn_remota.close()
-        conn_local.close()
-        print("[SYNC][INFO] Sincronización de datos críticos finalizada.")
-        self.logger.info("[SYNC][INFO] Sincronización de datos críticos finalizada.")
+        stats = self._local_sync.sync(self._open_remote, full=full)
+        filas = sum(t.get("rows", 0) for t in stats.values())
+        print(f"[SYNC][INFO] Sincronización de datos críticos finalizada ({filas} registros).")
+        self.logger.info("[SYNC][INFO] Sincronización de datos críticos finalizada (%d registros).", filas)
+        return stats
+
+    def _open_remote(self):
+        """Open a dedicated remote connection (one per sync worker)."""
+        config = {
+            'host': os.getenv('DB_REMOTE_HOST'),
+            'user': os.getenv('DB_REMOTE_USER'),
+            'password': os.getenv('DB_REMOTE_PASSWORD'),
+            'database': os.getenv('DB_REMOTE_NAME'),
+            'port': os.getenv('DB_REMOTE_PORT'),
+            'connection_timeout': 10,
+        }
+        conn = mysql.connector.connect(**config)
+        conn.autocommit = True
+        return conn
 
     def close(self):
-        """Placeholder to keep API compatibility."""
-        # Connections are opened and closed per query
-        pass
+        """Release the persistent SQLite connections."""
+        # Remote connections are opened and closed per query
+        self._sqlite.close()
 
     def get_lastrowid(self, table_name):
         """Obtener el último ID insertado en una tabla específica."""
@@ -0,0 +1,188 @@
+import time
+import logging
+import threading
+
+
+class HealthMonitor:
+    """Single background thread tracking whether each remote is reachable.
+
+    ``checks`` maps a name (``remote1``, ``remote2``...) to a callable that
+    returns True when the server answers. Servers that are up are checked
+    every ``interval`` seconds. After a failed check the delay doubles, up to
+    ``max_backoff``, so a server that is down does not cost a connect timeout
+    every few seconds.
+
+    Query code can :meth:`report` what it observed (a failed connect, a
+    successful query) so the state changes without waiting for the next
+    check. Every change is pushed to the callbacks registered with
+    :meth:`add_listener` as ``callback(name, online)``. Views subscribe to
+    these callbacks instead of pinging the servers themselves.
+    """
+
+    def __init__(self, checks, interval=5.0, max_backoff=60.0):
+        self.logger = logging.getLogger(__name__)
+        self._checks = dict(checks)
+        self.interval = max(0.1, float(interval))
+        self.max_backoff = max(self.interval, float(max_backoff))
+        # None = not checked yet
+        self._state = {name: None for name in self._checks}
+        self._failures = {name: 0 for name in self._checks}
+        self._next_check = {name: 0.0 for name in self._checks}
+        self._stats = {
+            name: {"checks": 0, "failed_checks": 0, "changes": 0, "last_latency": None}
+            for name in self._checks
+        }
+        self._listeners = []
+        self._periodic = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ------------------------------------------------------------------
+    # Observer API
+    # ------------------------------------------------------------------
+    def add_listener(self, callback):
+        """Call ``callback(name, online)`` whenever a remote changes state."""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def add_periodic(self, callback):
+        """Run ``callback()`` on the monitor thread every ``interval`` seconds."""
+        self._periodic.append(callback)
+
+    def _notify(self, name, online):
+        for callback in list(self._listeners):
+            try:
+                callback(name, online)
+            except Exception as exc:  # pragma: no cover - listener bugs are logged
+                self.logger.error("Health listener error: %s", exc)
+
+    # ------------------------------------------------------------------
+    # State
+    # ------------------------------------------------------------------
+    def is_online(self, name):
+        return bool(self._state.get(name))
+
+    def status(self):
+        """Return ``{name: online}`` for every monitored remote."""
+        with self._lock:
+            return {name: bool(state) for name, state in self._state.items()}
+
+    def stats(self):
+        """Return check counters and current backoff per remote."""
+        with self._lock:
+            data = {}
+            for name, counters in self._stats.items():
+                data[name] = dict(counters)
+                data[name]["online"] = bool(self._state[name])
+                data[name]["consecutive_failures"] = self._failures[name]
+                data[name]["next_check_in"] = round(
+                    max(0.0, self._next_check[name] - time.monotonic()), 1
+                )
+            return data
+
+    def _backoff(self, failures):
+        return min(self.interval * (2 ** max(0, failures - 1)), self.max_backoff)
+
+    def report(self, name, online):
+        """Record an observation made outside the monitor (e.g. a query)."""
+        online = bool(online)
+        with self._lock:
+            if name not in self._state:
+                return
+            previous = self._state[name]
+            self._state[name] = online
+            now = time.monotonic()
+            if online:
+                self._failures[name] = 0
+                self._next_check[name] = now + self.interval
+            elif previous or previous is None:
+                # Newly down: recheck soon, then back off
+                self._failures[name] = 1
+                self._next_check[name] = now + self._backoff(1)
+            changed = previous != online
+            if changed:
+                self._stats[name]["changes"] += 1
+        if changed:
+            self._notify(name, online)
+
+    def check(self, name):
+        """Run the check for ``name`` now and return the result."""
+        started = time.monotonic()
+        try:
+            ok = bool(self._checks[name]())
+        except Exception as exc:
+            self.logger.debug("Health check %s failed: %s", name, exc)
+            ok = False
+        with self._lock:
+            counters = self._stats[name]
+            counters["checks"] += 1
+            counters["last_latency"] = round(time.monotonic() - started, 4)
+            if not ok:
+                counters["failed_checks"] += 1
+                was_down = self._state[name] is False
+        if not ok and was_down:
+            # Still down: grow the delay before the next attempt
+            with self._lock:
+                self._failures[name] += 1
+                self._next_check[name] = time.monotonic() + self._backoff(self._failures[name])
+        else:
+            self.report(name, ok)
+        return ok
+
+    def check_now(self, name=None):
+        """Ask the monitor thread to check ``name`` (or all) immediately."""
+        with self._lock:
+            for key in ([name] if name else list(self._next_check)):
+                if key in self._next_check:
+                    self._next_check[key] = 0.0
+        self._wakeup.set()
+
+    # ------------------------------------------------------------------
+    # Thread
+    # ------------------------------------------------------------------
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="health-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        last_periodic = time.monotonic()
+        while not self._stop.is_set():
+            now = time.monotonic()
+            with self._lock:
+                due = [name for name, at in self._next_check.items() if at <= now]
+            for name in due:
+                if self._stop.is_set():
+                    return
+                self.check(name)
+            if time.monotonic() - last_periodic >= self.interval:
+                last_periodic = time.monotonic()
+                for callback in list(self._periodic):
+                    try:
+                        callback()
+                    except Exception as exc:  # pragma: no cover - just log
+                        self.logger.error("Health periodic task error: %s", exc)
+            with self._lock:
+                delay = min(self._next_check.values(), default=now + self.interval)
+            delay = min(max(0.05, delay - time.monotonic()), self.interval)
+            self._wakeup.wait(delay)
+            self._wakeup.clear()
@@ -0,0 +1,599 @@
+"""Copia de datos críticos desde la base remota hacia el SQLite local.
+
+Las filas se leen de la base remota en lotes de ``SYNC_CHUNK_SIZE`` y se
+aplican con un ``INSERT ... ON CONFLICT DO UPDATE`` por lote, en una sola
+transacción por tabla.
+
+Cada tabla guarda en ``sync_watermark`` el mayor valor ya copiado de su
+columna de marca de agua (``updated_at`` si la tabla la tiene, si no la clave
+primaria autoincremental). Las sincronizaciones posteriores solo piden a la
+base remota las filas por encima de esa marca. Como una clave primaria no
+detecta modificaciones de filas existentes, cada tabla se vuelve a copiar
+completa cuando su última copia completa supera ``SYNC_FULL_INTERVAL``
+segundos; las tablas sin marca posible se copian siempre completas.
+"""
+
+import datetime
+import itertools
+import logging
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from decimal import Decimal
+
+from .config import Config
+
+# (nombre_tabla, columnas, clave primaria, si es autoincrement); una clave
+# compuesta se indica como tupla de columnas
+SYNC_TABLES = [
+    ("Rol", ["id_rol", "nombre"], "id_rol", True),
+    ("Tipo_documento", ["id_tipo_documento", "descripcion"], "id_tipo_documento", True),
+    ("Codigo_postal", ["id_codigo_postal", "pais", "departamento", "ciudad"], "id_codigo_postal", False),
+    ("Estado_vehiculo", ["id_estado", "descripcion"], "id_estado", True),
+    ("Marca_vehiculo", ["id_marca", "nombre_marca"], "id_marca", True),
+    ("Color_vehiculo", ["id_color", "nombre_color"], "id_color", True),
+    ("Tipo_vehiculo", ["id_tipo", "descripcion", "capacidad", "combustible", "tarifa_dia"], "id_tipo", True),
+    ("Blindaje_vehiculo", ["id_blindaje", "descripcion"], "id_blindaje", True),
+    ("Transmision_vehiculo", ["id_transmision", "descripcion"], "id_transmision", True),
+    ("Cilindraje_vehiculo", ["id_cilindraje", "descripcion"], "id_cilindraje", True),
+    ("Sucursal", ["id_sucursal", "nombre", "direccion", "telefono", "gerente", "id_codigo_postal"], "id_sucursal", True),
+    ("Seguro_vehiculo", ["id_seguro", "estado", "descripcion", "vencimiento", "costo"], "id_seguro", True),
+    ("Tipo_empleado", ["id_tipo_empleado", "descripcion"], "id_tipo_empleado", True),
+    ("Empleado", ["id_empleado", "documento", "nombre", "telefono", "correo", "cargo"], "id_empleado", True),
+    ("Cliente", ["id_cliente", "documento", "nombre", "telefono", "correo"], "id_cliente", True),
+    ("Usuario", ["id_usuario", "usuario", "contrasena", "id_rol", "id_cliente", "id_empleado"], "id_usuario", True),
+    ("Vehiculo", ["placa", "n_chasis", "modelo", "kilometraje", "id_marca", "id_color", "id_tipo_vehiculo", "id_blindaje", "id_transmision", "id_cilindraje", "id_seguro_vehiculo", "id_estado_vehiculo", "id_proveedor", "id_sucursal"], "placa", False),
+    ("Medio_pago", ["id_medio_pago", "descripcion"], "id_medio_pago", True),
+    ("Estado_alquiler", ["id_estado", "descripcion"], "id_estado", True),
+    ("Licencia_conduccion", ["id_licencia", "estado", "fecha_emision", "fecha_vencimiento", "id_categoria"], "id_licencia", True),
+    ("Categoria_licencia", ["id_categoria", "descripcion"], "id_categoria", True),
+    ("Taller_mantenimiento", ["id_taller", "nombre", "direccion", "telefono"], "id_taller", True),
+    ("Tipo_mantenimiento", ["id_tipo", "descripcion"], "id_tipo", True),
+    ("Proveedor_vehiculo", ["id_proveedor", "nombre", "direccion", "telefono", "correo"], "id_proveedor", True),
+    ("Alquiler", ["id_alquiler", "fecha_hora_salida", "valor", "fecha_hora_entrada", "id_vehiculo", "id_cliente", "id_sucursal", "id_medio_pago", "id_estado", "id_seguro", "id_descuento"], "id_alquiler", True),
+    ("Reserva_alquiler", ["id_reserva", "fecha_hora", "abono", "saldo_pendiente", "id_estado_reserva", "id_alquiler"], "id_reserva", True),
+    ("Abono_reserva", ["id_abono", "valor", "fecha_hora", "id_reserva", "id_medio_pago"], "id_abono", True),
+    ("ventas_diarias", ["fecha", "id_sucursal", "id_empleado", "total", "n"], ("fecha", "id_sucursal", "id_empleado"), False),
+]
+
+# Tablas de movimientos: solo se conservan localmente los últimos 7 días
+WINDOWED_TABLES = {
+    "Alquiler": "fecha_hora_salida",
+    "Reserva_alquiler": "fecha_hora",
+    "Abono_reserva": "fecha_hora",
+}
+
+# Tablas cuyos triggers locales mantienen ventas_diarias. Al copiarlas se
+# suspenden: el agregado ya llega completo desde la base remota.
+ROLLUP_SOURCES = {"Alquiler"}
+
+
+# Tablas referenciadas por clave foránea que deben copiarse antes
+SYNC_DEPENDENCIES = {
+    "Sucursal": ("Codigo_postal",),
+    "Empleado": ("Sucursal", "Tipo_documento", "Tipo_empleado"),
+    "Licencia_conduccion": ("Categoria_licencia",),
+    "Cliente": ("Codigo_postal", "Licencia_conduccion", "Tipo_documento"),
+    "Usuario": ("Cliente", "Empleado", "Rol"),
+    "Vehiculo": (
+        "Blindaje_vehiculo", "Cilindraje_vehiculo", "Color_vehiculo",
+        "Estado_vehiculo", "Marca_vehiculo", "Proveedor_vehiculo",
+        "Seguro_vehiculo", "Sucursal", "Tipo_vehiculo", "Transmision_vehiculo",
+    ),
+    "Alquiler": ("Cliente", "Empleado", "Estado_alquiler", "Medio_pago", "Sucursal", "Vehiculo"),
+    "Reserva_alquiler": ("Alquiler", "Empleado"),
+    "Abono_reserva": ("Medio_pago", "Reserva_alquiler"),
+}
+
+
+def ordered_tables(tables=None):
+    """Return ``tables`` sorted so every table follows its dependencies.
+
+    Among tables whose dependencies are met the declared order is kept.
+    """
+    specs = list(tables or SYNC_TABLES)
+    names = {spec[0] for spec in specs}
+    placed = set()
+    result = []
+    while specs:
+        for index, spec in enumerate(specs):
+            if set(SYNC_DEPENDENCIES.get(spec[0], ())) & names <= placed:
+                break
+        else:
+            index = 0  # ciclo: conservar el orden declarado
+        spec = specs.pop(index)
+        placed.add(spec[0])
+        result.append(spec)
+    return result
+
+
+_FROM_RE = re.compile(r"\b(?:FROM|JOIN)\s+`?(\w+)`?", re.IGNORECASE)
+
+
+def referenced_tables(query):
+    """Return every name that follows FROM/JOIN in ``query``, synced or not."""
+    return _FROM_RE.findall(query or "")
+
+
+def tables_in_query(query):
+    """Return the synced tables read by ``query`` (FROM/JOIN clauses)."""
+    names = {spec[0].lower(): spec[0] for spec in SYNC_TABLES}
+    return [names[t.lower()] for t in referenced_tables(query) if t.lower() in names]
+
+
+def key_columns(pk):
+    """Return the primary key of a :data:`SYNC_TABLES` entry as a tuple."""
+    return (pk,) if isinstance(pk, str) else tuple(pk)
+
+
+def watermark_column(columns, pk, autoinc):
+    """Return the column used as high-water mark, or None for full copies."""
+    if "updated_at" in columns:
+        return "updated_at"
+    if autoinc:
+        return pk
+    return None
+
+
+def _local_value(value):
+    """Convert values sqlite3 cannot bind (MySQL DECIMAL arrives as Decimal)."""
+    return float(value) if isinstance(value, Decimal) else value
+
+
+class LocalSync:
+    """Incremental remote -> SQLite copy driven by ``sync_watermark``."""
+
+    def __init__(self, sqlite_manager, full_interval=None, chunk_size=None):
+        self.logger = logging.getLogger(__name__)
+        self._sqlite = sqlite_manager
+        self.full_interval = (
+            Config.SYNC_FULL_INTERVAL if full_interval is None else full_interval
+        )
+        self.chunk_size = max(1, Config.SYNC_CHUNK_SIZE if chunk_size is None else chunk_size)
+        self._listeners = []
+        self._thread = None
+        self._running = threading.Event()
+        # Set once a table has been copied by the current run
+        self._table_events = {spec[0]: threading.Event() for spec in SYNC_TABLES}
+        self._progress = (0, 0)
+
+    # ------------------------------------------------------------------
+    # Watermarks
+    # ------------------------------------------------------------------
+    def _load_watermarks(self, conn_local):
+        cur = conn_local.execute(
+            "SELECT table_name, column_name, value, last_full_sync FROM sync_watermark"
+        )
+        return {row[0]: row[1:] for row in cur.fetchall()}
+
+    def _save_watermark(self, conn_local, table, column, value, full):
+        conn_local.execute(
+            "INSERT INTO sync_watermark (table_name, column_name, value, last_full_sync, synced_at) "
+            "VALUES (?, ?, ?, CASE WHEN ? THEN datetime('now') END, datetime('now')) "
+            "ON CONFLICT(table_name) DO UPDATE SET "
+            "column_name = excluded.column_name, value = excluded.value, "
+            "last_full_sync = COALESCE(excluded.last_full_sync, sync_watermark.last_full_sync), "
+            "synced_at = excluded.synced_at",
+            (table, column, value, 1 if full else 0),
+        )
+
+    def _full_sync_due(self, last_full_sync):
+        if not last_full_sync:
+            return True
+        try:
+            last = datetime.datetime.fromisoformat(last_full_sync)
+        except ValueError:
+            return True
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        return (now - last).total_seconds() >= self.full_interval
+
+    def reset(self, table=None):
+        """Forget the watermark of ``table`` (or all) to force a full copy."""
+        conn = self._sqlite.connect()
+        try:
+            if table is None:
+                conn.execute("DELETE FROM sync_watermark")
+            else:
+                conn.execute("DELETE FROM sync_watermark WHERE table_name = ?", (table,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # Progress and background runs
+    # ------------------------------------------------------------------
+    def add_listener(self, callback):
+        """Register ``callback(table, done, total, stats)``.
+
+        It is called from the sync thread after every table, and once more
+        with ``table=None`` and the stats of every table when the run ends.
+        """
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, table, stats):
+        for callback in list(self._listeners):
+            try:
+                callback(table, self._progress[0], self._progress[1], stats)
+            except Exception as exc:  # pragma: no cover - listener bugs are logged
+                self.logger.error("[SYNC][ERROR] Error en listener de progreso: %s", exc)
+
+    @property
+    def running(self):
+        """True while a sync started by :meth:`sync` is in progress."""
+        return self._running.is_set()
+
+    @property
+    def progress(self):
+        """``(done, total)`` tables of the current or last run."""
+        return self._progress
+
+    def start_background(self, connect_remote, full=False, on_error=None):
+        """Run :meth:`sync` on a daemon thread and return the thread.
+
+        Queries can call :meth:`wait_for_tables` meanwhile. ``on_error`` is
+        called with the exception if the whole run fails (e.g. the remote
+        cannot be reached).
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return self._thread
+        # Mark the run as started before the thread so early queries wait
+        self._begin_run(len(ordered_tables()))
+
+        def run():
+            try:
+                self.sync(connect_remote, full=full)
+            except Exception as exc:
+                self.logger.error("[SYNC][ERROR] Sincronización en segundo plano fallida: %s", exc)
+                if on_error is not None:
+                    on_error(exc)
+            finally:
+                self._end_run()
+
+        self._thread = threading.Thread(target=run, name="startup-sync", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def wait(self, timeout=None):
+        """Wait for the background run; return True if it has finished."""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+
+    def wait_for_tables(self, tables, timeout=None):
+        """Block until ``tables`` are copied by the running sync.
+
+        Returns True right away when no sync is running. Returns False if
+        ``timeout`` seconds pass first; callers then read the existing local
+        copy instead.
+        """
+        if not self.running:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for name in tables:
+            event = self._table_events.get(name)
+            if event is None:
+                continue
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not event.wait(remaining):
+                return False
+        return True
+
+    def _begin_run(self, total):
+        for event in self._table_events.values():
+            event.clear()
+        self._progress = (0, total)
+        self._running.set()
+
+    def _end_run(self):
+        # Release every waiter, including tables that failed or were skipped
+        for event in self._table_events.values():
+            event.set()
+        self._running.clear()
+
+    def _table_finished(self, name, stats):
+        self._progress = (self._progress[0] + 1, self._progress[1])
+        event = self._table_events.get(name)
+        if event is not None:
+            event.set()
+        self._notify(name, stats)
+
+    # ------------------------------------------------------------------
+    # Scheduling
+    # ------------------------------------------------------------------
+    def sync(self, connect_remote, full=False, tables=None, workers=None):
+        """Copy ``tables`` (default :data:`SYNC_TABLES`) from the remote base.
+
+        ``connect_remote`` opens a new remote connection; each worker thread
+        calls it once. With more than one worker (``SYNC_WORKERS``) tables run
+        concurrently, but a table only starts after every table it references
+        (:data:`SYNC_DEPENDENCIES`) has finished.
+
+        Returns ``{table: {"mode", "rows", "seconds", "rows_per_sec"}}``;
+        tables that failed get an ``"error"`` entry instead and do not stop
+        the rest. Raises if the remote connection cannot be opened at all.
+        """
+        started = time.monotonic()
+        specs = ordered_tables(tables)
+        workers = max(1, Config.SYNC_WORKERS if workers is None else workers)
+        conn_local = self._sqlite.connect()
+        try:
+            watermarks = self._load_watermarks(conn_local)
+        finally:
+            conn_local.close()
+
+        nested = self.running
+        if not nested:
+            self._begin_run(len(specs))
+        else:
+            self._progress = (0, len(specs))
+        try:
+            if workers == 1:
+                stats = self._sync_sequential(connect_remote, specs, watermarks, full)
+            else:
+                stats = self._sync_parallel(connect_remote, specs, watermarks, full, workers)
+        finally:
+            if not nested:
+                self._end_run()
+
+        elapsed = time.monotonic() - started
+        slowest = sorted(
+            (item for item in stats.items() if "seconds" in item[1]),
+            key=lambda item: item[1]["seconds"],
+            reverse=True,
+        )[:3]
+        self.logger.info(
+            "[SYNC][INFO] %d tablas sincronizadas en %.2fs con %d hilo(s); más lentas: %s",
+            len(stats), elapsed, workers,
+            ", ".join(f"{name} {data['seconds']:.2f}s" for name, data in slowest) or "-",
+        )
+        if any(data.get("rows") for data in stats.values()):
+            # Bulk upserts/deletes change row counts: refresh planner statistics
+            self._sqlite.optimize(full=full)
+        self._notify(None, stats)
+        return stats
+
+    def _sync_sequential(self, connect_remote, specs, watermarks, full):
+        stats = {}
+        conn_remote = connect_remote()
+        try:
+            for spec in specs:
+                stats[spec[0]] = self._run_table(conn_remote, spec, watermarks.get(spec[0]), full)
+                self._table_finished(spec[0], stats[spec[0]])
+        finally:
+            conn_remote.close()
+        return stats
+
+    def _sync_parallel(self, connect_remote, specs, watermarks, full, workers):
+        local = threading.local()
+        # Open the first connection here so an unreachable remote fails fast
+        opened = [connect_remote()]
+        spare = list(opened)
+        opened_lock = threading.Lock()
+        write_lock = threading.Lock()
+
+        def run(spec):
+            conn_remote = getattr(local, "conn", None)
+            if conn_remote is None:
+                with opened_lock:
+                    conn_remote = spare.pop() if spare else None
+                if conn_remote is None:
+                    conn_remote = connect_remote()
+                    with opened_lock:
+                        opened.append(conn_remote)
+                local.conn = conn_remote
+            return self._run_table(
+                conn_remote, spec, watermarks.get(spec[0]), full, write_lock
+            )
+
+        pending = {spec[0]: spec for spec in specs}
+        deps = {
+            name: set(SYNC_DEPENDENCIES.get(name, ())) & set(pending) for name in pending
+        }
+        done = set()
+        running = {}
+        stats = {}
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sync") as pool:
+                while pending or running:
+                    ready = [name for name in pending if deps[name] <= done]
+                    if not ready and not running:
+                        # Dependency cycle: keep the declared order
+                        ready = [next(iter(pending))]
+                    for name in ready:
+                        running[pool.submit(run, pending.pop(name))] = name
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        name = running.pop(future)
+                        try:
+                            stats[name] = future.result()
+                        except Exception as exc:
+                            self.logger.error("[SYNC][ERROR] Error sincronizando tabla %s: %s", name, exc)
+                            stats[name] = {"error": str(exc)}
+                        done.add(name)
+                        self._table_finished(name, stats[name])
+        finally:
+            for conn_remote in opened:
+                try:
+                    conn_remote.close()
+                except Exception:
+                    pass
+        return stats
+
+    def _run_table(self, conn_remote, spec, state, full, write_lock=None):
+        """Sync one table on its own local connection, reporting errors."""
+        conn_local = self._sqlite.connect()
+        try:
+            return self.sync_table(conn_remote, conn_local, spec, state, full, write_lock)
+        except Exception as exc:
+            conn_local.rollback()
+            self.logger.error("[SYNC][ERROR] Error sincronizando tabla %s: %s", spec[0], exc)
+            return {"error": str(exc)}
+        finally:
+            conn_local.close()
+
+    # ------------------------------------------------------------------
+    # Sync
+    # ------------------------------------------------------------------
+    def sync_table(self, conn_remote, conn_local, spec, state=None, full=False,
+                   write_lock=None):
+        """Copy one table; ``state`` is its ``sync_watermark`` row (or None).
+
+        Rows are streamed from the remote cursor into SQLite in chunks of
+        ``chunk_size``. With ``write_lock`` (parallel sync) only the first
+        chunk is read ahead while another table holds the lock; the rest is
+        streamed and written while holding it, so concurrent workers never
+        wait on each other's open SQLite transaction and a table never has
+        to fit in memory.
+        """
+        started = time.monotonic()
+        nombre, columnas, _, _ = spec
+        wm_col = watermark_column(*spec[1:])
+        previous = None
+        if wm_col and state and state[0] == wm_col and state[1] is not None:
+            previous = state[1]
+        incremental = (
+            not full and previous is not None and not self._full_sync_due(state[2])
+        )
+
+        conditions = []
+        params = []
+        window_col = WINDOWED_TABLES.get(nombre)
+        if window_col:
+            conditions.append(f"{window_col} >= DATE_SUB(NOW(), INTERVAL 7 DAY)")
+        if incremental:
+            # updated_at can repeat within a second, so re-read the boundary
+            conditions.append(f"{wm_col} {'>=' if wm_col == 'updated_at' else '>'} %s")
+            params.append(previous)
+        query = f"SELECT {', '.join(columnas)} FROM {nombre}"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+
+        cursor_remota = conn_remote.cursor()
+        try:
+            cursor_remota.execute(query, tuple(params))
+            chunks = self._chunks(cursor_remota)
+            if write_lock is None:
+                rows, value = self._apply_chunks(conn_local, spec, chunks, previous, incremental)
+            else:
+                staged = next(chunks, None)
+                with write_lock:
+                    if staged is not None:
+                        chunks = itertools.chain((staged,), chunks)
+                    rows, value = self._apply_chunks(conn_local, spec, chunks, previous, incremental)
+        finally:
+            cursor_remota.close()
+
+        elapsed = time.monotonic() - started
+        mode = "incremental" if incremental else "full"
+        rate = rows / elapsed if elapsed > 0 else 0.0
+        self.logger.info(
+            "[SYNC][INFO] Sincronizada tabla %s (%s, %d registros, %.2fs, %.0f filas/s)",
+            nombre, mode, rows, elapsed, rate,
+        )
+        return {
+            "mode": mode,
+            "rows": rows,
+            "seconds": round(elapsed, 3),
+            "rows_per_sec": round(rate, 1),
+        }
+
+    def _chunks(self, cursor):
+        while True:
+            chunk = cursor.fetchmany(self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def _apply_chunks(self, conn_local, spec, chunks, previous, incremental):
+        """Write ``chunks`` and the new watermark in one local transaction.
+
+        Returns ``(rows, watermark)``.
+        """
+        nombre, columnas, pk, _ = spec
+        wm_col = watermark_column(*spec[1:])
+        wm_idx = columnas.index(wm_col) if wm_col else None
+        window_col = WINDOWED_TABLES.get(nombre)
+        rows = 0
+        value = previous
+        cursor_local = conn_local.cursor()
+        try:
+            if nombre in ROLLUP_SOURCES:
+                cursor_local.execute("INSERT OR IGNORE INTO rollup_suspend (id) VALUES (1)")
+            for chunk in chunks:
+                self._upsert_rows(cursor_local, nombre, columnas, pk, chunk)
+                rows += len(chunk)
+                if wm_idx is not None:
+                    for row in chunk:
+                        if row[wm_idx] is not None and (value is None or row[wm_idx] > value):
+                            value = row[wm_idx]
+            if window_col:
+                cursor_local.execute(
+                    f"DELETE FROM {nombre} WHERE {window_col} < date('now','-7 day')"
+                )
+            if nombre in ROLLUP_SOURCES:
+                cursor_local.execute("DELETE FROM rollup_suspend")
+            if wm_col:
+                if value is not None and not isinstance(value, (int, float)):
+                    value = str(value)
+                self._save_watermark(conn_local, nombre, wm_col, value, not incremental)
+            conn_local.commit()
+        finally:
+            cursor_local.close()
+        return rows, value
+
+    def _upsert_rows(self, cursor_local, nombre, columnas, pk, rows):
+        """Apply ``rows`` with a single ``executemany`` upsert.
+
+        Falls back to :meth:`_apply_rows` when the batch hits a constraint
+        other than the primary key (e.g. a reused ``UNIQUE`` value) or the
+        local table has no usable key for ``ON CONFLICT``.
+        """
+        # Montos DECIMAL (valor, tarifa_dia, costo...) son REAL en SQLite
+        rows = [tuple(_local_value(value) for value in row) for row in rows]
+        cols_str = ', '.join(columnas)
+        placeholders = ', '.join(['?'] * len(columnas))
+        keys = key_columns(pk)
+        updates = ', '.join(f'{col}=excluded.{col}' for col in columnas if col not in keys)
+        action = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+        try:
+            cursor_local.executemany(
+                f"INSERT INTO {nombre} ({cols_str}) VALUES ({placeholders}) "
+                f"ON CONFLICT({', '.join(keys)}) {action}",
+                rows,
+            )
+        except (sqlite3.IntegrityError, sqlite3.OperationalError) as exc:
+            if isinstance(exc, sqlite3.OperationalError) and "ON CONFLICT" not in str(exc):
+                raise
+            self.logger.warning(
+                "[SYNC][WARN] Upsert por lotes falló en %s (%s); aplicando fila por fila",
+                nombre, exc,
+            )
+            self._apply_rows(cursor_local, nombre, columnas, pk, rows)
+
+    def _apply_rows(self, cursor_local, nombre, columnas, pk, rows):
+        """Update existing rows and insert the missing ones, one at a time."""
+        cols_str = ', '.join(columnas)
+        placeholders = ', '.join(['?'] * len(columnas))
+        update_str = ', '.join([f'{col}=?' for col in columnas])
+        keys = key_columns(pk)
+        key_idx = [columnas.index(col) for col in keys]
+        where_str = ' AND '.join(f'{col}=?' for col in keys)
+        for row in rows:
+            cursor_local.execute(
+                f"UPDATE {nombre} SET {update_str} WHERE {where_str}",
+                tuple(row) + tuple(row[i] for i in key_idx),
+            )
+            if cursor_local.rowcount == 0:
+                cursor_local.execute(
+                    f"INSERT OR IGNORE INTO {nombre} ({cols_str}) VALUES ({placeholders})",
+                    row,
+                )
@@ -0,0 +1,277 @@
+"""Versioned migrations and EXPLAIN checks for the remote MySQL schema.
+
+``data/sql_bases.sql`` creates a fresh database. Changes to databases that
+already exist go in ``data/mysql_migrations/NNN_*.sql`` and are listed in
+:data:`MIGRATIONS`; each one runs once per server and is recorded in the
+``schema_version`` table, like the SQLite migrations of
+:mod:`src.sqlite_manager`.
+
+:data:`INDEX_CHECKS` pairs the hot view queries with the index their plan
+must use. :func:`check_indexes` runs ``EXPLAIN`` on each of them and reports
+the ones that fall back to another key or a table scan.
+
+    python -m src.mysql_migrations           # apply pending migrations and check plans
+    python -m src.mysql_migrations --check   # only check plans (exit code 1 on regressions)
+"""
+
+import os
+import sys
+import hashlib
+import logging
+import argparse
+from pathlib import Path
+
+_DATA_DIR = Path(__file__).resolve().parents[1] / 'data'
+
+# Versioned scripts applied to both remotes, in order: (name, path)
+MIGRATIONS = [
+    ("001_secondary_indexes", _DATA_DIR / 'mysql_migrations' / '001_secondary_indexes.sql'),
+    ("002_alquiler_salida", _DATA_DIR / 'mysql_migrations' / '002_alquiler_salida.sql'),
+    ("003_ventas_diarias", _DATA_DIR / 'mysql_migrations' / '003_ventas_diarias.sql'),
+]
+
+# MySQL error raised by CREATE INDEX when the index already exists
+# (e.g. a database created from the current sql_bases.sql)
+_ER_DUP_KEYNAME = 1061
+
+# (label, query, params, table alias, expected index)
+INDEX_CHECKS = [
+    (
+        "ClienteView._cargar_reservas_cliente",
+        "SELECT ra.id_reserva, a.fecha_hora_salida, v.placa, a.valor "
+        "FROM Reserva_alquiler ra "
+        "JOIN Alquiler a ON ra.id_alquiler = a.id_alquiler "
+        "JOIN Vehiculo v ON a.id_vehiculo = v.placa "
+        "WHERE a.id_cliente = %s "
+        "ORDER BY a.fecha_hora_salida DESC",
+        (1,),
+        "a",
+        "idx_alquiler_cliente_salida",
+    ),
+    (
+        "reportes por sucursal y rango de fechas",
+        "SELECT SUM(valor) FROM Alquiler "
+        "WHERE id_sucursal = %s "
+        "AND fecha_hora_salida >= %s AND fecha_hora_salida < %s",
+        (1, "2025-01-01", "2025-02-01"),
+        "Alquiler",
+        "idx_alquiler_sucursal_salida",
+    ),
+    (
+        "LocalSync: ventana de 7 días de Alquiler",
+        "SELECT id_alquiler, fecha_hora_salida, valor FROM Alquiler "
+        "WHERE fecha_hora_salida >= DATE_SUB(NOW(), INTERVAL 7 DAY)",
+        (),
+        "Alquiler",
+        "idx_alquiler_salida",
+    ),
+    (
+        "reports.ventas_por_sucursal",
+        "SELECT NULLIF(id_sucursal, 0), SUM(total) as total "
+        "FROM ventas_diarias "
+        "WHERE fecha >= %s AND fecha < %s "
+        "GROUP BY id_sucursal HAVING SUM(n) > 0",
+        ("2025-01-01", "2025-02-01"),
+        "ventas_diarias",
+        "PRIMARY",
+    ),
+    (
+        "EmpleadoVentasView._cargar_reservas_pendientes",
+        "SELECT ra.id_reserva, c.nombre, v.placa, a.fecha_hora_salida, a.valor "
+        "FROM Reserva_alquiler ra "
+        "JOIN Alquiler a ON ra.id_alquiler = a.id_alquiler "
+        "JOIN Cliente c ON a.id_cliente = c.id_cliente "
+        "JOIN Vehiculo v ON a.id_vehiculo = v.placa "
+        "WHERE ra.id_estado_reserva = 1 AND a.id_sucursal = %s",
+        (1,),
+        "ra",
+        "idx_reserva_estado_alquiler",
+    ),
+    (
+        "abonos de una reserva",
+        "SELECT valor, fecha_hora FROM Abono_reserva "
+        "WHERE id_reserva = %s ORDER BY fecha_hora",
+        (1,),
+        "Abono_reserva",
+        "idx_abono_reserva_fecha",
+    ),
+    (
+        "ClienteView._cargar_vehiculos_disponibles",
+        "SELECT v.placa, v.modelo FROM Vehiculo v "
+        "WHERE v.id_estado_vehiculo = 1 AND v.id_sucursal = %s",
+        (1,),
+        "v",
+        "idx_vehiculo_sucursal_estado",
+    ),
+    (
+        "AuthManager.login",
+        "SELECT u.id_usuario FROM Usuario u WHERE u.usuario = %s",
+        ("admin@example.com",),
+        "u",
+        "usuario",
+    ),
+]
+
+logger = logging.getLogger(__name__)
+
+
+def split_statements(script):
+    """Split a migration script into statements.
+
+    Honors ``DELIMITER`` lines like the ``mysql`` client, so trigger bodies
+    written as in ``data/sql_bases.sql`` (``DELIMITER $$ ... END$$``) are
+    sent as one statement.
+    """
+    statements = []
+    delimiter = ";"
+    current = []
+    for line in script.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("--"):
+            continue
+        if stripped.upper().startswith("DELIMITER "):
+            delimiter = stripped.split(None, 1)[1]
+            continue
+        current.append(line)
+        if stripped.endswith(delimiter):
+            statements.append("\n".join(current).strip()[: -len(delimiter)].strip())
+            current = []
+    if "\n".join(current).strip():
+        statements.append("\n".join(current).strip())
+    return [stmt for stmt in statements if stmt]
+
+
+def apply_migrations(conn, migrations=None):
+    """Run the migrations not yet recorded in ``schema_version``.
+
+    Returns the names applied. A versioned script that changed after being
+    applied is not run again (a new script must be added instead).
+    """
+    migrations = MIGRATIONS if migrations is None else migrations
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "CREATE TABLE IF NOT EXISTS schema_version ("
+            "name VARCHAR(100) PRIMARY KEY, "
+            "checksum CHAR(64) NOT NULL, "
+            "applied_at DATETIME DEFAULT CURRENT_TIMESTAMP)"
+        )
+        cursor.execute("SELECT name, checksum FROM schema_version")
+        applied = dict(cursor.fetchall())
+        done = []
+        for name, path in migrations:
+            if not path.exists():
+                continue
+            script = path.read_bytes()
+            checksum = hashlib.sha256(script).hexdigest()
+            previous = applied.get(name)
+            if previous is not None:
+                if previous != checksum:
+                    logger.warning("Migration %s changed after being applied; not running it again", name)
+                continue
+            logger.info("Applying MySQL migration %s (%s)", name, path.name)
+            for statement in split_statements(script.decode("utf-8")):
+                try:
+                    cursor.execute(statement)
+                except Exception as exc:
+                    if getattr(exc, "errno", None) != _ER_DUP_KEYNAME:
+                        raise
+                    logger.info("Index already present, skipping: %s", statement)
+            cursor.execute(
+                "INSERT INTO schema_version (name, checksum) VALUES (%s, %s)",
+                (name, checksum),
+            )
+            conn.commit()
+            done.append(name)
+        return done
+    finally:
+        cursor.close()
+
+
+def explain(conn, query, params=None):
+    """Return the ``EXPLAIN`` rows of ``query`` as dictionaries."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("EXPLAIN " + query, params or ())
+        columns = [c.lower() for c in cursor.column_names]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def check_indexes(conn, checks=None):
+    """Return the checks whose plan does not use the expected index.
+
+    Each failure is ``(label, table, expected, used)``; ``used`` is the key
+    chosen by the optimizer (``None`` for a full scan). The optimizer may
+    prefer a scan on nearly empty tables, so run the checks against a
+    database with representative data.
+    """
+    failures = []
+    for label, query, params, table, expected in INDEX_CHECKS if checks is None else checks:
+        plan = explain(conn, query, params)
+        row = next((r for r in plan if r.get("table") == table), None)
+        used = row.get("key") if row else None
+        if used != expected:
+            failures.append((label, table, expected, used))
+    return failures
+
+
+def remote_configs():
+    """Connection settings of both remotes, from the same ``.env`` variables
+    used by :class:`~src.triple_db_manager.TripleDBManager`."""
+    configs = {}
+    for name, suffix in (("remote1", ""), ("remote2", "2")):
+        host = os.getenv(f"DB_REMOTE_HOST{suffix}")
+        if not host:
+            continue
+        configs[name] = {
+            "host": host,
+            "user": os.getenv(f"DB_REMOTE_USER{suffix}"),
+            "password": os.getenv(f"DB_REMOTE_PASSWORD{suffix}"),
+            "database": os.getenv(f"DB_REMOTE_NAME{suffix}"),
+            "port": os.getenv(f"DB_REMOTE_PORT{suffix}"),
+            "connection_timeout": 3,
+        }
+    return configs
+
+
+def main(argv=None):
+    from dotenv import load_dotenv
+    import mysql.connector
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--check", action="store_true", help="solo verificar los planes con EXPLAIN")
+    parser.add_argument("--remote", choices=["remote1", "remote2"], help="limitar a un remoto")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    status = 0
+    for name, config in remote_configs().items():
+        if args.remote and name != args.remote:
+            continue
+        try:
+            conn = mysql.connector.connect(**config)
+        except Exception as exc:
+            print(f"{name}: sin conexión ({exc})")
+            status = 1
+            continue
+        try:
+            if not args.check:
+                applied = apply_migrations(conn)
+                print(f"{name}: migraciones aplicadas: {', '.join(applied) or 'ninguna'}")
+            failures = check_indexes(conn)
+            for label, table, expected, used in failures:
+                print(f"{name}: {label}: {table} usa {used or 'escaneo completo'}, se esperaba {expected}")
+            if failures:
+                status = 1
+            else:
+                print(f"{name}: {len(INDEX_CHECKS)} planes usan el índice esperado")
+        finally:
+            conn.close()
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
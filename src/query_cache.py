@@ -0,0 +1,160 @@
+import sys
+import time
+import threading
+from collections import OrderedDict
+
+
+def normalize_sql(query):
+    """Collapse whitespace so equivalent query strings share a cache key."""
+    return " ".join((query or "").split())
+
+
+def _estimate_size(rows):
+    """Rough size in bytes of a result set (rows of scalars)."""
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row)
+        if isinstance(row, dict):
+            row = row.values()
+        for value in row:
+            size += sys.getsizeof(value)
+    return size
+
+
+class QueryCache:
+    """LRU cache of SELECT results with per-table TTL and memory bounds.
+
+    Entries are keyed by normalized SQL plus parameters and indexed by the
+    tables they read, so :meth:`invalidate` drops every result that depends
+    on a table that was just written. A table's TTL comes from
+    ``table_ttls`` (falling back to ``default_ttl``); a query reading several
+    tables uses the shortest one, and a TTL of 0 means "never cache".
+
+    Each table also has a generation number bumped on invalidation. Callers
+    read it with :meth:`generation` before running the query and pass it to
+    :meth:`put`, so a result computed while a write was committing is not
+    stored.
+    """
+
+    def __init__(self, max_entries=512, max_bytes=8 * 1024 * 1024, default_ttl=0.0,
+                 table_ttls=None):
+        self.max_entries = max(0, int(max_entries))
+        self.max_bytes = max(0, int(max_bytes))
+        self.default_ttl = max(0.0, float(default_ttl))
+        self.table_ttls = {name.lower(): float(ttl) for name, ttl in (table_ttls or {}).items()}
+        self._entries = OrderedDict()  # key -> (expires_at, tables, rows, size)
+        self._by_table = {}
+        self._generations = {}
+        self._epoch = 0  # bumped by invalidate() with no table
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "expired": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def ttl_for(self, tables):
+        """TTL for a query reading ``tables`` (0 = not cacheable)."""
+        if not tables:
+            return 0.0
+        return min(self.table_ttls.get(name.lower(), self.default_ttl) for name in tables)
+
+    @staticmethod
+    def make_key(query, params):
+        return normalize_sql(query), tuple(params) if params is not None else ()
+
+    def generation(self, tables):
+        with self._lock:
+            return (self._epoch,) + tuple(
+                self._generations.get(name.lower(), 0) for name in tables
+            )
+
+    def get(self, key):
+        """Return cached rows for ``key`` or None (counted as hit/miss)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return list(entry[2])
+
+    def put(self, key, tables, rows, generation=None):
+        """Store ``rows`` unless uncacheable, too large or already outdated."""
+        if not self.enabled or rows is None:
+            return False
+        ttl = self.ttl_for(tables)
+        if ttl <= 0:
+            return False
+        rows = list(rows)
+        size = _estimate_size(rows)
+        if size > self.max_bytes:
+            return False
+        names = tuple(name.lower() for name in tables)
+        with self._lock:
+            current = (self._epoch,) + tuple(self._generations.get(name, 0) for name in names)
+            if generation is not None and generation != current:
+                # A write to one of the tables happened while querying
+                return False
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, names, rows, size)
+            self._bytes += size
+            for name in names:
+                self._by_table.setdefault(name, set()).add(key)
+            self._stats["stores"] += 1
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+        return True
+
+    def _remove(self, key):
+        _expires, names, _rows, size = self._entries.pop(key)
+        self._bytes -= size
+        for name in names:
+            keys = self._by_table.get(name)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[name]
+
+    def invalidate(self, table=None):
+        """Drop results reading ``table`` (or everything) and bump generations."""
+        with self._lock:
+            if table is None:
+                self._epoch += 1
+                self._stats["invalidations"] += len(self._entries)
+                self._entries.clear()
+                self._by_table.clear()
+                self._bytes = 0
+                return
+            name = table.lower()
+            self._generations[name] = self._generations.get(name, 0) + 1
+            for key in list(self._by_table.get(name, ())):
+                self._remove(key)
+                self._stats["invalidations"] += 1
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._stats)
+            lookups = data["hits"] + data["misses"]
+            data["hit_rate"] = round(data["hits"] / lookups, 3) if lookups else 0.0
+            data["entries"] = len(self._entries)
+            data["bytes"] = self._bytes
+            return data
@@ -0,0 +1,252 @@
+"""Coalescing of queued writes before they are replayed on a remote.
+
+While a remote is down every edit lands in ``retry_queue`` as its own
+statement. :func:`compact_entries` removes the ones whose effect is fully
+overwritten later in the queue of the same target:
+
+* an ``UPDATE`` followed by another ``UPDATE`` of the same row (same table
+  and ``WHERE`` values) that sets at least the same columns;
+* an ``INSERT`` with explicit key values that is later deleted, together with
+  the delete and any updates of that row in between. The delete must address
+  the row through exactly its primary key or a unique key listed in
+  :data:`TABLE_KEYS`; a ``WHERE`` on any other columns may also remove rows
+  that already exist on the remote, so both statements are kept.
+
+Only simple statements are considered (``col = %s`` assignments and
+``col = %s [AND ...]`` conditions with positional parameters). Anything else
+touching a table resets the analysis for that table, so the replayed result is
+always the same as replaying the full queue.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+_UPDATE_RE = re.compile(
+    r"^\s*UPDATE\s+`?(\w+)`?\s+SET\s+(.+?)\s+WHERE\s+(.+?)\s*;?\s*$",
+    re.IGNORECASE | re.DOTALL,
+)
+_INSERT_RE = re.compile(
+    r"^\s*INSERT\s+INTO\s+`?(\w+)`?\s*\(([^)]*)\)\s*VALUES\s*\(([^)]*)\)\s*;?\s*$",
+    re.IGNORECASE | re.DOTALL,
+)
+_DELETE_RE = re.compile(
+    r"^\s*DELETE\s+FROM\s+`?(\w+)`?\s+WHERE\s+(.+?)\s*;?\s*$",
+    re.IGNORECASE | re.DOTALL,
+)
+_TABLE_RE = re.compile(
+    r"^\s*(?:INSERT\s+(?:OR\s+\w+\s+)?INTO|UPDATE|DELETE\s+FROM|REPLACE\s+INTO)\s+`?(\w+)`?",
+    re.IGNORECASE,
+)
+_ASSIGN_RE = re.compile(r"^\s*`?(\w+)`?\s*=\s*%s\s*$")
+_AND_RE = re.compile(r"\s+AND\s+", re.IGNORECASE)
+
+Entry = Tuple[Any, str, str, Any]  # (row_id, target, query, params)
+
+# Primary and unique keys per table (lower-case names, from data/sql_bases.sql)
+TABLE_KEYS: Dict[str, Tuple[Tuple[str, ...], ...]] = {
+    "tipo_entidad": (("id_tipo_entidad",),),
+    "medio_pago": (("id_medio_pago",),),
+    "tipo_documento": (("id_tipo_documento",),),
+    "codigo_postal": (("id_codigo_postal",),),
+    "categoria_licencia": (("id_categoria",),),
+    "tipo_mantenimiento": (("id_tipo",),),
+    "taller_mantenimiento": (("id_taller",),),
+    "estado_vehiculo": (("id_estado",),),
+    "marca_vehiculo": (("id_marca",),),
+    "color_vehiculo": (("id_color",),),
+    "tipo_vehiculo": (("id_tipo",),),
+    "blindaje_vehiculo": (("id_blindaje",),),
+    "transmision_vehiculo": (("id_transmision",),),
+    "cilindraje_vehiculo": (("id_cilindraje",),),
+    "estado_alquiler": (("id_estado",),),
+    "sucursal": (("id_sucursal",),),
+    "tipo_empleado": (("id_tipo_empleado",), ("descripcion",)),
+    "empleado": (("id_empleado",),),
+    "licencia_conduccion": (("id_licencia",),),
+    "cliente": (("id_cliente",), ("correo",)),
+    "seguro_vehiculo": (("id_seguro",),),
+    "proveedor_vehiculo": (("id_proveedor",),),
+    "mantenimiento_vehiculo": (("id_mantenimiento",),),
+    "vehiculo": (("placa",),),
+    "mantenimiento": (("id_mantenimiento",),),
+    "descuento_alquiler": (("id_descuento",),),
+    "estado_reserva": (("id_estado",),),
+    "seguro_alquiler": (("id_seguro",),),
+    "reserva_alquiler": (("id_reserva",),),
+    "alquiler": (("id_alquiler",),),
+    "det_factura": (("id_det_factura",),),
+    "factura": (("id_factura",),),
+    "cuenta_pagar": (("id_cuenta_pagar",),),
+    "cuenta_cobrar": (("id_cuenta_cobrar",),),
+    "cuenta": (("id_cuenta",),),
+    "abono_reserva": (("id_abono",),),
+    "rol": (("id_rol",), ("nombre",)),
+    "usuario": (("id_usuario",), ("usuario",)),
+    "ventas_diarias": (("fecha", "id_empleado", "id_sucursal"),),
+}
+
+
+def _columns(parts: Sequence[str]) -> Optional[List[str]]:
+    """Return the column of each ``col = %s`` term, or None if one is not."""
+    cols = []
+    for part in parts:
+        match = _ASSIGN_RE.match(part)
+        if not match:
+            return None
+        cols.append(match.group(1).lower())
+    return cols
+
+
+def _parse(query: str, params: Any):
+    """Classify a statement as ``update``, ``insert``, ``delete`` or None.
+
+    Returns ``(kind, table, data)`` where ``data`` depends on the kind:
+    ``(set_columns, key)`` for updates, ``{column: value}`` for inserts and
+    ``key`` for deletes. ``key`` is a sorted tuple of ``(column, value)``.
+    """
+    if not isinstance(params, (list, tuple)):
+        return None
+    params = list(params)
+    try:
+        match = _UPDATE_RE.match(query)
+        if match:
+            table, set_part, where_part = match.groups()
+            set_cols = _columns(set_part.split(","))
+            where_cols = _columns(_AND_RE.split(where_part))
+            if not set_cols or not where_cols:
+                return None
+            if len(set_cols) + len(where_cols) != len(params):
+                return None
+            if set(set_cols) & set(where_cols):
+                # Updating the key itself changes which row later statements hit
+                return None
+            key = tuple(sorted(zip(where_cols, params[len(set_cols):])))
+            hash(key)
+            return "update", table.lower(), (frozenset(set_cols), key)
+
+        match = _INSERT_RE.match(query)
+        if match:
+            table, cols_part, values_part = match.groups()
+            cols = [c.strip().strip("`").lower() for c in cols_part.split(",")]
+            values = [v.strip() for v in values_part.split(",")]
+            if any(v != "%s" for v in values) or len(cols) != len(params):
+                return None
+            row = dict(zip(cols, params))
+            hash(tuple(row.items()))
+            return "insert", table.lower(), row
+
+        match = _DELETE_RE.match(query)
+        if match:
+            table, where_part = match.groups()
+            where_cols = _columns(_AND_RE.split(where_part))
+            if not where_cols or len(where_cols) != len(params):
+                return None
+            key = tuple(sorted(zip(where_cols, params)))
+            hash(key)
+            return "delete", table.lower(), key
+    except TypeError:
+        # Unhashable parameter values
+        return None
+    return None
+
+
+def _touched_table(query: str) -> str:
+    match = _TABLE_RE.match(query or "")
+    return match.group(1).lower() if match else ""
+
+
+def _is_row_key(table_keys, table: str, key) -> bool:
+    """True if ``key`` names exactly one declared key of ``table``, non-NULL."""
+    columns = frozenset(col for col, _ in key)
+    if any(value is None for _, value in key):
+        # col = NULL matches nothing, and unique keys allow repeated NULLs
+        return False
+    return any(columns == frozenset(k) for k in table_keys.get(table, ()))
+
+
+def compact_entries(
+    entries: Sequence[Entry], table_keys: Optional[Dict[str, Sequence[Sequence[str]]]] = None
+) -> Tuple[List[Entry], List[Any]]:
+    """Drop queued writes superseded later in the queue of the same target.
+
+    ``entries`` must be in replay order. Returns ``(kept, dropped_ids)`` where
+    ``dropped_ids`` are the persisted ``retry_queue`` ids that can be deleted
+    without replaying them. ``table_keys`` defaults to :data:`TABLE_KEYS`.
+    """
+    if table_keys is None:
+        table_keys = TABLE_KEYS
+    dropped = set()
+    # (target, table) -> state of the rows seen since the last reset
+    updates: Dict[Tuple[str, str], Dict[Any, Tuple[int, frozenset]]] = {}
+    inserts: Dict[Tuple[str, str], List[Tuple[int, Dict[str, Any]]]] = {}
+    row_updates: Dict[Tuple[str, str], Dict[Any, List[int]]] = {}
+    key_columns: Dict[Tuple[str, str], Tuple[str, ...]] = {}
+
+    def reset(scope):
+        updates.pop(scope, None)
+        inserts.pop(scope, None)
+        row_updates.pop(scope, None)
+        key_columns.pop(scope, None)
+
+    for index, (_, target, query, params) in enumerate(entries):
+        parsed = _parse(query or "", params)
+        if parsed is None:
+            table = _touched_table(query)
+            if table:
+                reset((target, table))
+            else:
+                # Unknown statement: it could touch anything on this target
+                for scope in [s for s in updates.keys() | inserts.keys() if s[0] == target]:
+                    reset(scope)
+            continue
+
+        kind, table, data = parsed
+        scope = (target, table)
+
+        if kind == "update":
+            set_cols, key = data
+            cols = tuple(col for col, _ in key)
+            if key_columns.setdefault(scope, cols) != cols:
+                # Rows addressed through different columns may overlap
+                reset(scope)
+                key_columns[scope] = cols
+            previous = updates.setdefault(scope, {}).get(key)
+            if previous is not None and set_cols >= previous[1]:
+                dropped.add(previous[0])
+            updates[scope][key] = (index, set_cols)
+            row_updates.setdefault(scope, {}).setdefault(key, []).append(index)
+            continue
+
+        if kind == "insert":
+            # A new row may match pending updates' WHERE clauses
+            updates.pop(scope, None)
+            row_updates.pop(scope, None)
+            key_columns.pop(scope, None)
+            inserts.setdefault(scope, []).append((index, data))
+            continue
+
+        # kind == "delete"
+        key = data
+        match_index = None
+        candidates = inserts.get(scope, []) if _is_row_key(table_keys, table, key) else []
+        for ins_index, row in reversed(candidates):
+            if all(col in row and row[col] == value for col, value in key):
+                match_index = ins_index
+                break
+        if match_index is not None:
+            between = [
+                i
+                for i in range(match_index + 1, index)
+                if i not in dropped and _touched_table(entries[i][2]) == table
+                and entries[i][1] == target
+            ]
+            same_row = set(row_updates.get(scope, {}).get(key, []))
+            if all(i in same_row for i in between):
+                dropped.update(between)
+                dropped.add(match_index)
+                dropped.add(index)
+        reset(scope)
+
+    kept = [entry for i, entry in enumerate(entries) if i not in dropped]
+    dropped_ids = [entries[i][0] for i in sorted(dropped) if entries[i][0]]
+    return kept, dropped_ids
@@ -0,0 +1,406 @@
+"""Columnar in-memory copy of the sales tables for manager reports.
+
+:class:`SalesAnalytics` loads ``Alquiler``, ``Reserva_alquiler`` and
+``Abono_reserva`` into NumPy column arrays (ids as ``int64`` with ``-1`` for
+NULL, timestamps as ``datetime64[s]``, amounts as ``float64``) and answers the
+per-branch, per-seller, per-month and top-vehicle aggregations with
+vectorized group-bys, without a round trip to MySQL or a SQLite ``GROUP BY``.
+
+The arrays are refreshed incrementally: every ``ANALYTICS_REFRESH_INTERVAL``
+seconds only rows whose id is above the last one loaded are appended, and
+every ``ANALYTICS_FULL_INTERVAL`` seconds the tables are reloaded whole so
+updates and deletes are picked up too. Full reloads read the remotes only
+(``select_remote``); if any table fails the previous arrays are kept. Offline
+the refresh reads the local SQLite, which keeps only the last 7 days, so full
+reloads are skipped there: history loaded while online is kept and new local
+rentals are appended. :meth:`SalesAnalytics.ready` is False until a full load
+has been done online; ``GerenteView`` then keeps using the SQL reports.
+
+NumPy is optional: without it every method runs the equivalent SQL
+(:mod:`src.services.reports` for sales), so callers need no special case.
+
+Example
+-------
+>>> analytics = SalesAnalytics.shared(db)
+>>> analytics.ventas_por_sucursal(3, 2025)
+[(1, 1250000.0), (2, 980000.0)]
+>>> analytics.top_vehiculos(5)
+[('ABC123', 14), ...]
+"""
+
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+try:
+    import numpy as np
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
+from . import reports
+from .reports import _is_sqlite, rango_mes, rango_anio
+
+# (tabla, columna id, columnas cargadas)
+_TABLES = {
+    "alquiler": (
+        "Alquiler", "id_alquiler",
+        ("id_alquiler", "fecha_hora_salida", "valor", "id_sucursal", "id_empleado", "id_vehiculo"),
+    ),
+    "reserva": (
+        "Reserva_alquiler", "id_reserva",
+        ("id_reserva", "id_alquiler", "fecha_hora", "saldo_pendiente"),
+    ),
+    "abono": (
+        "Abono_reserva", "id_abono",
+        ("id_abono", "id_reserva", "fecha_hora", "valor"),
+    ),
+}
+
+# Columnas de texto codificadas como enteros (índice en un diccionario)
+_CODED = {"id_vehiculo"}
+
+
+def _kind(column):
+    if column in _CODED:
+        return "code"
+    if column.startswith("id_"):
+        return "id"
+    if column.startswith("fecha"):
+        return "date"
+    return "value"
+
+
+def _group_sum(keys, values):
+    """Vectorized ``GROUP BY keys`` returning ``(keys, sums, counts)``."""
+    uniq, inverse = np.unique(keys, return_inverse=True)
+    sums = np.bincount(inverse, weights=values, minlength=len(uniq))
+    counts = np.bincount(inverse, minlength=len(uniq))
+    return uniq, sums, counts
+
+
+def _lookup(keys, values, wanted):
+    """Map ``wanted`` through ``keys -> values`` (``-1`` when missing)."""
+    if not len(keys):
+        return np.full(len(wanted), -1, dtype=np.int64)
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    pos = np.clip(np.searchsorted(sorted_keys, wanted), 0, len(keys) - 1)
+    found = sorted_keys[pos] == wanted
+    return np.where(found, values[order][pos], -1)
+
+
+def _id_rows(uniq, sums):
+    return [(None if key < 0 else int(key), float(total)) for key, total in zip(uniq, sums)]
+
+
+class SalesAnalytics:
+    """Columnar sales engine over a db manager (``execute_query``)."""
+
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, db):
+        """Engine shared by every view of ``db`` (created on first use)."""
+        with cls._shared_lock:
+            engine = cls._shared.get(id(db))
+            if engine is None or engine.db is not db:
+                engine = cls._shared[id(db)] = cls(db)
+            return engine
+
+    def __init__(self, db, refresh_interval=None, full_interval=None):
+        self.logger = logging.getLogger(__name__)
+        self.db = db
+        self.enabled = np is not None
+        if not self.enabled:
+            self.logger.info("numpy not installed; analytics fall back to SQL reports")
+        self.refresh_interval = float(
+            os.getenv("ANALYTICS_REFRESH_INTERVAL", "30") if refresh_interval is None else refresh_interval
+        )
+        self.full_interval = float(
+            os.getenv("ANALYTICS_FULL_INTERVAL", "600") if full_interval is None else full_interval
+        )
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._columns = {}      # tabla -> {columna: ndarray}
+        self._watermarks = {}   # tabla -> mayor id cargado
+        self._placas = []       # código -> placa
+        self._placa_codes = {}  # placa -> código
+        self._refreshed_at = 0.0
+        self._full_at = 0.0
+        self._complete = False  # historial completo cargado en línea
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+    def refresh(self, full=False):
+        """Load new rows (or everything with ``full``); returns rows read.
+
+        Offline only new rows are read, unless nothing is loaded yet. Full
+        loads read the remotes only and raise if one fails, keeping the
+        previous arrays.
+        """
+        if not self.enabled:
+            return 0
+        # Una recarga a la vez; las consultas siguen usando los arreglos
+        # actuales mientras se lee la base
+        with self._refresh_lock:
+            offline = _is_sqlite(self.db)
+            with self._lock:
+                loaded = bool(self._columns)
+                watermarks = dict(self._watermarks)
+                stale = not self._complete or (
+                    time.monotonic() - self._full_at >= self.full_interval
+                )
+            if not loaded:
+                full = True
+            elif offline:
+                # SQLite solo guarda 7 días: recargar borraría el historial
+                full = False
+            else:
+                full = full or stale
+            # El historial completo solo sale de un remoto
+            remote = full and not offline
+            started = time.monotonic()
+            fetched = {
+                name: self._fetch_table(name, None if full else watermarks.get(name), remote)
+                for name in _TABLES
+            }
+            with self._lock:
+                rows = self._apply(fetched, full)
+                now = time.monotonic()
+                self._refreshed_at = now
+                if full:
+                    self._full_at = now
+                    self._complete = remote
+            self.logger.debug(
+                "Analytics %s refresh: %d rows in %.3fs",
+                "full" if full else "incremental", rows, now - started,
+            )
+            return rows
+
+    def _maybe_refresh(self):
+        if time.monotonic() - self._refreshed_at >= self.refresh_interval or not self._columns:
+            try:
+                self.refresh()
+            except Exception as exc:
+                # Seguir respondiendo con los datos ya cargados
+                self.logger.warning("Analytics refresh failed: %s", exc)
+
+    def _fetch_table(self, name, last, remote):
+        """Read the rows of ``name`` with id above ``last`` (all if None).
+
+        With ``remote`` the read must come from a remote: managers with
+        ``select_remote`` raise instead of falling back to SQLite.
+        """
+        table, id_col, columns = _TABLES[name]
+        ph = "?" if _is_sqlite(self.db) else "%s"
+        query = f"SELECT {', '.join(columns)} FROM {table}"
+        params = ()
+        if last is not None:
+            query += f" WHERE {id_col} > {ph}"
+            params = (last,)
+        query += f" ORDER BY {id_col}"
+        select_remote = getattr(self.db, "select_remote", None)
+        if remote and select_remote is not None:
+            return select_remote(query, params) or []
+        return self.db.execute_query(query, params) or []
+
+    def _apply(self, fetched, full):
+        """Swap in the arrays built from ``fetched`` rows; caller holds the lock."""
+        if full:
+            self._placas, self._placa_codes = [], {}
+        columns = dict(self._columns)
+        total = 0
+        for name, rows in fetched.items():
+            _table, id_col, names = _TABLES[name]
+            arrays = self._to_columns(names, rows)
+            current = columns.get(name)
+            if current is not None and not full:
+                arrays = {col: np.concatenate((current[col], arrays[col])) for col in names}
+            columns[name] = arrays
+            ids = arrays[id_col]
+            if len(ids):
+                self._watermarks[name] = int(ids.max())
+            elif full:
+                self._watermarks.pop(name, None)
+            total += len(rows)
+        # Reemplazar el diccionario: los snapshots previos siguen intactos
+        self._columns = columns
+        return total
+
+    def _to_columns(self, columns, rows):
+        values = list(zip(*rows)) if rows else [()] * len(columns)
+        arrays = {}
+        for column, data in zip(columns, values):
+            kind = _kind(column)
+            if kind == "id":
+                arrays[column] = np.array([-1 if v is None else int(v) for v in data], dtype=np.int64)
+            elif kind == "date":
+                arrays[column] = np.array(
+                    [v if v is None or isinstance(v, datetime) else str(v) for v in data],
+                    dtype="datetime64[s]",
+                )
+            elif kind == "code":
+                arrays[column] = np.array([self._code(v) for v in data], dtype=np.int64)
+            else:
+                arrays[column] = np.array([0.0 if v is None else float(v) for v in data], dtype=np.float64)
+        return arrays
+
+    def _code(self, placa):
+        if placa is None:
+            return -1
+        code = self._placa_codes.get(placa)
+        if code is None:
+            code = self._placa_codes[placa] = len(self._placas)
+            self._placas.append(placa)
+        return code
+
+    def ready(self):
+        """True when the full history is loaded (refreshing first if due).
+
+        Without numpy, or before a full load done online, callers should use
+        the SQL reports instead.
+        """
+        if not self.enabled:
+            return False
+        self._maybe_refresh()
+        return self._complete
+
+    def stats(self):
+        """Rows and bytes held per table."""
+        with self._lock:
+            return {
+                _TABLES[name][0]: {
+                    "rows": len(next(iter(cols.values()))) if cols else 0,
+                    "bytes": sum(arr.nbytes for arr in cols.values()),
+                }
+                for name, cols in self._columns.items()
+            }
+
+    # ------------------------------------------------------------------
+    # Aggregations
+    # ------------------------------------------------------------------
+    def _snapshot(self):
+        """Refresh if due and return ``(columns, placas)`` as of now.
+
+        Refreshes replace arrays instead of mutating them, so the snapshot
+        stays consistent while another thread reloads.
+        """
+        self._maybe_refresh()
+        with self._lock:
+            return dict(self._columns), self._placas
+
+    def _ventas(self, inicio, fin, columns=None):
+        """Alquiler columns restricted to ``[inicio, fin)``."""
+        if columns is None:
+            columns = self._snapshot()[0]
+        cols = columns["alquiler"]
+        fechas = cols["fecha_hora_salida"]
+        mask = (fechas >= np.datetime64(inicio, "s")) & (fechas < np.datetime64(fin, "s"))
+        return {col: arr[mask] for col, arr in cols.items()}
+
+    def ventas_agrupadas(self, columna: str, inicio: Optional[datetime] = None,
+                         fin: Optional[datetime] = None) -> List[Tuple[Any, float]]:
+        """Sales grouped by ``id_sucursal`` or ``id_empleado``, optionally in ``[inicio, fin)``."""
+        if not self.enabled:
+            return reports._ventas_agrupadas(
+                self.db, columna, inicio or datetime(1900, 1, 1), fin or datetime(9999, 1, 1)
+            )
+        if inicio is None and fin is None:
+            cols = self._snapshot()[0]["alquiler"]
+        else:
+            cols = self._ventas(inicio or datetime.min, fin or datetime.max)
+        uniq, sums, _ = _group_sum(cols[columna], cols["valor"])
+        return _id_rows(uniq, sums)
+
+    def ventas_por_sucursal(self, mes: int, anio: int) -> List[Tuple[Any, float]]:
+        """Same result as :func:`reports.ventas_por_sucursal`."""
+        if not self.enabled:
+            return reports.ventas_por_sucursal(self.db, mes, anio)
+        cols = self._ventas(*rango_mes(mes, anio))
+        uniq, sums, _ = _group_sum(cols["id_sucursal"], cols["valor"])
+        return _id_rows(uniq, sums)
+
+    def ventas_por_vendedor(self, mes: int, anio: int) -> List[Tuple[Any, float]]:
+        """Same result as :func:`reports.ventas_por_vendedor`."""
+        if not self.enabled:
+            return reports.ventas_por_vendedor(self.db, mes, anio)
+        cols = self._ventas(*rango_mes(mes, anio))
+        uniq, sums, _ = _group_sum(cols["id_empleado"], cols["valor"])
+        return _id_rows(uniq, sums)
+
+    def ventas_mensuales(self, anio: int) -> List[Tuple[int, float]]:
+        """Same result as :func:`reports.ventas_mensuales`."""
+        if not self.enabled:
+            return reports.ventas_mensuales(self.db, anio)
+        cols = self._ventas(*rango_anio(anio))
+        meses = cols["fecha_hora_salida"].astype("datetime64[M]").astype(np.int64) % 12 + 1
+        uniq, sums, _ = _group_sum(meses, cols["valor"])
+        return [(int(mes), float(total)) for mes, total in zip(uniq, sums)]
+
+    def top_vehiculos(self, n: int = 10, inicio: Optional[datetime] = None,
+                      fin: Optional[datetime] = None) -> List[Tuple[str, int]]:
+        """Most rented vehicles as ``(placa, veces)``, optionally in ``[inicio, fin)``."""
+        if not self.enabled:
+            return self._top_vehiculos_sql(n, inicio, fin)
+        columns, placas = self._snapshot()
+        if inicio is None and fin is None:
+            codes = columns["alquiler"]["id_vehiculo"]
+        else:
+            codes = self._ventas(inicio or datetime.min, fin or datetime.max, columns)["id_vehiculo"]
+        codes = codes[codes >= 0]
+        counts = np.bincount(codes, minlength=len(placas))
+        order = np.argsort(-counts, kind="stable")[:n]
+        return [(placas[i], int(counts[i])) for i in order if counts[i] > 0]
+
+    def abonos_por_sucursal(self, mes: int, anio: int) -> List[Tuple[Any, float]]:
+        """Payments of reservations made in a month, grouped by branch."""
+        if not self.enabled:
+            return self._abonos_por_sucursal_sql(mes, anio)
+        columns, _ = self._snapshot()
+        inicio, fin = rango_mes(mes, anio)
+        abonos = columns["abono"]
+        fechas = abonos["fecha_hora"]
+        mask = (fechas >= np.datetime64(inicio, "s")) & (fechas < np.datetime64(fin, "s"))
+        reservas = columns["reserva"]
+        alquileres = columns["alquiler"]
+        id_alquiler = _lookup(reservas["id_reserva"], reservas["id_alquiler"], abonos["id_reserva"][mask])
+        sucursal = _lookup(alquileres["id_alquiler"], alquileres["id_sucursal"], id_alquiler)
+        uniq, sums, _ = _group_sum(sucursal, abonos["valor"][mask])
+        return _id_rows(uniq, sums)
+
+    # ------------------------------------------------------------------
+    # SQL fallbacks (sin numpy)
+    # ------------------------------------------------------------------
+    def _range(self, inicio, fin):
+        if _is_sqlite(self.db):
+            fmt = "%Y-%m-%d %H:%M:%S"
+            return "?", (inicio.strftime(fmt), fin.strftime(fmt))
+        return "%s", (inicio, fin)
+
+    def _top_vehiculos_sql(self, n, inicio, fin):
+        where, params = "", ()
+        if inicio is not None or fin is not None:
+            ph, params = self._range(inicio or datetime(1900, 1, 1), fin or datetime(9999, 1, 1))
+            where = f"WHERE fecha_hora_salida >= {ph} AND fecha_hora_salida < {ph} "
+        query = (
+            "SELECT id_vehiculo, COUNT(*) AS veces FROM Alquiler "
+            f"{where}GROUP BY id_vehiculo ORDER BY veces DESC LIMIT {int(n)}"
+        )
+        return self.db.execute_query(query, params) or []
+
+    def _abonos_por_sucursal_sql(self, mes, anio):
+        ph, params = self._range(*rango_mes(mes, anio))
+        query = (
+            "SELECT a.id_sucursal, SUM(ab.valor) AS total "
+            "FROM Abono_reserva ab "
+            "LEFT JOIN Reserva_alquiler ra ON ab.id_reserva = ra.id_reserva "
+            "LEFT JOIN Alquiler a ON ra.id_alquiler = a.id_alquiler "
+            f"WHERE ab.fecha_hora >= {ph} AND ab.fecha_hora < {ph} "
+            "GROUP BY a.id_sucursal"
+        )
+        return self.db.execute_query(query, params) or []
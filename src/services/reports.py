@@ -1,9 +1,22 @@
-"""Simple reporting utilities for sales aggregated from ``Alquiler``."""
+"""Simple reporting utilities for sales aggregated from ``Alquiler``.
 
+The reports read ``ventas_diarias``, one row per (day, branch, employee)
+kept up to date by the ``Alquiler`` triggers (see
+``data/mysql_migrations/003_ventas_diarias.sql``), so a monthly report
+touches O(days) rows instead of every rental. Dates are filtered with a
+half-open ``[inicio, fin)`` range on the ``fecha`` primary key column.
+Branches and employees stored as ``0`` (NULL in ``Alquiler``) come back as
+``None``.
+"""
+
+from datetime import datetime
 from typing import List, Tuple, Any
 
 from ..sqlite_manager import SQLiteManager
 
+# SQLite stores dates as text; this format compares in chronological order
+_SQLITE_DATE = "%Y-%m-%d"
+
 
 def _is_sqlite(db) -> bool:
     """Determine if a db manager works with SQLite."""
@@ -17,69 +30,58 @@ def _is_sqlite(db) -> bool:
     return getattr(db, "offline", False)
 
 
-def ventas_por_sucursal(db, mes: int, anio: int) -> List[Tuple[Any, float]]:
-    """Return total sales grouped by branch for a given month."""
+def rango_mes(mes: int, anio: int) -> Tuple[datetime, datetime]:
+    """Return ``[inicio, fin)`` covering month ``mes`` of ``anio``."""
+    inicio = datetime(anio, mes, 1)
+    fin = datetime(anio + 1, 1, 1) if mes == 12 else datetime(anio, mes + 1, 1)
+    return inicio, fin
+
+
+def rango_anio(anio: int) -> Tuple[datetime, datetime]:
+    """Return ``[inicio, fin)`` covering the whole year ``anio``."""
+    return datetime(anio, 1, 1), datetime(anio + 1, 1, 1)
+
+
+def _range_filter(db, inicio: datetime, fin: datetime):
+    """Return ``(placeholder, params)`` for the ``fecha`` range."""
     if _is_sqlite(db):
-        query = (
-            "SELECT id_sucursal, SUM(valor) as total "
-            "FROM Alquiler "
-            "WHERE strftime('%m', fecha_hora_salida) = ? "
-            "AND strftime('%Y', fecha_hora_salida) = ? "
-            "GROUP BY id_sucursal"
-        )
-        params = (f"{mes:02d}", str(anio))
-    else:
-        query = (
-            "SELECT id_sucursal, SUM(valor) as total "
-            "FROM Alquiler "
-            "WHERE MONTH(fecha_hora_salida) = %s "
-            "AND YEAR(fecha_hora_salida) = %s "
-            "GROUP BY id_sucursal"
-        )
-        params = (mes, anio)
+        return "?", (inicio.strftime(_SQLITE_DATE), fin.strftime(_SQLITE_DATE))
+    return "%s", (inicio.date(), fin.date())
+
+
+def _ventas_agrupadas(db, columna: str, inicio: datetime, fin: datetime):
+    ph, params = _range_filter(db, inicio, fin)
+    query = (
+        f"SELECT NULLIF({columna}, 0), SUM(total) as total "
+        "FROM ventas_diarias "
+        f"WHERE fecha >= {ph} AND fecha < {ph} "
+        f"GROUP BY {columna} HAVING SUM(n) > 0"
+    )
     return db.execute_query(query, params) or []
 
 
+def ventas_por_sucursal(db, mes: int, anio: int) -> List[Tuple[Any, float]]:
+    """Return total sales grouped by branch for a given month."""
+    return _ventas_agrupadas(db, "id_sucursal", *rango_mes(mes, anio))
+
+
 def ventas_por_vendedor(db, mes: int, anio: int) -> List[Tuple[Any, float]]:
     """Return total sales grouped by employee for a given month."""
-    if _is_sqlite(db):
-        query = (
-            "SELECT id_empleado, SUM(valor) as total "
-            "FROM Alquiler "
-            "WHERE strftime('%m', fecha_hora_salida) = ? "
-            "AND strftime('%Y', fecha_hora_salida) = ? "
-            "GROUP BY id_empleado"
-        )
-        params = (f"{mes:02d}", str(anio))
-    else:
-        query = (
-            "SELECT id_empleado, SUM(valor) as total "
-            "FROM Alquiler "
-            "WHERE MONTH(fecha_hora_salida) = %s "
-            "AND YEAR(fecha_hora_salida) = %s "
-            "GROUP BY id_empleado"
-        )
-        params = (mes, anio)
-    return db.execute_query(query, params) or []
+    return _ventas_agrupadas(db, "id_empleado", *rango_mes(mes, anio))
 
 
 def ventas_mensuales(db, anio: int) -> List[Tuple[int, float]]:
     """Return total sales per month of a given year."""
+    ph, params = _range_filter(db, *rango_anio(anio))
+    # The month is only extracted for grouping; the WHERE stays sargable
     if _is_sqlite(db):
-        query = (
-            "SELECT CAST(strftime('%m', fecha_hora_salida) AS INTEGER) as mes, "
-            "SUM(valor) as total "
-            "FROM Alquiler "
-            "WHERE strftime('%Y', fecha_hora_salida) = ? "
-            "GROUP BY mes ORDER BY mes"
-        )
-        params = (str(anio),)
+        mes = "CAST(strftime('%m', fecha) AS INTEGER)"
     else:
-        query = (
-            "SELECT MONTH(fecha_hora_salida) as mes, SUM(valor) as total "
-            "FROM Alquiler "
-            "WHERE YEAR(fecha_hora_salida) = %s "
-            "GROUP BY mes ORDER BY mes"
-        )
-        params = (anio,)
+        mes = "MONTH(fecha)"
+    query = (
+        f"SELECT {mes} as mes, SUM(total) as total "
+        "FROM ventas_diarias "
+        f"WHERE fecha >= {ph} AND fecha < {ph} "
+        "GROUP BY mes HAVING SUM(n) > 0 ORDER BY mes"
+    )
     return db.execute_query(query, params) or []
@@ -1,70 +1,302 @@
 import os
 import sqlite3
+import hashlib
+import logging
+import threading
+import time
 from pathlib import Path
 from dotenv import load_dotenv
 
+from .config import Config
+
+_JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+_SYNCHRONOUS_LEVELS = {"OFF", "NORMAL", "FULL", "EXTRA"}
+_CHECKPOINT_MODES = {"PASSIVE", "FULL", "RESTART", "TRUNCATE"}
+
+_DATA_DIR = Path(__file__).resolve().parents[1] / 'data'
+
+# Scripts applied to the local database, in order: (name, path, repeatable).
+# Repeatable scripts are idempotent and run again whenever their contents
+# change; versioned ones (repeatable=False) run exactly once.
+MIGRATIONS = [
+    ("schema", _DATA_DIR / 'sqlite_schema.sql', True),
+    ("seed", _DATA_DIR / 'inserts_sqlite.sql', True),
+    ("001_retry_queue", _DATA_DIR / 'sqlite_migrations' / '001_retry_queue.sql', False),
+    ("002_sync_watermark", _DATA_DIR / 'sqlite_migrations' / '002_sync_watermark.sql', False),
+    ("003_indexes", _DATA_DIR / 'sqlite_migrations' / '003_indexes.sql', False),
+    ("004_ventas_diarias", _DATA_DIR / 'sqlite_migrations' / '004_ventas_diarias.sql', False),
+]
+
+# Rows sampled per index by ANALYZE (bounds its cost on large tables)
+_ANALYSIS_LIMIT = 1000
+
 
 class SQLiteManager:
-    """Simple SQLite database manager."""
+    """Simple SQLite database manager.
+
+    Schema and seed scripts are tracked in the ``schema_version`` table by
+    SHA-256 checksum, so creating another instance (or restarting the app)
+    only executes scripts that are new or have changed.
+
+    Every thread keeps one long-lived connection to ``LOCAL_DB_PATH`` that is
+    reused by :meth:`execute_query` and the ``save_pending_*`` helpers. Call
+    :meth:`close` on shutdown to release them all.
+
+    The database runs in WAL mode by default so the GUI thread, the
+    connection monitor and the retry worker can read while another thread
+    writes. Journal mode, ``synchronous``, cache/mmap sizes and the busy
+    timeout come from :class:`Config` (``SQLITE_*`` variables).
+    """
+
+    # Databases already migrated by this process (absolute paths)
+    _migrated_paths = set()
+    _migrate_lock = threading.Lock()
 
     def __init__(self):
         load_dotenv()
+        self.logger = logging.getLogger(__name__)
         self.db_path = os.getenv("LOCAL_DB_PATH", "local.db")
+        self._local = threading.local()
+        self._connections = []
+        self._conn_lock = threading.Lock()
+        # Bumped by close() so threads notice their cached connection is gone
+        self._generation = 0
+        self._last_checkpoint = time.monotonic()
         self._initialize_db()
 
     def _initialize_db(self):
-        """Ensure required tables exist."""
-        schema = Path(__file__).resolve().parents[1] / 'data' / 'sqlite_schema.sql'
-        inserts = Path(__file__).resolve().parents[1] / 'data' / 'inserts_sqlite.sql'
-        
-        conn = sqlite3.connect(self.db_path)
-        
-        if schema.exists():
-            with schema.open('r', encoding='utf-8') as fh:
-                conn.executescript(fh.read())
-        
-        if inserts.exists():
-            with inserts.open('r', encoding='utf-8') as fh:
-                conn.executescript(fh.read())
-        
-        conn.close()
+        """Ensure required tables exist by applying pending migrations."""
+        key = os.path.abspath(self.db_path)
+        with SQLiteManager._migrate_lock:
+            if key in SQLiteManager._migrated_paths:
+                return
+            conn = self._open()
+            try:
+                self._set_journal_mode(conn)
+                self._run_migrations(conn)
+            finally:
+                conn.close()
+            SQLiteManager._migrated_paths.add(key)
+
+    def _run_migrations(self, conn):
+        """Execute the scripts in :data:`MIGRATIONS` not applied yet."""
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS schema_version ("
+            "name TEXT PRIMARY KEY, "
+            "checksum TEXT NOT NULL, "
+            "applied_at TEXT DEFAULT (datetime('now')))"
+        )
+        applied = dict(conn.execute("SELECT name, checksum FROM schema_version"))
+        for name, path, repeatable in MIGRATIONS:
+            if not path.exists():
+                continue
+            script = path.read_bytes()
+            checksum = hashlib.sha256(script).hexdigest()
+            previous = applied.get(name)
+            if previous == checksum:
+                continue
+            if previous is not None and not repeatable:
+                self.logger.warning(
+                    "Migration %s changed after being applied; not running it again", name
+                )
+                continue
+            self.logger.info("Applying SQLite migration %s (%s)", name, path.name)
+            conn.executescript(script.decode('utf-8'))
+            conn.execute(
+                "INSERT INTO schema_version (name, checksum, applied_at) "
+                "VALUES (?, ?, datetime('now')) "
+                "ON CONFLICT(name) DO UPDATE SET "
+                "checksum = excluded.checksum, applied_at = excluded.applied_at",
+                (name, checksum),
+            )
+            conn.commit()
+
+    # ------------------------------------------------------------------
+    # Connection handling
+    # ------------------------------------------------------------------
+    def _open(self, check_same_thread=True):
+        """Open a connection with the configured pragmas applied."""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=Config.SQLITE_BUSY_TIMEOUT / 1000,
+            check_same_thread=check_same_thread,
+        )
+        synchronous = Config.SQLITE_SYNCHRONOUS.upper()
+        if synchronous not in _SYNCHRONOUS_LEVELS:
+            self.logger.warning("Invalid SQLITE_SYNCHRONOUS %r, using NORMAL", synchronous)
+            synchronous = "NORMAL"
+        conn.execute(f"PRAGMA synchronous = {synchronous}")
+        conn.execute(f"PRAGMA cache_size = {int(Config.SQLITE_CACHE_SIZE)}")
+        conn.execute(f"PRAGMA mmap_size = {int(Config.SQLITE_MMAP_SIZE)}")
+        conn.execute(f"PRAGMA busy_timeout = {int(Config.SQLITE_BUSY_TIMEOUT)}")
+        return conn
+
+    def _set_journal_mode(self, conn):
+        """Switch the database file to the configured journal mode.
+
+        The mode is stored in the file itself, so this only needs to run once.
+        """
+        mode = Config.SQLITE_JOURNAL_MODE.upper()
+        if mode not in _JOURNAL_MODES:
+            self.logger.warning("Invalid SQLITE_JOURNAL_MODE %r, using WAL", mode)
+            mode = "WAL"
+        try:
+            row = conn.execute(f"PRAGMA journal_mode = {mode}").fetchone()
+            if row and row[0].upper() != mode:
+                self.logger.warning("SQLite kept journal_mode=%s (requested %s)", row[0], mode)
+        except sqlite3.Error as exc:
+            self.logger.error("Could not set journal_mode=%s: %s", mode, exc)
 
     def connect(self):
+        """Return a new connection owned (and closed) by the caller."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            print("[SQLiteManager] Conexión exitosa a SQLite")
-            return conn
+            return self._open()
         except sqlite3.Error as exc:
             print(f"[SQLiteManager] Error de conexión a SQLite: {exc}")
             return None
 
-    def execute_query(self, query, params=None, fetch=True, return_lastrowid=False):
+    def _get_connection(self):
+        """Return the persistent connection of the calling thread."""
+        cached = getattr(self._local, "conn", None)
+        if cached is not None and cached[0] == self._generation:
+            return cached[1]
         try:
-            conn = self.connect()
-            if conn is None:
-                return None
+            # check_same_thread=False only so close() can run from the
+            # shutdown thread; each connection is still used by one thread.
+            conn = self._open(check_same_thread=False)
+        except sqlite3.Error as exc:
+            print(f"[SQLiteManager] Error de conexión a SQLite: {exc}")
+            return None
+        with self._conn_lock:
+            self._connections.append(conn)
+            self._local.conn = (self._generation, conn)
+        self.logger.debug(
+            "Opened SQLite connection for thread %s", threading.current_thread().name
+        )
+        return conn
+
+    def release_thread_connection(self):
+        """Close the calling thread's connection (e.g. before a worker exits)."""
+        cached = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if cached is None:
+            return
+        with self._conn_lock:
+            if cached[1] in self._connections:
+                self._connections.remove(cached[1])
+        cached[1].close()
+
+    def checkpoint(self, mode="PASSIVE"):
+        """Run ``PRAGMA wal_checkpoint`` and return ``(busy, log, checkpointed)``.
+
+        ``PASSIVE`` never blocks writers; ``TRUNCATE`` also resets the WAL file
+        to zero bytes and is used before backups and on shutdown.
+        """
+        mode = mode.upper()
+        if mode not in _CHECKPOINT_MODES:
+            raise ValueError(f"Invalid checkpoint mode: {mode}")
+        conn = self._get_connection()
+        if conn is None:
+            return None
+        try:
+            result = conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+            self._last_checkpoint = time.monotonic()
+            self.logger.debug("WAL checkpoint %s: %s", mode, result)
+            return result
+        except sqlite3.Error as exc:
+            self.logger.error("WAL checkpoint %s failed: %s", mode, exc)
+            return None
+
+    def optimize(self, full=False):
+        """Refresh the query planner statistics after bulk changes.
+
+        Runs ``PRAGMA optimize``, which only re-analyzes tables that need
+        it. A bounded ``ANALYZE`` of the whole database is run instead when
+        ``full`` is true (e.g. after a full sync) or no statistics exist yet.
+        """
+        conn = self._get_connection()
+        if conn is None:
+            return
+        try:
+            has_stats = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+            ).fetchone()
+            if full or not has_stats:
+                conn.execute(f"PRAGMA analysis_limit = {_ANALYSIS_LIMIT}")
+                conn.execute("ANALYZE")
+            else:
+                conn.execute("PRAGMA optimize")
+            conn.commit()
+        except sqlite3.Error as exc:
+            self.logger.error("SQLite optimize failed: %s", exc)
+
+    def maybe_checkpoint(self):
+        """Checkpoint the WAL when ``SQLITE_CHECKPOINT_INTERVAL`` has elapsed.
+
+        Meant to be called from a background thread, never from the GUI.
+        """
+        interval = Config.SQLITE_CHECKPOINT_INTERVAL
+        if interval <= 0 or time.monotonic() - self._last_checkpoint < interval:
+            return None
+        return self.checkpoint("PASSIVE")
+
+    def close(self):
+        """Close every per-thread connection opened by this manager."""
+        self.checkpoint("TRUNCATE")
+        with self._conn_lock:
+            connections = self._connections
+            self._connections = []
+            self._generation += 1
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as exc:  # pragma: no cover - shutdown errors
+                self.logger.error("Error closing SQLite connection: %s", exc)
+
+    def execute_query(self, query, params=None, fetch=True, return_lastrowid=False,
+                      raise_errors=False):
+        """Run ``query`` on this thread's connection.
+
+        Errors are printed and reported as ``None`` unless ``raise_errors`` is
+        set, in which case the ``sqlite3.Error`` propagates after the rollback
+        (callers that must tell a failed write from an empty result).
+        """
+        conn = self._get_connection()
+        if conn is None:
+            if raise_errors:
+                raise sqlite3.OperationalError(f"cannot open {self.db_path}")
+            return None
+        try:
+            # The connection outlives this call: a write run with fetch=True
+            # must not leave its implicit transaction (and the WAL write lock)
+            # open on this thread's connection
+            owns_transaction = not conn.in_transaction
             cursor = conn.cursor()
             cursor.execute(query, params or ())
             if return_lastrowid:
                 last_id = cursor.lastrowid
             if fetch:
                 result = cursor.fetchall()
+                if owns_transaction and conn.in_transaction:
+                    conn.commit()
             else:
                 conn.commit()
                 result = None
             cursor.close()
-            conn.close()
             if return_lastrowid:
                 return last_id
             return result
         except sqlite3.Error as exc:
+            conn.rollback()
+            if raise_errors:
+                raise
             print(f"[SQLiteManager] Error ejecutando consulta: {exc}")
             return None
 
     def get_lastrowid(self, table_name):
         """Obtener el último ID insertado en una tabla específica."""
         try:
-            conn = self.connect()
+            conn = self._get_connection()
             if conn is None:
                 return None
             cursor = conn.cursor()
@@ -84,7 +316,6 @@ class SQLiteManager:
             cursor.execute(f"SELECT MAX({id_column}) FROM {table_name}")
             result = cursor.fetchone()
             cursor.close()
-            conn.close()
             return result[0] if result and result[0] else None
         except sqlite3.Error as exc:
             print(f"[SQLiteManager] Error obteniendo lastrowid para tabla {table_name}: {exc}")
@@ -140,7 +371,7 @@ class SQLiteManager:
         Si el usuario no existe, lo inserta con pendiente=1.
         """
         try:
-            conn = self.connect()
+            conn = self._get_connection()
             if conn is None:
                 return None
             cursor = conn.cursor()
@@ -162,17 +393,17 @@ class SQLiteManager:
             cursor.execute(query, params)
             conn.commit()
             cursor.close()
-            conn.close()
             print(f"[SQLiteManager] Actualización/Inserción de contraseña pendiente para {usuario}.")
             return True
         except sqlite3.Error as exc:
+            conn.rollback()
             print(f"[SQLiteManager] Error guardando actualización/inserción de contraseña pendiente para {usuario}: {exc}")
             return False
 
     def save_pending_cliente(self, documento, nombre, telefono, direccion, correo):
         """Guarda un nuevo cliente pendiente en la tabla Cliente."""
         try:
-            conn = self.connect()
+            conn = self._get_connection()
             if conn is None:
                 return None
             cursor = conn.cursor()
@@ -182,17 +413,17 @@ class SQLiteManager:
             conn.commit()
             cliente_id = cursor.lastrowid
             cursor.close()
-            conn.close()
             print(f"[SQLiteManager] Cliente pendiente guardado: {nombre}.")
             return cliente_id
         except sqlite3.Error as exc:
+            conn.rollback()
             print(f"[SQLiteManager] Error guardando cliente pendiente: {exc}")
             return None
 
     def save_pending_usuario(self, usuario, contrasena, id_rol, id_cliente, id_empleado):
         """Guarda un nuevo usuario pendiente en la tabla Usuario."""
         try:
-            conn = self.connect()
+            conn = self._get_connection()
             if conn is None:
                 return None
             cursor = conn.cursor()
@@ -202,10 +433,10 @@ class SQLiteManager:
             conn.commit()
             usuario_id = cursor.lastrowid
             cursor.close()
-            conn.close()
             print(f"[SQLiteManager] Usuario pendiente guardado: {usuario}.")
             return usuario_id
         except sqlite3.Error as exc:
+            conn.rollback()
             print(f"[SQLiteManager] Error guardando usuario pendiente: {exc}")
             return None
 
@@ -1,8 +1,12 @@
 import os
+import re
+import sys
 import json
 import logging
 import threading
 import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from dotenv import load_dotenv
 
 try:
@@ -11,15 +15,132 @@ except Exception:
     mysql = None
 
 from .sqlite_manager import SQLiteManager
+from .connection_pool import ConnectionPool, PooledConnection, PoolTimeoutError
+from .retry_compaction import compact_entries
+from .health_monitor import HealthMonitor
+from .circuit_breaker import CircuitBreaker
+from .local_sync import LocalSync, SYNC_TABLES, referenced_tables, tables_in_query
+from .query_cache import QueryCache
+
+_TABLE_RE = re.compile(
+    r"^\s*(?:INSERT\s+(?:OR\s+\w+\s+)?INTO|UPDATE|DELETE\s+FROM|REPLACE\s+INTO)\s+`?(\w+)`?",
+    re.IGNORECASE,
+)
+
+
+# Tables also written by the triggers of a table (cache invalidation)
+_TRIGGER_TABLES = {
+    "alquiler": ("ventas_diarias",),
+}
+
+
+def _table_from_query(query):
+    """Return the table written by ``query`` or an empty string."""
+    match = _TABLE_RE.match(query or "")
+    return match.group(1) if match else ""
+
+
+def _is_statement_error(exc):
+    """True for errors caused by the statement rather than the connection."""
+    if mysql is None:
+        return False
+    errors = getattr(mysql.connector, "errors", None)
+    kinds = tuple(
+        kind
+        for kind in (
+            getattr(errors, "ProgrammingError", None),
+            getattr(errors, "IntegrityError", None),
+            getattr(errors, "DataError", None),
+        )
+        if isinstance(kind, type)
+    )
+    return bool(kinds) and isinstance(exc, kinds)
+
+
+# How many secondaries must confirm a write before ``_write`` returns.
+# ``primary`` returns as soon as the primary commits, ``primary+1`` waits for
+# the first secondary and ``all`` waits for every secondary.
+WRITE_ACK_POLICIES = ("primary", "primary+1", "all")
+
+# Which remote serves a SELECT. ``primary`` always tries remote1 first,
+# ``round_robin`` alternates, ``least_latency`` prefers the remote with the
+# lowest measured read latency and ``sticky`` keeps the manager on the remote
+# it was first given.
+READ_POLICIES = ("primary", "round_robin", "least_latency", "sticky")
+
+# MySQL error "This command is not supported in the prepared statement protocol"
+_ER_UNSUPPORTED_PS = 1295
+
+# Latency samples older than this are re-measured by ``least_latency``
+_LATENCY_SAMPLE_TTL = 30.0
+
+# Reference tables served from the SQLite mirror while their copy is fresh.
+# ``DB_LOCAL_TABLES`` replaces this list (comma separated, empty = none).
+LOCAL_READ_TABLES = (
+    "Rol", "Tipo_documento", "Codigo_postal", "Estado_vehiculo",
+    "Marca_vehiculo", "Color_vehiculo", "Tipo_vehiculo", "Blindaje_vehiculo",
+    "Transmision_vehiculo", "Cilindraje_vehiculo", "Tipo_empleado",
+    "Medio_pago", "Estado_alquiler", "Categoria_licencia",
+    "Taller_mantenimiento", "Tipo_mantenimiento", "Sucursal",
+)
+
+# Tables whose SELECT results are cached (``DB_CACHE_TTL`` seconds). Other
+# tables are not cached unless ``DB_CACHE_TABLE_TTLS`` ("Tabla=segundos,...")
+# gives them a TTL.
+CACHED_TABLES = LOCAL_READ_TABLES + (
+    "Seguro_alquiler", "Descuento_alquiler", "Seguro_vehiculo", "Proveedor_vehiculo",
+)
+
+
+class ReadPlan:
+    """How one SELECT is served; built by :meth:`TripleDBManager.plan_read`.
+
+    ``cached`` holds the rows of a cache hit. Otherwise the caller reads
+    SQLite first if ``local`` is set, then the remotes of :meth:`remotes` in
+    order, then SQLite as a fallback, and passes the rows and their source
+    (``"local"``, the remote's name or ``"sqlite"``) to :meth:`finish`. Both
+    ``TripleDBManager.select`` and ``AsyncTripleDBManager.select`` follow it.
+    """
+
+    def __init__(self, db, cached=None, key=None, tables=(), generation=None, local=False):
+        self._db = db
+        self.cached = cached
+        self.local = local
+        self._key = key
+        self._tables = tables
+        self._generation = generation
+
+    def remotes(self):
+        """Remotes to try, most preferred first (read policy, read-your-writes)."""
+        return self._db._read_order()
+
+    def finish(self, rows, source):
+        """Record where the read was served, cache ``rows`` and return them."""
+        db = self._db
+        with db._read_lock:
+            if source == "local":
+                db._read_stats["sqlite"]["local_first"] += 1
+            elif source == "sqlite":
+                db._read_stats["sqlite"]["reads"] += 1
+            elif db.read_policy == "sticky":
+                db._sticky = source
+        if self._key is not None and source != "sqlite":
+            # A SQLite fallback may miss writes the remotes have: never cached
+            db.cache.put(self._key, self._tables, rows, self._generation)
+        return rows
 
 
 class TripleDBManager:
     """Synchronize two remote MySQL databases and a local SQLite instance.
 
     The manager replicates every write across the three databases and keeps a
-    queue of failed operations to retry automatically. A background thread can
-    be started to periodically check connectivity and flush the queue every
-    ``DB_WORKER_INTERVAL`` minutes (20 by default).
+    queue of failed operations to retry automatically. Writes commit on the
+    primary first and are then fanned out to the secondaries concurrently;
+    ``DB_WRITE_ACK`` selects how many of them must confirm before returning.
+    Connectivity is tracked by a single :class:`HealthMonitor` (``health``)
+    that views subscribe to. A background worker flushes the queue every
+    ``DB_WORKER_INTERVAL`` minutes (20 by default) and whenever a remote
+    comes back online.
 
     Example
     -------
@@ -41,19 +162,126 @@ class TripleDBManager:
         # Each item is (row_id, target, query, params) where row_id references
         # the entry persisted in the SQLite retry_queue table.
         self.pending = []  # [(id, target, query, params)]
-        self.remote1_active = False
-        self.remote2_active = False
+        self._pending_lock = threading.Lock()
+        # SQL text -> retry_statements.id, so repeated statements are stored once
+        self._statement_ids = {}
+        self._statement_lock = threading.Lock()
+        # Shared connectivity monitor: the only code that probes the remotes
+        # periodically. Views subscribe to it instead of pinging.
+        self.health = HealthMonitor(
+            {
+                "remote1": lambda: self._check_remote(self._pool1),
+                "remote2": lambda: self._check_remote(self._pool2),
+            },
+            interval=float(os.getenv("DB_HEALTH_INTERVAL", "5")),
+            max_backoff=float(os.getenv("DB_HEALTH_MAX_BACKOFF", "60")),
+        )
+        # Read-path circuit breakers: a remote that keeps failing is skipped
+        # by ``select`` until its cooldown expires
+        breaker_opts = {
+            "failure_threshold": int(os.getenv("DB_BREAKER_FAILURES", "3")),
+            "cooldown": float(os.getenv("DB_BREAKER_COOLDOWN", "30")),
+            "half_open_max": int(os.getenv("DB_BREAKER_HALF_OPEN_MAX", "1")),
+        }
+        self._breakers = {
+            name: CircuitBreaker(name, **breaker_opts) for name in ("remote1", "remote2")
+        }
+        self.health.add_listener(self._on_health_change)
+        self.health.add_periodic(self.sqlite.maybe_checkpoint)
+        self.health.add_periodic(self._refresh_local_tables_if_due)
         self._thread = None
         self._stop_event = threading.Event()
-        self.stop_monitoring = threading.Event()
-        self.connection_monitor_thread = None
-        self.previous_remote1_state = None
-        self.previous_remote2_state = None
+        self._worker_wakeup = threading.Event()
         # Interval between connection checks in seconds. Can be overridden with
         # the ``DB_WORKER_INTERVAL`` environment variable (minutes).
         minutes = int(os.getenv("DB_WORKER_INTERVAL", "20"))
         self._interval = minutes * 60
 
+        # Bounded connection pools so queries reuse MySQL sessions instead of
+        # paying a TCP + auth handshake on every statement.
+        pool_opts = {
+            "size": int(os.getenv("DB_POOL_SIZE", "5")),
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", "5")),
+            "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+            "health_check_interval": float(os.getenv("DB_POOL_HEALTH_CHECK", "30")),
+            "statement_cache_size": int(os.getenv("DB_STMT_CACHE_SIZE", "32")),
+        }
+        self._pool1 = ConnectionPool(
+            "remote1", lambda: self._open_mysql(self._config_remote1()), **pool_opts
+        )
+        self._pool2 = ConnectionPool(
+            "remote2", lambda: self._open_mysql(self._config_remote2()), **pool_opts
+        )
+
+        # One single-threaded executor per secondary keeps writes ordered on
+        # each target while the targets themselves run in parallel.
+        self.write_ack = os.getenv("DB_WRITE_ACK", "all").strip().lower()
+        if self.write_ack not in WRITE_ACK_POLICIES:
+            self.logger.warning("Unknown DB_WRITE_ACK %r, using 'all'", self.write_ack)
+            self.write_ack = "all"
+        self.read_policy = os.getenv("DB_READ_POLICY", "primary").strip().lower()
+        if self.read_policy not in READ_POLICIES:
+            self.logger.warning("Unknown DB_READ_POLICY %r, using 'primary'", self.read_policy)
+            self.read_policy = "primary"
+        # Seconds the application keeps reading from the database that took
+        # its last write, so it never reads a replica that has not caught up
+        # yet. Tracked per manager: views reload on QueryExecutor workers, not
+        # on the thread that wrote
+        self._read_your_writes = float(os.getenv("DB_READ_YOUR_WRITES", "5"))
+        self._last_write = None
+        self._sticky = None
+        self._read_lock = threading.Lock()
+        self._read_counter = 0
+        self._read_stats = {
+            name: {"reads": 0, "latency_ms": None, "sampled_at": 0.0}
+            for name in ("remote1", "remote2")
+        }
+        self._read_stats["sqlite"] = {"reads": 0, "local_first": 0}
+
+        # Local-first routing: table -> served from SQLite while the local
+        # copy is younger than DB_LOCAL_MAX_STALENESS seconds
+        synced = {spec[0].lower(): spec[0] for spec in SYNC_TABLES}
+        names = os.getenv("DB_LOCAL_TABLES")
+        names = LOCAL_READ_TABLES if names is None else [n.strip() for n in names.split(",") if n.strip()]
+        self.local_tables = {synced[n.lower()] for n in names if n.lower() in synced}
+        self._local_max_staleness = float(os.getenv("DB_LOCAL_MAX_STALENESS", "600"))
+        self._local_sync = LocalSync(self.sqlite)
+        self._local_synced_at = self._load_local_sync_times()
+        self._local_refresh_thread = None
+        self._local_refresh_lock = threading.Lock()
+        # Seconds a local read waits for its table during the startup sync
+        self._startup_sync_wait = float(os.getenv("STARTUP_SYNC_WAIT", "5"))
+        self._local_sync.add_listener(self._on_local_table_synced)
+
+        # SELECT result cache, invalidated by every write to a table
+        table_ttls = {name: float(os.getenv("DB_CACHE_TTL", "300")) for name in CACHED_TABLES}
+        for item in os.getenv("DB_CACHE_TABLE_TTLS", "").split(","):
+            name, _, ttl = item.partition("=")
+            if name.strip() and ttl.strip():
+                table_ttls[name.strip()] = float(ttl)
+        self.cache = QueryCache(
+            max_entries=int(os.getenv("DB_CACHE_MAX_ENTRIES", "512")),
+            max_bytes=int(os.getenv("DB_CACHE_MAX_BYTES", str(8 * 1024 * 1024))),
+            table_ttls=table_ttls,
+        )
+        # Statements replayed per transaction by retry_pending
+        self._retry_batch_size = max(1, int(os.getenv("DB_RETRY_BATCH_SIZE", "200")))
+        # Drop queued writes superseded by later ones before replaying them
+        self._retry_compact = os.getenv("DB_RETRY_COMPACT", "1") != "0"
+        # SQL the server refused to prepare; executed with plain cursors
+        self._unpreparable = set()
+        # Writes the remotes acknowledged that SQLite has not applied yet, per
+        # table ("" = table unknown). Local reads of those tables are neither
+        # preferred nor cached until the replica catches up
+        self._local_lag = {}
+        self._local_lag_lock = threading.Lock()
+        for entry in self.iter_retry_queue(target="sqlite"):
+            self._mark_local_lag(entry["operation"], 1)
+        self._replicators = {
+            target: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"replicate-{target}")
+            for target in ("remote2", "sqlite")
+        }
+
         self._start_connection_monitoring()
 
     def update_maintenance_states(self):
@@ -73,6 +301,22 @@ class TripleDBManager:
     # ------------------------------------------------------------------
     # Public helpers
     # ------------------------------------------------------------------
+    @property
+    def remote1_active(self):
+        return self.health.is_online("remote1")
+
+    @remote1_active.setter
+    def remote1_active(self, value):
+        self.health.report("remote1", value)
+
+    @property
+    def remote2_active(self):
+        return self.health.is_online("remote2")
+
+    @remote2_active.setter
+    def remote2_active(self, value):
+        self.health.report("remote2", value)
+
     def is_remote1_active(self):
         """Return True if the primary remote database is reachable."""
         return self.remote1_active
@@ -104,67 +348,88 @@ class TripleDBManager:
             'connection_timeout': 3,
         }
 
+    def _open_mysql(self, config):
+        conn = mysql.connector.connect(**config)
+        conn.autocommit = True
+        return conn
+
     def connect_remote1(self):
+        """Check out a pooled connection to remote1 (``close()`` releases it)."""
         if mysql is None:
             self.remote1_active = False
             return None
         try:
-            conn = mysql.connector.connect(**self._config_remote1())
-            conn.autocommit = True
+            conn = self._pool1.acquire()
             self.remote1_active = True
             return conn
+        except PoolTimeoutError as exc:
+            # The server is fine, every connection is simply busy.
+            self.logger.warning("Remote1 pool exhausted: %s", exc)
+            return None
         except Exception as exc:
             self.logger.error("Remote1 connection failed: %s", exc)
             self.remote1_active = False
             return None
 
     def connect_remote2(self):
+        """Check out a pooled connection to remote2 (``close()`` releases it)."""
         if mysql is None:
             self.remote2_active = False
             return None
         try:
-            conn = mysql.connector.connect(**self._config_remote2())
-            conn.autocommit = True
+            conn = self._pool2.acquire()
             self.remote2_active = True
             return conn
+        except PoolTimeoutError as exc:
+            self.logger.warning("Remote2 pool exhausted: %s", exc)
+            return None
         except Exception as exc:
             self.logger.error("Remote2 connection failed: %s", exc)
             self.remote2_active = False
             return None
 
-    def ping_remote1(self):
-        """Attempt a quick connection to remote1 to update its status."""
+    def get_pool_stats(self):
+        """Return usage counters (in use, idle, waits, created...) per remote."""
+        return {
+            "remote1": self._pool1.stats(),
+            "remote2": self._pool2.stats(),
+        }
+
+    def get_breaker_stats(self):
+        """Return circuit state and short-circuited reads per remote."""
+        return {name: breaker.stats() for name, breaker in self._breakers.items()}
+
+    def _check_remote(self, pool):
+        """Cheap liveness check used by :attr:`health`.
+
+        Reuses an idle pooled connection and pings it; a new connection is
+        only opened when the pool has none (e.g. while the server is down).
+        """
         if mysql is None:
-            self.remote1_active = False
             return False
-        config = self._config_remote1().copy()
-        config["connection_timeout"] = 2
         try:
-            conn = mysql.connector.connect(**config)
-            conn.close()
-            self.remote1_active = True
+            conn = pool.acquire(timeout=1)
+        except PoolTimeoutError:
+            # Every connection is busy running queries: the server is up
             return True
-        except Exception as exc:
-            self.remote1_active = False
-            self.logger.error("Remote1 ping failed: %s", exc)
+        try:
+            if conn.raw.is_connected():
+                return True
+            conn.invalidate()
             return False
-
-    def ping_remote2(self):
-        """Attempt a quick connection to remote2 to update its status."""
-        if mysql is None:
-            self.remote2_active = False
+        except Exception:
+            conn.invalidate()
             return False
-        config = self._config_remote2().copy()
-        config["connection_timeout"] = 2
-        try:
-            conn = mysql.connector.connect(**config)
+        finally:
             conn.close()
-            self.remote2_active = True
-            return True
-        except Exception as exc:
-            self.remote2_active = False
-            self.logger.error("Remote2 ping failed: %s", exc)
-            return False
+
+    def ping_remote1(self):
+        """Check remote1 now and update its status."""
+        return self.health.check("remote1")
+
+    def ping_remote2(self):
+        """Check remote2 now and update its status."""
+        return self.health.check("remote2")
 
     def ping_remotes(self):
         """Check connectivity to both remote databases."""
@@ -175,116 +440,189 @@ class TripleDBManager:
     # Connection monitoring helpers
     # ------------------------------------------------------------------
     def _start_connection_monitoring(self):
-        """Launch the background thread that checks connection changes."""
-        if self.connection_monitor_thread and self.connection_monitor_thread.is_alive():
-            return
-        self.stop_monitoring.clear()
-        self.connection_monitor_thread = threading.Thread(
-            target=self._connection_monitor_loop,
-            daemon=True,
-        )
-        self.connection_monitor_thread.start()
-
-    def _connection_monitor_loop(self):
-        while not self.stop_monitoring.is_set():
-            try:
-                self.ping_remote1()
-                self.ping_remote2()
-                self._check_connection_changes()
-            except Exception as exc:  # pragma: no cover - just log
-                self.connection_logger.error("Monitor error: %s", exc)
-            self.stop_monitoring.wait(5)
-
-    def _check_connection_changes(self):
-        """Log whenever the connection state of a remote changes."""
-        if self.remote1_active != self.previous_remote1_state:
-            state = "online" if self.remote1_active else "offline"
-            log = (
-                self.connection_logger.info
-                if self.remote1_active
-                else self.connection_logger.warning
-            )
-            log("Remote1 is %s", state)
-            self.previous_remote1_state = self.remote1_active
-
-        if self.remote2_active != self.previous_remote2_state:
-            state = "online" if self.remote2_active else "offline"
-            log = (
-                self.connection_logger.info
-                if self.remote2_active
-                else self.connection_logger.warning
-            )
-            log("Remote2 is %s", state)
-            self.previous_remote2_state = self.remote2_active
+        """Launch the shared health monitor thread."""
+        self.health.start()
+
+    def _on_health_change(self, name, online):
+        """Log state changes, update the breakers and flush the queue on recovery."""
+        label = "Remote1" if name == "remote1" else "Remote2"
+        if online:
+            self.connection_logger.info("%s is online", label)
+            self._breakers[name].reset()
+            # Let the worker replay queued writes right away
+            self._worker_wakeup.set()
+        else:
+            self.connection_logger.warning("%s is offline", label)
+            # A failed connect or health check is conclusive: stop reading
+            # from it without waiting for more failures
+            self._breakers[name].trip()
 
     # ------------------------------------------------------------------
     # Internal execution
     # ------------------------------------------------------------------
     def _exec_mysql(self, conn, query, params=None, fetch=True, last=False):
-        cursor = conn.cursor()
-        cursor.execute(query, params or ())
-        if last:
-            last_id = cursor.lastrowid
-            cursor.close()
+        """Run ``query`` on a pooled connection and release it afterwards.
+
+        Parametrized statements use a server-side prepared statement cached
+        on the connection (``DB_STMT_CACHE_SIZE``), so repeated queries are
+        parsed once per connection. Connections that raise are discarded
+        instead of being returned to the pool, since their session state is
+        unknown.
+        """
+        # mysql-connector re-prepares unless the SQL is the same object it
+        # last executed; interning makes equal strings from any caller match
+        query = sys.intern(query)
+        try:
+            cursor, cached = self._statement_cursor(conn, query, params)
+            try:
+                try:
+                    cursor.execute(query, params or ())
+                except Exception as exc:
+                    if not cached or getattr(exc, "errno", None) != _ER_UNSUPPORTED_PS:
+                        raise
+                    # Not preparable: remember it and run it as a plain query
+                    conn.forget_statement(query)
+                    self._unpreparable.add(query)
+                    cursor, cached = conn.cursor(), False
+                    cursor.execute(query, params or ())
+                if last:
+                    return cursor.lastrowid
+                if fetch:
+                    return cursor.fetchall()
+                conn.commit()
+                return None
+            finally:
+                if not cached:
+                    cursor.close()
+        except Exception:
+            if hasattr(conn, "invalidate"):
+                conn.invalidate()
+            raise
+        finally:
             conn.close()
-            return last_id
-        if fetch:
-            result = cursor.fetchall()
-        else:
-            conn.commit()
-            result = None
-        cursor.close()
-        conn.close()
-        return result
 
-    def _exec_sqlite(self, query, params=None, fetch=True, last=False):
+    def _statement_cursor(self, conn, query, params):
+        """Return ``(cursor, cached)``; cached cursors must stay open."""
+        if (
+            params
+            and isinstance(conn, PooledConnection)
+            and conn._pool.statement_cache_size > 0
+            and query not in self._unpreparable
+        ):
+            cursor, _reused = conn.prepared_cursor(query)
+            return cursor, True
+        return conn.cursor(), False
+
+    def _exec_sqlite(self, query, params=None, fetch=True, last=False, raise_errors=False):
         query = query.replace('%s', '?')
         return self.sqlite.execute_query(
-            query, params, fetch=fetch, return_lastrowid=last
+            query, params, fetch=fetch, return_lastrowid=last, raise_errors=raise_errors
         )
 
     def _enqueue(self, target, query, params):
         """Add a failed operation to the in-memory and persistent queues."""
-        payload = json.dumps(params)
-        insert_q = (
-            "INSERT INTO retry_queue (operation, table_name, payload, target, created_at) "
-            "VALUES (?, ?, ?, ?, datetime('now'))"
-        )
-        row_id = self.sqlite.execute_query(
-            insert_q, (query, "", payload, target), fetch=False, return_lastrowid=True
+        row_id = self._insert_retry_entry(
+            query, _table_from_query(query), params, target
         )
-        self.pending.append((row_id, target, query, params))
+        with self._pending_lock:
+            self.pending.append((row_id, target, query, params))
 
     # ------------------------------------------------------------------
     # Retry queue helpers
     # ------------------------------------------------------------------
+    def _insert_retry_entry(self, sql_text, table_name, payload, target):
+        """Persist a queue row referencing the interned ``sql_text``."""
+        data = json.dumps(payload, separators=(",", ":"), default=str)
+        with self._statement_lock:
+            statement_id = self._statement_ids.get(sql_text)
+            if statement_id is None:
+                self.sqlite.execute_query(
+                    "INSERT OR IGNORE INTO retry_statements (sql_text) VALUES (?)",
+                    (sql_text,),
+                    fetch=False,
+                )
+                rows = self.sqlite.execute_query(
+                    "SELECT id FROM retry_statements WHERE sql_text = ?", (sql_text,)
+                )
+                statement_id = rows[0][0] if rows else None
+                if statement_id is not None:
+                    self._statement_ids[sql_text] = statement_id
+            return self.sqlite.execute_query(
+                "INSERT INTO retry_queue "
+                "(operation, table_name, payload, target, statement_id, created_at) "
+                "VALUES (?, ?, ?, ?, ?, datetime('now'))",
+                # Keep the text inline only if interning failed
+                (None if statement_id else sql_text, table_name, data, target, statement_id),
+                fetch=False,
+                return_lastrowid=True,
+            )
+
+    def _purge_unused_statements(self):
+        """Drop interned statements no longer referenced by the queue."""
+        with self._statement_lock:
+            self.sqlite.execute_query(
+                "DELETE FROM retry_statements WHERE id NOT IN "
+                "(SELECT statement_id FROM retry_queue WHERE statement_id IS NOT NULL)",
+                fetch=False,
+            )
+            self._statement_ids.clear()
+
     def enqueue_failed_operation(self, operation, table_name, payload, target):
         """Store a failed write operation in the SQLite retry queue."""
-        data = json.dumps(payload)
-        query = (
-            "INSERT INTO retry_queue (operation, table_name, payload, target, created_at) "
-            "VALUES (?, ?, ?, ?, datetime('now'))"
-        )
-        self.sqlite.execute_query(query, (operation, table_name, data, target), fetch=False)
+        self._insert_retry_entry(operation, table_name, payload, target)
 
-    def fetch_retry_queue(self):
-        """Return all pending retry entries as a list of dictionaries."""
-        rows = self.sqlite.execute_query(
-            "SELECT id, operation, table_name, payload, target FROM retry_queue ORDER BY id"
-        ) or []
-        result = []
-        for row in rows:
-            payload = json.loads(row[3]) if row[3] else None
-            result.append(
-                {
+    def pending_count(self, target=None):
+        """Return how many operations are queued, for one target or in total.
+
+        Reads the trigger-maintained ``retry_queue_counts`` table, so the cost
+        does not grow with the queue.
+        """
+        if target is None:
+            rows = self.sqlite.execute_query(
+                "SELECT COALESCE(SUM(pending), 0) FROM retry_queue_counts"
+            )
+        else:
+            rows = self.sqlite.execute_query(
+                "SELECT pending FROM retry_queue_counts WHERE target = ?", (target,)
+            )
+        return rows[0][0] if rows else 0
+
+    def iter_retry_queue(self, target=None, page_size=500):
+        """Yield pending retry entries as dictionaries, one page at a time.
+
+        Uses keyset pagination on ``id`` so each page is an index range scan
+        instead of loading and decoding the whole queue.
+        """
+        last_id = 0
+        while True:
+            query = (
+                "SELECT q.id, COALESCE(s.sql_text, q.operation), q.table_name, "
+                "q.payload, q.target "
+                "FROM retry_queue q LEFT JOIN retry_statements s ON s.id = q.statement_id "
+                "WHERE q.id > ?"
+            )
+            params = [last_id]
+            if target is not None:
+                query += " AND q.target = ?"
+                params.append(target)
+            query += " ORDER BY q.id LIMIT ?"
+            params.append(page_size)
+            rows = self.sqlite.execute_query(query, tuple(params)) or []
+            for row in rows:
+                yield {
                     "id": row[0],
                     "operation": row[1],
                     "table_name": row[2],
-                    "payload": payload,
+                    "payload": json.loads(row[3]) if row[3] else None,
                     "target": row[4],
                 }
-            )
-        return result
+            if len(rows) < page_size:
+                return
+            last_id = rows[-1][0]
+
+    def fetch_retry_queue(self):
+        """Return all pending retry entries as a list of dictionaries."""
+        return list(self.iter_retry_queue())
 
     def delete_retry_entry(self, entry_id):
         """Remove an entry from the retry queue."""
@@ -292,6 +630,18 @@ class TripleDBManager:
             "DELETE FROM retry_queue WHERE id = ?", (entry_id,), fetch=False
         )
 
+    def delete_retry_entries(self, entry_ids):
+        """Remove several entries from the retry queue in bulk."""
+        entry_ids = list(entry_ids)
+        for start in range(0, len(entry_ids), 500):
+            chunk = entry_ids[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            self.sqlite.execute_query(
+                f"DELETE FROM retry_queue WHERE id IN ({placeholders})",
+                tuple(chunk),
+                fetch=False,
+            )
+
     # ------------------------------------------------------------------
     # CRUD public API
     # ------------------------------------------------------------------
@@ -305,29 +655,428 @@ class TripleDBManager:
         return self._write(query, params, last=False)
 
     def select(self, query, params=None):
-        # Try remote1 -> remote2 -> sqlite
-        if self.remote1_active or self.remote1_active is False:
-            conn = self.connect_remote1()
-            if conn:
-                try:
-                    return self._exec_mysql(conn, query, params, fetch=True)
-                except Exception as exc:  # pragma: no cover - network errors
-                    self.logger.error("Select remote1 failed: %s", exc)
-                    self.remote1_active = False
-        conn2 = self.connect_remote2()
-        if conn2:
-            try:
-                return self._exec_mysql(conn2, query, params, fetch=True)
-            except Exception as exc:  # pragma: no cover - network errors
-                self.logger.error("Select remote2 failed: %s", exc)
-                self.remote2_active = False
+        plan = self.plan_read(query, params)
+        if plan.cached is not None:
+            return plan.cached
+        if plan.local:
+            rows = self._read_sqlite(query, params)
+            if rows is not None:
+                return plan.finish(rows, "local")
+        # Remotes in the order given by the read policy, then SQLite; remotes
+        # whose circuit is open are skipped
+        connect = {"remote1": self.connect_remote1, "remote2": self.connect_remote2}
+        for name in plan.remotes():
+            found, rows = self._select_remote(name, connect[name], query, params)
+            if found:
+                return plan.finish(rows, name)
         # Fallback to SQLite
+        return plan.finish(self._read_sqlite(query, params), "sqlite")
+
+    def plan_read(self, query, params=None):
+        """Look ``query`` up in the cache and decide where to read it from.
+
+        Returns a :class:`ReadPlan`; the generation is taken before the
+        local-first check so a write racing with the read cannot get stale
+        rows cached.
+        """
+        key = None
+        tables = referenced_tables(query) if self.cache.enabled else []
+        if tables and self.cache.ttl_for(tables) > 0:
+            key = self.cache.make_key(query, params)
+            try:
+                hash(key)
+            except TypeError:
+                key = None
+        generation = None
+        if key is not None:
+            rows = self.cache.get(key)
+            if rows is not None:
+                return ReadPlan(self, cached=rows)
+            generation = self.cache.generation(tables)
+        return ReadPlan(self, None, key, tables, generation, self._serve_locally(query))
+
+    def select_remote(self, query, params=None):
+        """Run ``query`` on a remote only, bypassing the cache and SQLite.
+
+        For reads the local copy cannot answer (e.g. full history loads).
+        Raises ``ConnectionError`` when no remote answers.
+        """
+        connect = {"remote1": self.connect_remote1, "remote2": self.connect_remote2}
+        for name in self._read_order():
+            found, rows = self._select_remote(name, connect[name], query, params)
+            if found:
+                return rows
+        raise ConnectionError("No remote database answered the query")
+
+    def _read_sqlite(self, query, params=None):
+        """Read SQLite once the running sync has copied the tables involved."""
+        self._wait_for_local_tables(query)
         return self._exec_sqlite(query, params, fetch=True)
 
+    def get_cache_stats(self):
+        """Return hit/miss counters and size of the query result cache."""
+        return self.cache.stats()
+
+    # ------------------------------------------------------------------
+    # Read routing
+    # ------------------------------------------------------------------
+    def _note_write(self, target):
+        """Remember where the last write landed (read-your-writes)."""
+        with self._read_lock:
+            self._last_write = (target, time.monotonic())
+
+    def _read_order(self):
+        """Return the remotes to try for a read, most preferred first."""
+        remotes = ["remote1", "remote2"]
+        with self._read_lock:
+            last_write = self._last_write
+        if last_write and time.monotonic() - last_write[1] < self._read_your_writes:
+            target = last_write[0]
+            if target == "sqlite":
+                # Only the local copy has the last write
+                return []
+            return [target] + [name for name in remotes if name != target]
+
+        if self.read_policy == "round_robin":
+            with self._read_lock:
+                self._read_counter += 1
+                first = self._read_counter % 2
+            remotes = remotes[first:] + remotes[:first]
+        elif self.read_policy == "least_latency":
+            now = time.monotonic()
+
+            def expected(name):
+                stats = self._read_stats[name]
+                if stats["latency_ms"] is None or now - stats["sampled_at"] > _LATENCY_SAMPLE_TTL:
+                    # Unknown or stale: measure it again
+                    return -1.0
+                return stats["latency_ms"]
+
+            with self._read_lock:
+                remotes.sort(key=expected)
+        elif self.read_policy == "sticky":
+            with self._read_lock:
+                if self._sticky is None:
+                    self._read_counter += 1
+                    self._sticky = remotes[self._read_counter % 2]
+                sticky = self._sticky
+            remotes.sort(key=lambda name: name != sticky)
+        return remotes
+
+    def _record_read(self, name, elapsed):
+        with self._read_lock:
+            stats = self._read_stats[name]
+            stats["reads"] += 1
+            ms = elapsed * 1000.0
+            # Exponentially weighted average so one slow query does not flip
+            # the routing on its own
+            if stats["latency_ms"] is None:
+                stats["latency_ms"] = ms
+            else:
+                stats["latency_ms"] = 0.8 * stats["latency_ms"] + 0.2 * ms
+            stats["sampled_at"] = time.monotonic()
+
+    def get_read_stats(self):
+        """Return the read policy and reads/latency served by each database."""
+        with self._read_lock:
+            data = {"policy": self.read_policy}
+            for name, stats in self._read_stats.items():
+                data[name] = {
+                    key: (round(value, 2) if key == "latency_ms" and value is not None else value)
+                    for key, value in stats.items()
+                    if key != "sampled_at"
+                }
+            return data
+
+    # ------------------------------------------------------------------
+    # Local-first reads
+    # ------------------------------------------------------------------
+    def _load_local_sync_times(self):
+        """Return ``{table: epoch seconds}`` of the last copy from a remote."""
+        times = {}
+        try:
+            rows = self.sqlite.execute_query(
+                "SELECT table_name, synced_at FROM sync_watermark", fetch=True
+            ) or []
+        except Exception as exc:
+            self.logger.warning("Could not read sync_watermark: %s", exc)
+            return times
+        for table, synced_at in rows:
+            try:
+                stamp = datetime.datetime.fromisoformat(synced_at)
+            except (TypeError, ValueError):
+                continue
+            times[table] = stamp.replace(tzinfo=datetime.timezone.utc).timestamp()
+        return times
+
+    def _stale_local_tables(self, tables=None):
+        now = time.time()
+        return [
+            name for name in (self.local_tables if tables is None else tables)
+            if now - self._local_synced_at.get(name, 0.0) > self._local_max_staleness
+        ]
+
+    def _serve_locally(self, query):
+        """True if every table read by ``query`` has a fresh local copy."""
+        if not self.local_tables:
+            return False
+        tables = referenced_tables(query)
+        if not tables:
+            return False
+        by_name = {name.lower(): name for name in self.local_tables}
+        resolved = [by_name.get(name.lower()) for name in tables]
+        if None in resolved:
+            return False
+        with self._read_lock:
+            last_write = self._last_write
+        if (
+            last_write and last_write[0] != "sqlite"
+            and time.monotonic() - last_write[1] < self._read_your_writes
+        ):
+            # The local replica of the last write may still be queued
+            return False
+        if self._local_lagging(resolved):
+            # An acknowledged write has not reached the local copy yet
+            return False
+        stale = self._stale_local_tables(resolved)
+        if stale:
+            self.refresh_local_tables(stale, wait=False)
+            return False
+        return True
+
+    def _open_sync_remote(self):
+        """Dedicated (non-pooled) connection for the local sync.
+
+        The sync streams unbuffered cursors for minutes at a time: a pooled
+        connection would hold a pool slot for the whole run, and a fetch
+        interrupted midway would hand a connection with unread rows back to
+        the pool. ``close()`` on this one really closes the socket.
+        """
+        if mysql is None:
+            raise ConnectionError("mysql-connector is not installed")
+        configs = (("remote1", self._config_remote1), ("remote2", self._config_remote2))
+        for name, config in configs:
+            if self._breakers[name].state == "open":
+                continue
+            try:
+                return self._open_mysql(config())
+            except Exception as exc:
+                self.logger.warning("Sync connection to %s failed: %s", name, exc)
+        raise ConnectionError("No remote database available to refresh local tables")
+
+    def refresh_local_tables(self, tables=None, wait=True):
+        """Copy ``tables`` (default: every local-first table) into SQLite.
+
+        With ``wait=False`` the copy runs on a background thread and the call
+        returns immediately; a refresh already in progress is not repeated.
+        """
+        tables = sorted(self.local_tables if tables is None else tables)
+        if not tables:
+            return {}
+        if not wait:
+            with self._local_refresh_lock:
+                thread = self._local_refresh_thread
+                if thread is not None and thread.is_alive():
+                    return None
+                self._local_refresh_thread = threading.Thread(
+                    target=self.refresh_local_tables, args=(tables,),
+                    name="local-refresh", daemon=True,
+                )
+                self._local_refresh_thread.start()
+            return None
+        try:
+            # Reference tables are small: copy them whole (so edits to
+            # existing rows arrive too) over one connection
+            specs = [spec for spec in SYNC_TABLES if spec[0] in tables]
+            stats = self._local_sync.sync(
+                self._open_sync_remote, full=True, tables=specs, workers=1
+            )
+        except Exception as exc:
+            self.logger.warning("Local refresh of %s failed: %s", ", ".join(tables), exc)
+            return {}
+        # _on_local_table_synced already stamped and invalidated each table
+        return stats
+
+    # ------------------------------------------------------------------
+    # Startup sync
+    # ------------------------------------------------------------------
+    def start_background_sync(self):
+        """Copy the remote data into SQLite on a daemon thread.
+
+        Used by ``STARTUP_MODE=background`` so the login window shows at once.
+        Local reads of a table not copied yet wait for it (see
+        :meth:`_wait_for_local_tables`); progress is reported to the
+        callbacks registered with :meth:`add_sync_listener`.
+        """
+        return self._local_sync.start_background(
+            self._open_sync_remote, on_error=self._on_startup_sync_error
+        )
+
+    def _on_startup_sync_error(self, exc):
+        # The health monitor decides whether the remotes are offline
+        self.logger.warning("Startup sync could not reach a remote: %s", exc)
+
+    def add_sync_listener(self, callback):
+        """Register ``callback(table, done, total, stats)`` for sync progress."""
+        self._local_sync.add_listener(callback)
+
+    def remove_sync_listener(self, callback):
+        self._local_sync.remove_listener(callback)
+
+    def is_syncing(self):
+        """Return True while a sync run is copying tables."""
+        return self._local_sync.running
+
+    def sync_progress(self):
+        """``(done, total)`` tables of the current or last sync run."""
+        return self._local_sync.progress
+
+    def _on_local_table_synced(self, table, done, total, stats):
+        if table is not None and "error" not in stats:
+            self._local_synced_at[table] = time.time()
+            self.cache.invalidate(table)
+
+    def _wait_for_local_tables(self, query):
+        """Give the running sync a chance to copy the tables ``query`` reads.
+
+        On timeout the query simply runs against the existing local copy.
+        """
+        tables = tables_in_query(query)
+        if tables and not self._local_sync.wait_for_tables(tables, self._startup_sync_wait):
+            self.logger.info("Tables %s still syncing; using the existing local copy", tables)
+
+    def _refresh_local_tables_if_due(self):
+        """Periodic task: refresh local-first tables before they go stale."""
+        if not (self.remote1_active or self.remote2_active):
+            return
+        now = time.time()
+        due = [
+            name for name in self.local_tables
+            if now - self._local_synced_at.get(name, 0.0) > self._local_max_staleness / 2
+        ]
+        if due:
+            self.refresh_local_tables(due, wait=False)
+
+    def _select_remote(self, name, connect, query, params):
+        """Run a read on ``name`` through its breaker; return ``(ok, rows)``."""
+        breaker = self._breakers[name]
+        if not breaker.allow():
+            return False, None
+        conn = connect()
+        if not conn:
+            if self.health.is_online(name):
+                # Busy pool: the server is fine
+                breaker.reset()
+            else:
+                breaker.record_failure()
+            return False, None
+        started = time.monotonic()
+        try:
+            rows = self._exec_mysql(conn, query, params, fetch=True)
+        except Exception as exc:  # pragma: no cover - network errors
+            self.logger.error("Select %s failed: %s", name, exc)
+            if _is_statement_error(exc):
+                # The query itself is wrong; the server answered
+                breaker.record_success()
+            else:
+                breaker.record_failure()
+                # Let the monitor confirm instead of assuming the server is down
+                self.health.check_now(name)
+            return False, None
+        breaker.record_success()
+        self._record_read(name, time.monotonic() - started)
+        return True, rows
+
     # ------------------------------------------------------------------
     # Write with triple replication
     # ------------------------------------------------------------------
+    def _replicate_remote2(self, query, params):
+        conn2 = self.connect_remote2()
+        if not conn2:
+            # queue if remote2 could not connect
+            self._enqueue('remote2', query, params)
+            return False
+        try:
+            self._exec_mysql(conn2, query, params, fetch=False, last=False)
+            return True
+        except Exception as exc:  # pragma: no cover - network errors
+            self.logger.error("Replicate to remote2 failed: %s", exc)
+            self.remote2_active = False
+            self._enqueue('remote2', query, params)
+            return False
+
+    def _replicate_sqlite(self, query, params):
+        try:
+            self._exec_sqlite(query, params, fetch=False, last=False, raise_errors=True)
+            self._mark_local_lag(query, -1)
+            return True
+        except Exception as exc:  # pragma: no cover - local disk errors
+            self.logger.error("Replicate to SQLite failed: %s", exc)
+            # Replayed by the retry worker so the mirror does not drift
+            self._enqueue('sqlite', query, params)
+            return False
+
+    def _fan_out(self, query, params, targets):
+        """Replicate to ``targets`` concurrently and wait per ``write_ack``."""
+        tasks = {
+            "remote2": self._replicate_remote2,
+            "sqlite": self._replicate_sqlite,
+        }
+        if "sqlite" in targets:
+            # Before _write invalidates the cache, so no read in between can
+            # cache the local copy as current
+            self._mark_local_lag(query, 1)
+        futures = [
+            self._replicators[target].submit(tasks[target], query, params)
+            for target in targets
+        ]
+        needed = {"primary": 0, "primary+1": 1, "all": len(futures)}[self.write_ack]
+        acked = 0
+        pending = set(futures)
+        while pending and acked < needed:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            acked += sum(1 for f in done if not f.exception() and f.result())
+        return acked
+
     def _write(self, query, params, last):
+        try:
+            return self._write_replicated(query, params, last)
+        finally:
+            # After the write, so a read racing with it cannot cache old rows
+            self._invalidate_written(query)
+
+    def _mark_local_lag(self, query, delta):
+        """Count (``delta=1``) or settle (``-1``) a write SQLite still misses."""
+        table = _table_from_query(query).lower()
+        tables = (table,) + _TRIGGER_TABLES.get(table, ()) if table else ("",)
+        with self._local_lag_lock:
+            for name in tables:
+                count = self._local_lag.get(name, 0) + delta
+                if count > 0:
+                    self._local_lag[name] = count
+                else:
+                    self._local_lag.pop(name, None)
+
+    def _local_lagging(self, tables):
+        """True while SQLite misses an acknowledged write to any of ``tables``."""
+        with self._local_lag_lock:
+            if not self._local_lag:
+                return False
+            if "" in self._local_lag:
+                return True
+            return any(name.lower() in self._local_lag for name in tables)
+
+    def _invalidate_written(self, query):
+        """Drop cached results of the table ``query`` writes (and its rollups)."""
+        table = _table_from_query(query)
+        if table:
+            self.cache.invalidate(table)
+            for derived in _TRIGGER_TABLES.get(table.lower(), ()):
+                self.cache.invalidate(derived)
+        else:
+            self.cache.invalidate()
+
+    def _write_replicated(self, query, params, last):
         result = None
 
         conn1 = self.connect_remote1()
@@ -335,48 +1084,36 @@ class TripleDBManager:
             try:
                 # Execute on primary remote
                 result = self._exec_mysql(conn1, query, params, fetch=False, last=last)
-
-                # Replicate to secondary remote if available
-                conn2 = self.connect_remote2()
-                if conn2:
-                    try:
-                        self._exec_mysql(conn2, query, params, fetch=False, last=False)
-                    except Exception as exc:  # pragma: no cover - network errors
-                        self.logger.error("Replicate to remote2 failed: %s", exc)
-                        self.remote2_active = False
-                        self._enqueue('remote2', query, params)
-                else:
-                    # queue if remote2 could not connect
-                    self._enqueue('remote2', query, params)
-
-                # Always replicate locally when remote1 succeeds
-                self._exec_sqlite(query, params, fetch=False, last=False)
-                return result
-
             except Exception as exc:  # pragma: no cover - network errors
                 self.logger.error("Write remote1 failed: %s", exc)
                 self.remote1_active = False
                 # Fall through to try remote2
+            else:
+                self._note_write("remote1")
+                # Replicate to remote2 and locally in parallel
+                self._fan_out(query, params, ("remote2", "sqlite"))
+                return result
 
         conn2 = self.connect_remote2()
         if conn2:
             try:
                 # Execute on secondary remote
                 result = self._exec_mysql(conn2, query, params, fetch=False, last=last)
-
+            except Exception as exc:  # pragma: no cover - network errors
+                self.logger.error("Write remote2 failed: %s", exc)
+                self.remote2_active = False
+            else:
+                self._note_write("remote2")
                 # Queue operation for remote1 recovery
                 self._enqueue('remote1', query, params)
 
                 # Replicate locally as this write succeeded
-                self._exec_sqlite(query, params, fetch=False, last=False)
+                self._fan_out(query, params, ("sqlite",))
                 return result
 
-            except Exception as exc:  # pragma: no cover - network errors
-                self.logger.error("Write remote2 failed: %s", exc)
-                self.remote2_active = False
-
         # both remotes failed -> write locally and queue for later
         local_result = self._exec_sqlite(query, params, fetch=False, last=last)
+        self._note_write("sqlite")
         self._enqueue('remote1', query, params)
         self._enqueue('remote2', query, params)
         if last:
@@ -388,74 +1125,191 @@ class TripleDBManager:
     # Retry pending operations
     # ------------------------------------------------------------------
     def retry_pending(self):
-        """Attempt to replay queued operations on the remote servers."""
-        rows = self.sqlite.execute_query(
-            "SELECT id, operation, payload, target FROM retry_queue ORDER BY id"
-        ) or []
-
-        existing = {item[0] for item in self.pending if item[0] is not None}
+        """Replay queued operations on the remote servers.
+
+        Entries are grouped by target and sent over a single connection per
+        target in transactions of ``DB_RETRY_BATCH_SIZE`` statements.
+        Acknowledged entries are removed from ``retry_queue`` in bulk after
+        each committed batch. Writes superseded later in the queue are
+        coalesced first (see :mod:`src.retry_compaction`). Returns per-target
+        statistics (``replayed``, ``skipped``, ``coalesced``, ``failed``,
+        ``seconds``, ``ops_per_sec``).
+        """
+        with self._pending_lock:
+            in_memory = list(self.pending)
+            self.pending = []
+        existing = {item[0] for item in in_memory if item[0] is not None}
         entries = [
-            (row[0], row[3], row[1], json.loads(row[2]) if row[2] else None)
-            for row in rows
-            if row[0] not in existing
+            (entry["id"], entry["target"], entry["operation"], entry["payload"])
+            for entry in self.iter_retry_queue()
+            if entry["id"] not in existing
         ]
-        entries.extend(self.pending)
+        entries.extend(in_memory)
+
+        by_target = {}
+        for entry in entries:
+            by_target.setdefault(entry[1], []).append(entry)
 
+        stats = {}
         remaining = []
-        for row_id, target, query, params in entries:
+        for target, items in by_target.items():
+            stats[target], left = self._replay_target(target, items)
+            remaining.extend(left)
+        with self._pending_lock:
+            self.pending = remaining + self.pending
+        if entries:
+            self._purge_unused_statements()
+        return stats
+
+    def _replay_target(self, target, entries):
+        """Replay ``entries`` on ``target``; return ``(stats, not_replayed)``."""
+        started = time.monotonic()
+        stats = {"replayed": 0, "skipped": 0, "coalesced": 0, "failed": 0}
+        if target == "sqlite":
+            return self._replay_sqlite(entries, stats, started)
+        other_online = self.remote2_active if target == "remote1" else self.remote1_active
+
+        to_send = []
+        skipped_ids = []
+        for entry in entries:
+            row_id, _, query, params = entry
+            # Skip operations without updated_at when another server
+            # stayed online to avoid overwriting newer data.
+            has_updated = isinstance(params, dict) and "updated_at" in params
+            if not has_updated and other_online and "updated_at" not in query.lower():
+                stats["skipped"] += 1
+                if row_id:
+                    skipped_ids.append(row_id)
+                continue
+            to_send.append(entry)
+        self.delete_retry_entries(skipped_ids)
+
+        conn = None
+        if to_send:
             conn = self.connect_remote1() if target == "remote1" else self.connect_remote2()
-            if conn:
-                try:
-                    # Skip operations without updated_at when another server
-                    # stayed online to avoid overwriting newer data.
-                    has_updated = False
-                    if isinstance(params, dict):
-                        has_updated = "updated_at" in params
-                    other_online = (
-                        self.remote2_active if target == "remote1" else self.remote1_active
-                    )
-                    if (
-                        not has_updated
-                        and other_online
-                        and "updated_at" not in query.lower()
-                    ):
-                        if row_id:
-                            self.delete_retry_entry(row_id)
-                        continue
-                    self._exec_mysql(conn, query, params, fetch=False)
-                    if row_id:
-                        self.delete_retry_entry(row_id)
-                    continue
-                except Exception as exc:  # pragma: no cover - network errors
-                    self.logger.error("Retry %s failed: %s", target, exc)
-            remaining.append((row_id, target, query, params))
-        self.pending = remaining
+        if not conn:
+            stats["failed"] = len(to_send)
+            return self._finish_replay(target, stats, started), to_send
+
+        remaining = []
+        try:
+            if self._retry_compact and len(to_send) > 1:
+                kept, coalesced_ids = compact_entries(to_send)
+                stats["coalesced"] = len(to_send) - len(kept)
+                self.delete_retry_entries(coalesced_ids)
+                to_send = kept
+            for start in range(0, len(to_send), self._retry_batch_size):
+                batch = to_send[start:start + self._retry_batch_size]
+                done, failed, alive = self._replay_batch(conn, target, batch)
+                stats["replayed"] += len(done)
+                stats["failed"] += len(failed)
+                self.delete_retry_entries([row_id for row_id, *_ in done if row_id])
+                remaining.extend(failed)
+                if not alive:
+                    rest = to_send[start + len(batch):]
+                    stats["failed"] += len(rest)
+                    remaining.extend(rest)
+                    break
+        finally:
+            conn.close()
+        return self._finish_replay(target, stats, started), remaining
+
+    def _replay_sqlite(self, entries, stats, started):
+        """Reapply local replica writes that failed, in queue order."""
+        done, remaining = [], []
+        for index, entry in enumerate(entries):
+            _, _, query, params = entry
+            try:
+                self._exec_sqlite(query, params, fetch=False, raise_errors=True)
+            except Exception as exc:  # pragma: no cover - local disk errors
+                self.logger.error("Retry sqlite failed: %s", exc)
+                # Later writes to the mirror wait behind the failed one
+                remaining = entries[index:]
+                break
+            done.append(entry)
+        stats["replayed"] = len(done)
+        stats["failed"] = len(remaining)
+        self.delete_retry_entries([row_id for row_id, *_ in done if row_id])
+        for _, _, query, _ in done:
+            self._mark_local_lag(query, -1)
+        for query in {query for _, _, query, _ in done}:
+            self._invalidate_written(query)
+        return self._finish_replay("sqlite", stats, started), remaining
+
+    def _replay_batch(self, conn, target, batch):
+        """Send ``batch`` in one transaction.
+
+        If the transaction fails the batch is replayed statement by statement
+        so one bad entry does not block the rest. Returns ``(done, failed,
+        alive)`` where ``alive`` is False once the connection is lost.
+        """
+        cursor = conn.cursor()
+        try:
+            conn.start_transaction()
+            for _, _, query, params in batch:
+                cursor.execute(query, params or ())
+            conn.commit()
+            return batch, [], True
+        except Exception as exc:  # pragma: no cover - network errors
+            self.logger.warning("Retry batch on %s failed, isolating entries: %s", target, exc)
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+        finally:
+            cursor.close()
+
+        done, failed = [], []
+        for index, entry in enumerate(batch):
+            _, _, query, params = entry
+            cursor = conn.cursor()
+            try:
+                cursor.execute(query, params or ())
+                conn.commit()
+                done.append(entry)
+            except Exception as exc:  # pragma: no cover - network errors
+                self.logger.error("Retry %s failed: %s", target, exc)
+                failed.append(entry)
+                if not conn.is_connected():
+                    conn.invalidate()
+                    return done, failed + batch[index + 1:], False
+            finally:
+                cursor.close()
+        return done, failed, True
+
+    def _finish_replay(self, target, stats, started):
+        elapsed = time.monotonic() - started
+        stats["seconds"] = round(elapsed, 3)
+        stats["ops_per_sec"] = round(stats["replayed"] / elapsed, 1) if elapsed > 0 else 0.0
+        if stats["replayed"] or stats["failed"] or stats["coalesced"]:
+            self.logger.info(
+                "Retry %s: %d replayed, %d skipped, %d coalesced, %d failed in %.2fs (%.1f ops/s)",
+                target,
+                stats["replayed"],
+                stats["skipped"],
+                stats["coalesced"],
+                stats["failed"],
+                elapsed,
+                stats["ops_per_sec"],
+            )
+        return stats
 
     # ------------------------------------------------------------------
     # Background worker
     # ------------------------------------------------------------------
     def _worker_cycle(self):
-        prev1 = self.remote1_active
-        prev2 = self.remote2_active
-
-        conn1 = self.connect_remote1()
-        if conn1:
-            conn1.close()
-
-        conn2 = self.connect_remote2()
-        if conn2:
-            conn2.close()
-
-        recovered1 = not prev1 and self.remote1_active
-        recovered2 = not prev2 and self.remote2_active
-
-        if recovered1 or recovered2:
+        # Connectivity comes from the health monitor; no extra connects here
+        if not (self.remote1_active or self.remote2_active):
+            return
+        if self.pending or self.pending_count():
             self.retry_pending()
 
     def _worker_loop(self):
         while not self._stop_event.is_set():
             self._worker_cycle()
-            self._stop_event.wait(self._interval)
+            # Woken early by the health monitor when a remote comes back
+            self._worker_wakeup.wait(self._interval)
+            self._worker_wakeup.clear()
 
     def start_worker(self, interval_minutes=20):
         """Start the background synchronization thread.
@@ -463,8 +1317,8 @@ class TripleDBManager:
         Parameters
         ----------
         interval_minutes : int, optional
-            Frequency in minutes for connection checks and pending operation
-            retries. Defaults to 20 minutes.
+            Frequency in minutes for pending operation retries. Defaults to
+            20 minutes; the worker also runs as soon as a remote recovers.
         """
         self._interval = interval_minutes * 60
         if self._thread and self._thread.is_alive():
@@ -475,16 +1329,24 @@ class TripleDBManager:
 
     def stop_worker(self):
         """Stop the background synchronization thread."""
-        if self.connection_monitor_thread:
-            self.stop_monitoring.set()
-            self.connection_monitor_thread.join()
-            self.connection_monitor_thread = None
+        self.health.stop()
         if not self._thread:
             return
         self._stop_event.set()
+        self._worker_wakeup.set()
         self._thread.join()
         self._thread = None
 
+    def close(self):
+        """Stop background threads and close every pooled connection."""
+        self.stop_worker()
+        # Let queued replications finish before the pools go away
+        for executor in self._replicators.values():
+            executor.shutdown(wait=True)
+        self._pool1.close_all()
+        self._pool2.close_all()
+        self.sqlite.close()
+
     # ------------------------------------------------------------------
     # Compatibility helpers
     # ------------------------------------------------------------------
@@ -498,13 +1360,17 @@ class TripleDBManager:
         return self.offline
 
     def connect(self):
-        """Return a connection to either remote server or the local SQLite."""
-        conn = self.connect_remote1()
-        if conn:
-            return conn
-        conn = self.connect_remote2()
-        if conn:
-            return conn
+        """Return a connection to either remote server or the local SQLite.
+
+        The caller owns the returned connection, so it is opened outside the
+        pools; code that forgets to close it cannot starve them.
+        """
+        if mysql is not None:
+            for config in (self._config_remote1(), self._config_remote2()):
+                try:
+                    return self._open_mysql(config)
+                except Exception as exc:
+                    self.logger.error("Direct connection failed: %s", exc)
         return self.sqlite.connect()
 
     def execute_query(self, query, params=None, fetch=True, return_lastrowid=False):
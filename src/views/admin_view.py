@@ -2,6 +2,7 @@ import os
 from PyQt5.QtWidgets import QMainWindow, QLabel, QMessageBox, QTableWidgetItem, QHeaderView
 from PyQt5.uic import loadUi
 import hashlib
+from src.views.query_executor import QueryExecutor, habilitar
 
 class AdminView(QMainWindow):
     def __init__(self, user_data, db_manager, on_logout):
@@ -11,6 +12,9 @@ class AdminView(QMainWindow):
         self.on_logout = on_logout
         self._gerente_sel = None
         self._sede_sel = None
+        self.sucursales_map = {}
+        # Las consultas de carga corren en segundo plano
+        self._queries = QueryExecutor.shared()
 
         # Cargar la interfaz de usuario desde el archivo .ui
         ui_path = os.path.join(os.path.dirname(__file__), '..', '..', 'ui', 'admin_view.ui')
@@ -42,21 +46,34 @@ class AdminView(QMainWindow):
         self._cargar_gerentes()
 
     def _cargar_sucursales_combo(self):
+        self._queries.query(
+            self, "sucursales", "SELECT id_sucursal, nombre FROM Sucursal",
+            on_result=self._mostrar_sucursales_combo,
+        )
+
+    def _mostrar_sucursales_combo(self, sucursales):
         self.sucursal_gerente_combo.clear()
-        sucursales = self.db_manager.execute_query("SELECT id_sucursal, nombre FROM Sucursal") or []
+        sucursales = sucursales or []
         self.sucursales_map = {s[1]: s[0] for s in sucursales}
         self.sucursal_gerente_combo.addItems(list(self.sucursales_map.keys()))
 
     def _cargar_gerentes(self):
-        self.gerentes_list.clear()
-        rows = self.db_manager.execute_query(
-            "SELECT id_empleado, nombre, correo, id_sucursal FROM Empleado WHERE cargo = 'Gerente'"
+        # El nombre de la sucursal viene en la consulta: no depende de que
+        # el combo de sucursales ya se haya cargado
+        self._queries.query(
+            self, "gerentes",
+            "SELECT e.id_empleado, e.nombre, e.correo, s.nombre "
+            "FROM Empleado e LEFT JOIN Sucursal s ON e.id_sucursal = s.id_sucursal "
+            "WHERE e.cargo = 'Gerente'",
+            on_result=self._mostrar_gerentes,
         )
+
+    def _mostrar_gerentes(self, rows):
+        self.gerentes_list.clear()
         if rows:
             for r in rows:
-                id_e, nombre, correo, id_sucursal = r
-                sucursal_nombre = next((name for name, id_s in self.sucursales_map.items() if id_s == id_sucursal), "Desconocida")
-                self.gerentes_list.addItem(f"{id_e} | {nombre} | {correo} | {sucursal_nombre}")
+                id_e, nombre, correo, sucursal_nombre = r
+                self.gerentes_list.addItem(f"{id_e} | {nombre} | {correo} | {sucursal_nombre or 'Desconocida'}")
 
     def _seleccionar_gerente(self):
         selected_items = self.gerentes_list.selectedItems()
@@ -64,22 +81,37 @@ class AdminView(QMainWindow):
             return
         
         selected_item = selected_items[0]
-        self._gerente_sel = int(selected_item.text().split("|")[0].strip())
-        row = self.db_manager.execute_query(
-            f"SELECT documento, nombre, telefono, correo, id_sucursal FROM Empleado WHERE id_empleado = %s",
-            (self._gerente_sel,),
+        id_gerente = int(selected_item.text().split("|")[0].strip())
+        # El id se asigna cuando llegan los datos: hasta entonces guardar o
+        # eliminar escribiría los campos del registro anterior sobre este id
+        self._gerente_sel = None
+        habilitar((self.guardar_gerente_button, self.eliminar_gerente_button), False)
+        self._queries.query(
+            self, "gerente_sel",
+            "SELECT documento, nombre, telefono, correo, id_sucursal FROM Empleado WHERE id_empleado = %s",
+            (id_gerente,),
+            on_result=lambda row: self._mostrar_gerente(id_gerente, row),
+            on_error=lambda e: QMessageBox.warning(self, "Aviso", f"No se pudo cargar el gerente: {e}"),
         )
-        if row:
-            doc, nom, tel, cor, id_sucursal = row[0]
-            self.doc_gerente_edit.setText(doc or "")
-            self.nombre_gerente_edit.setText(nom or "")
-            self.telefono_gerente_edit.setText(tel or "")
-            self.correo_gerente_edit.setText(cor or "")
-            sucursal_nombre = next((name for name, id_s in self.sucursales_map.items() if id_s == id_sucursal), "")
-            self.sucursal_gerente_combo.setCurrentText(sucursal_nombre)
+
+    def _mostrar_gerente(self, id_gerente, row):
+        if not row:
+            self._nuevo_gerente()
+            return
+        self._gerente_sel = id_gerente
+        doc, nom, tel, cor, id_sucursal = row[0]
+        self.doc_gerente_edit.setText(doc or "")
+        self.nombre_gerente_edit.setText(nom or "")
+        self.telefono_gerente_edit.setText(tel or "")
+        self.correo_gerente_edit.setText(cor or "")
+        sucursal_nombre = next((name for name, id_s in self.sucursales_map.items() if id_s == id_sucursal), "")
+        self.sucursal_gerente_combo.setCurrentText(sucursal_nombre)
+        habilitar((self.guardar_gerente_button, self.eliminar_gerente_button), True)
 
     def _nuevo_gerente(self):
+        self._queries.cancel(self, "gerente_sel")
         self._gerente_sel = None
+        habilitar((self.guardar_gerente_button, self.eliminar_gerente_button), True)
         self.doc_gerente_edit.clear()
         self.nombre_gerente_edit.clear()
         self.telefono_gerente_edit.clear()
@@ -140,8 +172,13 @@ class AdminView(QMainWindow):
         self._cargar_sedes()
 
     def _cargar_sedes(self):
+        self._queries.query(
+            self, "sedes", "SELECT id_sucursal, nombre, direccion, telefono FROM Sucursal",
+            on_result=self._mostrar_sedes,
+        )
+
+    def _mostrar_sedes(self, rows):
         self.sedes_list.clear()
-        rows = self.db_manager.execute_query("SELECT id_sucursal, nombre, direccion, telefono FROM Sucursal") or []
         if rows:
             for r in rows:
                 self.sedes_list.addItem(f"{r[0]} | {r[1]} | {r[2]} | {r[3]}")
@@ -152,21 +189,36 @@ class AdminView(QMainWindow):
             return
         
         selected_item = selected_items[0]
-        self._sede_sel = int(selected_item.text().split("|")[0].strip())
-        row = self.db_manager.execute_query(
-            f"SELECT nombre, direccion, telefono, gerente, id_codigo_postal FROM Sucursal WHERE id_sucursal = %s",
-            (self._sede_sel,),
+        id_sede = int(selected_item.text().split("|")[0].strip())
+        # El id se asigna cuando llegan los datos: hasta entonces guardar o
+        # eliminar escribiría los campos del registro anterior sobre este id
+        self._sede_sel = None
+        habilitar((self.guardar_sede_button, self.eliminar_sede_button), False)
+        self._queries.query(
+            self, "sede_sel",
+            "SELECT nombre, direccion, telefono, gerente, id_codigo_postal FROM Sucursal WHERE id_sucursal = %s",
+            (id_sede,),
+            on_result=lambda row: self._mostrar_sede(id_sede, row),
+            on_error=lambda e: QMessageBox.warning(self, "Aviso", f"No se pudo cargar la sede: {e}"),
         )
-        if row:
-            nombre, direccion, telefono, gerente, id_codigo_postal = row[0]
-            self.nombre_sede_edit.setText(nombre or "")
-            self.direccion_sede_edit.setText(direccion or "")
-            self.telefono_sede_edit.setText(telefono or "")
-            self.gerente_sede_edit.setText(gerente or "")
-            self.codigo_postal_sede_edit.setText(str(id_codigo_postal) or "")
+
+    def _mostrar_sede(self, id_sede, row):
+        if not row:
+            self._nuevo_sede()
+            return
+        self._sede_sel = id_sede
+        nombre, direccion, telefono, gerente, id_codigo_postal = row[0]
+        self.nombre_sede_edit.setText(nombre or "")
+        self.direccion_sede_edit.setText(direccion or "")
+        self.telefono_sede_edit.setText(telefono or "")
+        self.gerente_sede_edit.setText(gerente or "")
+        self.codigo_postal_sede_edit.setText(str(id_codigo_postal) or "")
+        habilitar((self.guardar_sede_button, self.eliminar_sede_button), True)
 
     def _nuevo_sede(self):
+        self._queries.cancel(self, "sede_sel")
         self._sede_sel = None
+        habilitar((self.guardar_sede_button, self.eliminar_sede_button), True)
         self.nombre_sede_edit.clear()
         self.direccion_sede_edit.clear()
         self.telefono_sede_edit.clear()
@@ -231,8 +283,8 @@ class AdminView(QMainWindow):
         self.status_remota1_label.setText(f"BD Remota 1: {status1}")
         self.status_remota2_label.setText(f"BD Remota 2: {status2}")
 
-        pending_ops = self.db_manager.fetch_retry_queue()
-        self.operaciones_pendientes_label.setText(f"Operaciones Pendientes: {len(pending_ops)}")
+        pending_ops = self.db_manager.pending_count()
+        self.operaciones_pendientes_label.setText(f"Operaciones Pendientes: {pending_ops}")
 
     def _forzar_sincronizacion(self):
         try:
@@ -259,27 +311,11 @@ class AdminView(QMainWindow):
 
             # Ejecutar la consulta
             if query.lower().startswith("select"):
-                rows, headers = self.db_manager.execute_query_with_headers(query)
-                
-                self.sql_results_table.setRowCount(0) # Clear existing rows
-                self.sql_results_table.setColumnCount(0) # Clear existing columns
-
-                if headers:
-                    self.sql_results_table.setColumnCount(len(headers))
-                    self.sql_results_table.setHorizontalHeaderLabels(headers)
-                    # Auto-resize columns to content and stretch last section
-                    self.sql_results_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
-                    self.sql_results_table.horizontalHeader().setStretchLastSection(True)
-                
-                if rows:
-                    self.sql_results_table.setRowCount(len(rows))
-                    for i, row_data in enumerate(rows):
-                        for j, item in enumerate(row_data):
-                            self.sql_results_table.setItem(i, j, QTableWidgetItem(str(item)))
-                else:
-                    QMessageBox.information(self, "Resultado", "Consulta SELECT ejecutada, no se encontraron resultados.")
-                    # Clear headers if no rows to ensure a clean state
-                    self.sql_results_table.setColumnCount(0)
+                self._queries.query(
+                    self, "sql_libre", query, headers=True,
+                    on_result=self._mostrar_resultado_sql,
+                    on_error=lambda e: QMessageBox.critical(self, "Error", f"Error al ejecutar SQL: {e}"),
+                )
             else:
                 # Para INSERT, UPDATE, DELETE, etc.
                 self.db_manager.execute_query(query, fetch=False)
@@ -288,6 +324,29 @@ class AdminView(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error al ejecutar SQL: {e}")
 
+    def _mostrar_resultado_sql(self, result):
+        rows, headers = result
+
+        self.sql_results_table.setRowCount(0) # Clear existing rows
+        self.sql_results_table.setColumnCount(0) # Clear existing columns
+
+        if headers:
+            self.sql_results_table.setColumnCount(len(headers))
+            self.sql_results_table.setHorizontalHeaderLabels(headers)
+            # Auto-resize columns to content and stretch last section
+            self.sql_results_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+            self.sql_results_table.horizontalHeader().setStretchLastSection(True)
+
+        if rows:
+            self.sql_results_table.setRowCount(len(rows))
+            for i, row_data in enumerate(rows):
+                for j, item in enumerate(row_data):
+                    self.sql_results_table.setItem(i, j, QTableWidgetItem(str(item)))
+        else:
+            QMessageBox.information(self, "Resultado", "Consulta SELECT ejecutada, no se encontraron resultados.")
+            # Clear headers if no rows to ensure a clean state
+            self.sql_results_table.setColumnCount(0)
+
     def _setup_cambiar_contrasena_tab(self):
         self.cambiar_pass_button.clicked.connect(self._cambiar_contrasena)
 
@@ -331,6 +390,7 @@ class AdminView(QMainWindow):
         self.status_label2.setText(f"BD Remota 2: {status2}")
 
     def logout(self):
+        self._queries.cancel(self)
         self.close()
         self.on_logout()
 
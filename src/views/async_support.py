@@ -0,0 +1,114 @@
+"""qasync integration so views can ``await`` database calls.
+
+``install_event_loop(app)`` makes the Qt event loop the asyncio loop, and
+``async_slot`` turns a coroutine method into a Qt slot:
+
+    from src.views.async_support import async_slot
+
+    class ClienteView(QWidget):
+        @async_slot()
+        async def _cargar_reservas_cliente(self):
+            rows = await self.async_db.select(query, params)
+            ...
+
+The window keeps repainting while the query runs. ``qasync`` is optional;
+without it :func:`install_event_loop` returns None and views should keep
+using the synchronous manager (or :class:`QueryExecutor`).
+
+``main.py`` installs the loop, registers the application's
+:class:`AsyncTripleDBManager` with :func:`set_async_db` and runs the GUI
+with :func:`run_event_loop`; views read it with :func:`async_db`, which is
+None when qasync is not installed.
+"""
+
+import asyncio
+import logging
+
+try:
+    import qasync
+except Exception:  # pragma: no cover - optional dependency
+    qasync = None
+
+logger = logging.getLogger(__name__)
+
+# AsyncTripleDBManager shared by the views (None without qasync)
+_async_db = None
+
+
+def available():
+    """True when qasync is installed."""
+    return qasync is not None
+
+
+def install_event_loop(app):
+    """Run asyncio on top of the Qt event loop of ``app``; return the loop.
+
+    Returns None (and logs it) when qasync is not installed.
+    """
+    if qasync is None:
+        logger.info("qasync no está instalado; las vistas usarán consultas síncronas")
+        return None
+    loop = qasync.QEventLoop(app)
+    asyncio.set_event_loop(loop)
+    return loop
+
+
+def async_slot(*types):
+    """Decorator for coroutine slots (``qasync.asyncSlot`` when available).
+
+    Without qasync the coroutine is scheduled on the current asyncio loop,
+    so it only runs if some loop is driving it.
+    """
+    if qasync is not None:
+        return qasync.asyncSlot(*types)
+
+    def decorator(func):
+        def wrapper(*args, **kwargs):
+            return asyncio.ensure_future(func(*args, **kwargs))
+
+        wrapper.__name__ = func.__name__
+        wrapper.__doc__ = func.__doc__
+        return wrapper
+
+    return decorator
+
+
+def set_async_db(db):
+    """Register the application's :class:`AsyncTripleDBManager`."""
+    global _async_db
+    _async_db = db
+
+
+def async_db():
+    """The registered async manager, or None when views must stay synchronous."""
+    return _async_db
+
+
+def run_event_loop(app, loop):
+    """Run the GUI until it quits and return its exit code.
+
+    With a qasync ``loop`` the asyncio loop drives Qt; otherwise this is
+    ``app.exec_()``.
+    """
+    if loop is None:
+        return app.exec_()
+    with loop:
+        result = loop.run_forever()
+        close_async_db(loop)
+    return result
+
+
+def close_async_db(loop):
+    """Close the registered async manager (pools and worker threads)."""
+    global _async_db
+    db, _async_db = _async_db, None
+    if db is None or loop is None or loop.is_closed():
+        return
+    try:
+        if loop.is_running():
+            # Called from a slot: the loop finishes it while shutting down
+            asyncio.ensure_future(db.close())
+        else:
+            loop.run_until_complete(db.close())
+    except Exception as exc:  # pragma: no cover - cleanup errors
+        logger.error("Error cerrando AsyncTripleDBManager: %s", exc)
@@ -11,6 +11,8 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.uic import loadUi
 from PyQt5.QtCore import QDateTime, QTimer, Qt
+from src.views.query_executor import QueryExecutor
+from src.views.async_support import async_db, async_slot
 from datetime import datetime
 import hashlib
 
@@ -23,6 +25,13 @@ class ClienteView(QMainWindow):
         self.auth_manager = auth_manager
         self.on_logout = on_logout
         self._selected_reserva_id = None
+        self.vehiculos_data = []
+        self.seguros_data = []
+        # Las consultas de carga corren en segundo plano
+        self._queries = QueryExecutor.shared()
+        # Con qasync, las reservas se cargan con await sobre AsyncTripleDBManager
+        self._async_db = async_db()
+        self._reservas_token = 0
 
         ui_path = os.path.join(
             os.path.dirname(__file__), "..", "..", "ui", "client_view.ui"
@@ -36,9 +45,6 @@ class ClienteView(QMainWindow):
         self._setup_perfil_tab()
         self._setup_cambiar_contrasena_tab()
 
-        # Inicializar seguros_data para evitar AttributeError
-        self.seguros_data = []
-
     def _setup_ui(self):
         self.logout_button.clicked.connect(self.logout)
         self.update_connection_status()
@@ -61,7 +67,7 @@ class ClienteView(QMainWindow):
         self._cargar_seguros_disponibles()
         self._cargar_reservas_pendientes_abono()
         self._cargar_datos_perfil()
-        QMessageBox.information(self, "Recargar", "Datos recargados correctamente.")
+        QMessageBox.information(self, "Recargar", "Recarga de datos en curso.")
 
     def update_connection_status(self):
         status1 = "Online" if self.db_manager.is_remote1_active() else "Offline"
@@ -70,6 +76,8 @@ class ClienteView(QMainWindow):
         self.status_label2.setText(f"BD Remota 2: {status2}")
 
     def logout(self):
+        self._queries.cancel(self)
+        self._reservas_token += 1  # descarta una carga con await en curso
         self.close()
         self.on_logout()
 
@@ -96,7 +104,6 @@ class ClienteView(QMainWindow):
             self._selected_reserva_id = None
 
     def _cargar_reservas_cliente(self):
-        self.reservas_list.clear()
         id_cliente = self.user_data.get("id_cliente")
         query = (
             "SELECT ra.id_reserva, a.fecha_hora_salida, a.fecha_hora_entrada, a.id_vehiculo, v.modelo, v.placa, a.valor, ra.saldo_pendiente, ra.abono, es.descripcion "
@@ -108,8 +115,29 @@ class ClienteView(QMainWindow):
             "ORDER BY a.fecha_hora_salida DESC"
         )
         params = (id_cliente,)
-        reservas = self.db_manager.execute_query(query, params)
+        if self._async_db is not None:
+            self._cargar_reservas_cliente_async(query, params)
+            return
+        self._queries.query(
+            self, "reservas_cliente", query, params,
+            on_result=self._mostrar_reservas_cliente,
+        )
+
+    @async_slot()
+    async def _cargar_reservas_cliente_async(self, query, params):
+        # Solo la última carga pedida actualiza la lista
+        self._reservas_token += 1
+        token = self._reservas_token
+        try:
+            reservas = await self._async_db.execute_query(query, params)
+        except Exception as exc:
+            QMessageBox.warning(self, "Error", f"No se pudieron cargar las reservas: {exc}")
+            return
+        if token == self._reservas_token:
+            self._mostrar_reservas_cliente(reservas)
 
+    def _mostrar_reservas_cliente(self, reservas):
+        self.reservas_list.clear()
         if not reservas:
             self.reservas_list.addItem("No tienes reservas registradas")
             return
@@ -370,7 +398,6 @@ class ClienteView(QMainWindow):
         self.metodo_pago_combo.addItems(["Efectivo", "Tarjeta", "Transferencia"])
 
     def _cargar_vehiculos_disponibles(self):
-        self.vehiculo_combo.clear()
         id_sucursal = self.user_data.get("id_sucursal")
         query = (
             "SELECT v.placa, v.modelo, m.nombre_marca, t.descripcion, t.tarifa_dia "
@@ -384,23 +411,39 @@ class ClienteView(QMainWindow):
             query += f" AND v.id_sucursal = %s"
             params = (id_sucursal,)
 
-        self.vehiculos_data = self.db_manager.execute_query(query, params) or []
+        self._queries.query(
+            self, "vehiculos_disponibles", query, params,
+            on_result=self._mostrar_vehiculos_disponibles,
+        )
+
+    def _mostrar_vehiculos_disponibles(self, rows):
+        self.vehiculos_data = rows or []
+        # Evitar un recálculo por cada elemento agregado al combo
+        self.vehiculo_combo.blockSignals(True)
+        self.vehiculo_combo.clear()
         for v in self.vehiculos_data:
             self.vehiculo_combo.addItem(
                 f"{v[0]} - {v[1]} {v[2]} ({v[3]}) - ${v[4]:,.0f}/día"
             )
+        self.vehiculo_combo.blockSignals(False)
+        self._recalcular_total_reserva()
 
     def _cargar_seguros_disponibles(self):
+        self._queries.query(
+            self, "seguros_disponibles",
+            "SELECT id_seguro, descripcion, costo FROM Seguro_alquiler",
+            on_result=self._mostrar_seguros_disponibles,
+        )
+
+    def _mostrar_seguros_disponibles(self, rows):
+        self.seguros_data = rows or []
+        self.seguro_combo.blockSignals(True)
         self.seguro_combo.clear()
         self.seguro_combo.addItem("Ninguno")
-        self.seguros_data = (
-            self.db_manager.execute_query(
-                "SELECT id_seguro, descripcion, costo FROM Seguro_alquiler"
-            )
-            or []
-        )
         for s in self.seguros_data:
             self.seguro_combo.addItem(f"{s[1]} (${s[2]:,.0f})")
+        self.seguro_combo.blockSignals(False)
+        self._recalcular_total_reserva()
 
     def _obtener_descuento_activo(self, fecha_salida, fecha_entrada):
         query = (
@@ -413,6 +456,8 @@ class ClienteView(QMainWindow):
         return rows[0] if rows else (None, None, 0)
 
     def _recalcular_total_reserva(self):
+        # Un descuento pedido con datos anteriores ya no aplica
+        self._queries.cancel(self, "descuento")
         if not self.vehiculos_data:
             self.total_label.setText("Total: $0")
             self.abono_min_label.setText("Abono Mínimo (30%): $0")
@@ -463,10 +508,25 @@ class ClienteView(QMainWindow):
                 if seguro_info:
                     seguro_costo = float(seguro_info[2])
 
-            # Calcular descuento
-            id_descuento, desc_text, desc_val = self._obtener_descuento_activo(
-                fecha_salida, fecha_entrada
+            # El descuento se consulta en segundo plano; si el usuario sigue
+            # cambiando fechas solo se aplica la última consulta
+            subtotal = precio_base + seguro_costo
+            self._queries.submit(
+                self,
+                "descuento",
+                lambda: self._obtener_descuento_activo(fecha_salida, fecha_entrada),
+                on_result=lambda descuento: self._aplicar_total_reserva(
+                    subtotal, descuento
+                ),
+                on_error=self._limpiar_total_reserva,
             )
+
+        except Exception as e:
+            self._limpiar_total_reserva(e)
+
+    def _aplicar_total_reserva(self, subtotal, descuento):
+        try:
+            id_descuento, desc_text, desc_val = descuento
             if id_descuento:
                 self.descuento_label.setText(
                     f"Descuento Aplicado: {desc_text} (-${float(desc_val):,.0f})"
@@ -474,7 +534,7 @@ class ClienteView(QMainWindow):
             else:
                 self.descuento_label.setText("Descuento Aplicado: Ninguno")
 
-            total = precio_base + seguro_costo - float(desc_val)
+            total = subtotal - float(desc_val)
             if total < 0:
                 total = 0
 
@@ -484,10 +544,13 @@ class ClienteView(QMainWindow):
             self.abono_min_label.setText(f"Abono Mínimo (30%): ${abono_min:,.0f}")
 
         except Exception as e:
-            print(f"Error al recalcular total: {e}")
-            self.total_label.setText("Total: $0")
-            self.abono_min_label.setText("Abono Mínimo (30%): $0")
-            self.descuento_label.setText("Descuento Aplicado: Ninguno")
+            self._limpiar_total_reserva(e)
+
+    def _limpiar_total_reserva(self, error):
+        print(f"Error al recalcular total: {error}")
+        self.total_label.setText("Total: $0")
+        self.abono_min_label.setText("Abono Mínimo (30%): $0")
+        self.descuento_label.setText("Descuento Aplicado: Ninguno")
 
     def _guardar_reserva(self):
         try:
@@ -690,7 +753,6 @@ class ClienteView(QMainWindow):
             self._selected_reserva_id = None
 
     def _cargar_reservas_pendientes_abono(self):
-        self.abonos_reservas_list.clear()
         id_cliente = self.user_data.get("id_cliente")
         query = (
             "SELECT ra.id_reserva, v.modelo, v.placa, ra.saldo_pendiente, a.valor "
@@ -700,8 +762,13 @@ class ClienteView(QMainWindow):
             "WHERE a.id_cliente = %s AND ra.saldo_pendiente > 0 AND ra.id_estado_reserva IN (1,2) "
             "ORDER BY a.fecha_hora_salida DESC"
         )
-        reservas = self.db_manager.execute_query(query, (id_cliente,))
+        self._queries.query(
+            self, "reservas_abono", query, (id_cliente,),
+            on_result=self._mostrar_reservas_pendientes_abono,
+        )
 
+    def _mostrar_reservas_pendientes_abono(self, reservas):
+        self.abonos_reservas_list.clear()
         if not reservas:
             self.abonos_reservas_list.addItem("No tienes reservas pendientes de pago.")
             return
@@ -817,7 +884,9 @@ class ClienteView(QMainWindow):
     def _cargar_datos_perfil(self):
         id_cliente = self.user_data.get("id_cliente")
         query = "SELECT nombre, telefono, direccion, correo FROM Cliente WHERE id_cliente = %s"
-        datos = self.db_manager.execute_query(query, (id_cliente,))
+        self._queries.query(self, "perfil", query, (id_cliente,), on_result=self._mostrar_datos_perfil)
+
+    def _mostrar_datos_perfil(self, datos):
         if datos:
             nombre, telefono, direccion, correo = datos[0]
             self.nombre_perfil_edit.setText(nombre or "")
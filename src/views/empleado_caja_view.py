@@ -3,6 +3,7 @@ import hashlib
 from PyQt5.QtWidgets import QMainWindow, QLabel, QMessageBox, QVBoxLayout, QWidget
 from PyQt5.uic import loadUi
 from datetime import datetime
+from src.views.query_executor import QueryExecutor
 
 class EmpleadoCajaView(QMainWindow):
     def __init__(self, user_data, db_manager, auth_manager, on_logout):
@@ -13,6 +14,9 @@ class EmpleadoCajaView(QMainWindow):
         self.on_logout = on_logout
         self._reserva_efectivo_sel = None
         self._transacciones_dia = []
+        self.tipos_documento_map = {}
+        # Las consultas de carga corren en segundo plano
+        self._queries = QueryExecutor.shared()
 
         # Cargar la interfaz de usuario desde el archivo .ui
         ui_path = os.path.join(os.path.dirname(__file__), '..', '..', 'ui', 'empleado_caja_view.ui')
@@ -109,13 +113,11 @@ class EmpleadoCajaView(QMainWindow):
 
         self.monto_edit.clear()
         self._cargar_reservas_pendientes_efectivo()
-        self._transacciones_dia = self._cargar_transacciones_dia()
-        self._actualizar_caja_dia()
+        self._cargar_transacciones_dia()
 
     def _setup_caja_dia_tab(self):
         self.cerrar_caja_button.clicked.connect(self._cerrar_caja)
-        self._transacciones_dia = self._cargar_transacciones_dia()
-        self._actualizar_caja_dia()
+        self._cargar_transacciones_dia()
 
     def _cargar_transacciones_dia(self):
         date_fn = "CURDATE()" if not self.db_manager.offline else "date('now')"
@@ -129,13 +131,15 @@ class EmpleadoCajaView(QMainWindow):
             "AND ab.id_medio_pago = 1 "
             f"AND a.id_sucursal = %s"
         )
-        return (
-            self.db_manager.execute_query(
-                query, (self.user_data.get("id_sucursal"),)
-            )
-            or []
+        self._queries.query(
+            self, "transacciones_dia", query, (self.user_data.get("id_sucursal"),),
+            on_result=self._mostrar_transacciones_dia,
         )
 
+    def _mostrar_transacciones_dia(self, rows):
+        self._transacciones_dia = rows or []
+        self._actualizar_caja_dia()
+
     def _actualizar_caja_dia(self):
         transacciones = getattr(self, "_transacciones_dia", [])
         total = sum(float(t[0]) for t in transacciones)
@@ -173,21 +177,32 @@ class EmpleadoCajaView(QMainWindow):
         self.update_profile_button.clicked.connect(self._update_personal_info)
         self.update_password_button.clicked.connect(self._update_password)
         self._cargar_datos_perfil()
-        self._cargar_tipos_documento()
 
     def _cargar_datos_perfil(self):
         id_usuario = self.user_data.get("id_usuario")
         id_empleado = self.user_data.get("id_empleado")
 
-        # Cargar datos del usuario (email)
-        query_usuario = "SELECT usuario FROM Usuario WHERE id_usuario = %s"
-        usuario_data = self.db_manager.execute_query(query_usuario, (id_usuario,))
+        # Una sola tarea: el combo de tipos debe estar lleno antes de
+        # seleccionar el tipo del empleado
+        def fetch():
+            tipos = self.db_manager.execute_query("SELECT id_tipo_documento, descripcion FROM Tipo_documento") or []
+            query_usuario = "SELECT usuario FROM Usuario WHERE id_usuario = %s"
+            usuario_data = self.db_manager.execute_query(query_usuario, (id_usuario,))
+            # Datos del empleado (nombre, documento, telefono, direccion, id_tipo_documento)
+            query_empleado = "SELECT documento, nombre, telefono, direccion, id_tipo_documento FROM Empleado WHERE id_empleado = %s"
+            empleado_data = self.db_manager.execute_query(query_empleado, (id_empleado,))
+            return tipos, usuario_data, empleado_data
+
+        self._queries.submit(self, "perfil", fetch, on_result=self._mostrar_datos_perfil)
+
+    def _mostrar_datos_perfil(self, result):
+        tipos, usuario_data, empleado_data = result
+        self._mostrar_tipos_documento(tipos)
+
+        # Datos del usuario (email)
         if usuario_data:
             self.email_lineEdit.setText(usuario_data[0][0] or "")
 
-        # Cargar datos del empleado (nombre, documento, telefono, direccion, id_tipo_documento)
-        query_empleado = "SELECT documento, nombre, telefono, direccion, id_tipo_documento FROM Empleado WHERE id_empleado = %s"
-        empleado_data = self.db_manager.execute_query(query_empleado, (id_empleado,))
         if empleado_data:
             documento, nombre, telefono, direccion, id_tipo_documento = empleado_data[0]
             self.documento_lineEdit.setText(documento or "")
@@ -196,15 +211,14 @@ class EmpleadoCajaView(QMainWindow):
             self.direccion_lineEdit.setText(direccion or "")
             
             # Set the correct type document in the combo box
-            if hasattr(self, 'tipos_documento_map') and id_tipo_documento is not None:
+            if id_tipo_documento is not None:
                 for desc, id_tipo in self.tipos_documento_map.items():
                     if id_tipo == id_tipo_documento:
                         self.tipo_documento_combo.setCurrentText(desc)
                         break
 
-    def _cargar_tipos_documento(self):
+    def _mostrar_tipos_documento(self, tipos):
         self.tipo_documento_combo.clear()
-        tipos = self.db_manager.execute_query("SELECT id_tipo_documento, descripcion FROM Tipo_documento") or []
         self.tipos_documento_map = {t[1]: t[0] for t in tipos}
         self.tipo_documento_combo.addItems(list(self.tipos_documento_map.keys()))
 
@@ -277,6 +291,7 @@ class EmpleadoCajaView(QMainWindow):
             QMessageBox.critical(self, "Error", f"Error al cambiar la contraseña: {e}")
 
     def logout(self):
+        self._queries.cancel(self)
         self.close()
         self.on_logout()
 
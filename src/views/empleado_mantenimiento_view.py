@@ -3,6 +3,7 @@ import hashlib
 from PyQt5.QtWidgets import QMainWindow, QMessageBox, QTableWidgetItem, QHeaderView, QWidget, QVBoxLayout, QComboBox, QTableWidget
 from PyQt5.uic import loadUi
 from PyQt5.QtCore import QDate
+from src.views.query_executor import QueryExecutor
 
 class EmpleadoMantenimientoView(QMainWindow):
     def __init__(self, user_data, db_manager, auth_manager, on_logout):
@@ -11,6 +12,9 @@ class EmpleadoMantenimientoView(QMainWindow):
         self.db_manager = db_manager
         self.auth_manager = auth_manager
         self.on_logout = on_logout
+        self.tipos_documento_map = {}
+        # Las consultas de carga corren en segundo plano
+        self._queries = QueryExecutor.shared()
 
         ui_path = os.path.join(os.path.dirname(__file__), '..', '..', 'ui', 'empleado_mantenimiento_view.ui')
         loadUi(ui_path, self)
@@ -45,7 +49,6 @@ class EmpleadoMantenimientoView(QMainWindow):
         self._cargar_vehiculos_disponibles()
 
     def _cargar_vehiculos_disponibles(self):
-        self.vehiculos_table.setRowCount(0) # Clear existing rows
         id_sucursal = self.user_data.get("id_sucursal")
         print(f"[DEBUG] _cargar_vehiculos_disponibles called. id_sucursal: {id_sucursal}")
         
@@ -70,8 +73,15 @@ class EmpleadoMantenimientoView(QMainWindow):
         """
         
         print(f"[DEBUG] Query for available vehicles: {query} with sucursal_id: {id_sucursal}")
-        rows, headers = self.db_manager.execute_query_with_headers(query, (id_sucursal,))
+        self._queries.query(
+            self, "vehiculos_disponibles", query, (id_sucursal,), headers=True,
+            on_result=self._mostrar_vehiculos_disponibles,
+        )
+
+    def _mostrar_vehiculos_disponibles(self, result):
+        rows, headers = result
         print(f"[DEBUG] Result of available vehicles query: {rows}")
+        self.vehiculos_table.setRowCount(0) # Clear existing rows
 
         if rows:
             self.vehiculos_table.setColumnCount(len(headers))
@@ -129,7 +139,6 @@ class EmpleadoMantenimientoView(QMainWindow):
         self._cargar_vehiculos_para_historial_combo()
 
     def _cargar_vehiculos_para_mantenimiento_combo(self):
-        self.vehiculo_mantenimiento_combo.clear()
         id_sucursal = self.user_data.get("id_sucursal")
         print(f"[DEBUG] _cargar_vehiculos_para_mantenimiento_combo called. id_sucursal: {id_sucursal}")
         
@@ -142,9 +151,14 @@ class EmpleadoMantenimientoView(QMainWindow):
             AND v.id_estado_vehiculo != 3 -- Asumiendo 3 es 'En Mantenimiento'
         """
         print(f"[DEBUG] Query for vehicles for maintenance combo: {query} with sucursal_id: {id_sucursal}")
-        vehiculos = self.db_manager.execute_query(query, (id_sucursal,))
+        self._queries.query(
+            self, "vehiculos_mantenimiento", query, (id_sucursal,),
+            on_result=self._mostrar_vehiculos_para_mantenimiento_combo,
+        )
+
+    def _mostrar_vehiculos_para_mantenimiento_combo(self, vehiculos):
         print(f"[DEBUG] Result of vehicles for maintenance combo query: {vehiculos}")
-        
+        self.vehiculo_mantenimiento_combo.clear()
         self.vehiculos_mantenimiento_map = {}
         if vehiculos:
             for placa, marca, modelo, _ in vehiculos:
@@ -156,25 +170,44 @@ class EmpleadoMantenimientoView(QMainWindow):
 
     def _cargar_tipos_mantenimiento(self):
         print("[DEBUG] _cargar_tipos_mantenimiento called.")
-        self.tipo_mantenimiento_combo.clear()
-        tipos = self.db_manager.execute_query("SELECT id_tipo, descripcion FROM Tipo_mantenimiento") or []
+        self._queries.query(
+            self, "tipos_mantenimiento", "SELECT id_tipo, descripcion FROM Tipo_mantenimiento",
+            on_result=self._mostrar_tipos_mantenimiento,
+        )
+
+    def _mostrar_tipos_mantenimiento(self, tipos):
         print(f"[DEBUG] Result of tipos mantenimiento query: {tipos}")
+        tipos = tipos or []
+        self.tipo_mantenimiento_combo.clear()
         self.tipos_mantenimiento_map = {t[1]: t[0] for t in tipos}
         self.tipo_mantenimiento_combo.addItems(list(self.tipos_mantenimiento_map.keys()))
 
     def _cargar_talleres(self):
         print("[DEBUG] _cargar_talleres called.")
-        self.taller_mantenimiento_combo.clear()
-        talleres = self.db_manager.execute_query("SELECT id_taller, nombre FROM Taller_mantenimiento") or []
+        self._queries.query(
+            self, "talleres", "SELECT id_taller, nombre FROM Taller_mantenimiento",
+            on_result=self._mostrar_talleres,
+        )
+
+    def _mostrar_talleres(self, talleres):
         print(f"[DEBUG] Result of talleres query: {talleres}")
+        talleres = talleres or []
+        self.taller_mantenimiento_combo.clear()
         self.talleres_mantenimiento_map = {t[1]: t[0] for t in talleres}
         self.taller_mantenimiento_combo.addItems(list(self.talleres_mantenimiento_map.keys()))
 
     def _cargar_mis_mantenimientos(self):
-        self.mis_mantenimientos_table.setRowCount(0)
         id_empleado = self.user_data.get("id_empleado")
         print(f"[DEBUG] _cargar_mis_mantenimientos called. id_empleado: {id_empleado}")
-        rows, headers = self.db_manager.get_mantenimientos_empleado(id_empleado)
+        self._queries.submit(
+            self, "mis_mantenimientos",
+            lambda: self.db_manager.get_mantenimientos_empleado(id_empleado),
+            on_result=self._mostrar_mis_mantenimientos,
+        )
+
+    def _mostrar_mis_mantenimientos(self, result):
+        rows, headers = result
+        self.mis_mantenimientos_table.setRowCount(0)
         print(f"[DEBUG] Result of mis mantenimientos query: Rows: {rows}, Headers: {headers}")
         if rows:
             self.mis_mantenimientos_table.setRowCount(len(rows))
@@ -186,9 +219,15 @@ class EmpleadoMantenimientoView(QMainWindow):
             self.mis_mantenimientos_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
 
     def _cargar_vehiculos_para_historial_combo(self):
-        self.historial_vehiculo_combo.clear()
         print("[DEBUG] _cargar_vehiculos_para_historial_combo called.")
-        vehiculos, _ = self.db_manager.get_all_vehiculos()
+        self._queries.submit(
+            self, "vehiculos_historial", self.db_manager.get_all_vehiculos,
+            on_result=self._mostrar_vehiculos_para_historial_combo,
+        )
+
+    def _mostrar_vehiculos_para_historial_combo(self, result):
+        vehiculos, _ = result
+        self.historial_vehiculo_combo.clear()
         print(f"[DEBUG] Result of get_all_vehiculos for historial combo: {vehiculos}")
         if vehiculos:
             for v in vehiculos:
@@ -202,21 +241,29 @@ class EmpleadoMantenimientoView(QMainWindow):
         placa = self.historial_vehiculo_combo.currentData()
         print(f"[DEBUG] _cargar_historial_mantenimientos called. Placa: {placa}")
         if placa:
-            rows, headers = self.db_manager.get_historial_mantenimientos_vehiculo(placa)
-            print(f"[DEBUG] Result of historial mantenimientos query: Rows: {rows}, Headers: {headers}")
-            if rows:
-                self.historial_mantenimientos_table.setRowCount(len(rows))
-                self.historial_mantenimientos_table.setColumnCount(len(headers))
-                self.historial_mantenimientos_table.setHorizontalHeaderLabels(headers)
-                for i, row in enumerate(rows):
-                    for j, col in enumerate(row):
-                        self.historial_mantenimientos_table.setItem(i, j, QTableWidgetItem(str(col)))
-                self.historial_mantenimientos_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-            else:
-                QMessageBox.information(self, "Historial de Mantenimientos", f"No hay mantenimientos registrados para el vehículo con placa {placa}.")
+            # Cambiar de vehículo descarta el historial pedido antes
+            self._queries.submit(
+                self, "historial",
+                lambda: self.db_manager.get_historial_mantenimientos_vehiculo(placa),
+                on_result=lambda result: self._mostrar_historial_mantenimientos(placa, *result),
+            )
         else:
+            self._queries.cancel(self, "historial")
             QMessageBox.information(self, "Historial de Mantenimientos", "Seleccione un vehículo para ver su historial.")
 
+    def _mostrar_historial_mantenimientos(self, placa, rows, headers):
+        print(f"[DEBUG] Result of historial mantenimientos query: Rows: {rows}, Headers: {headers}")
+        if rows:
+            self.historial_mantenimientos_table.setRowCount(len(rows))
+            self.historial_mantenimientos_table.setColumnCount(len(headers))
+            self.historial_mantenimientos_table.setHorizontalHeaderLabels(headers)
+            for i, row in enumerate(rows):
+                for j, col in enumerate(row):
+                    self.historial_mantenimientos_table.setItem(i, j, QTableWidgetItem(str(col)))
+            self.historial_mantenimientos_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        else:
+            QMessageBox.information(self, "Historial de Mantenimientos", f"No hay mantenimientos registrados para el vehículo con placa {placa}.")
+
     def _registrar_mantenimiento(self):
         selected_vehiculo_placa = self.vehiculo_mantenimiento_combo.currentData()
         fecha_fin = self.fecha_fin_mantenimiento_dateEdit.date().toString("yyyy-MM-dd")
@@ -286,23 +333,34 @@ class EmpleadoMantenimientoView(QMainWindow):
         self.update_profile_button.clicked.connect(self._update_personal_info)
         self.update_password_button.clicked.connect(self._update_password)
         self._cargar_datos_perfil()
-        self._cargar_tipos_documento()
 
     def _cargar_datos_perfil(self):
         id_usuario = self.user_data.get("id_usuario")
         id_empleado = self.user_data.get("id_empleado")
         print(f"[DEBUG] _cargar_datos_perfil called. id_usuario: {id_usuario}, id_empleado: {id_empleado}")
 
-        # Cargar datos del usuario (email)
-        query_usuario = "SELECT usuario FROM Usuario WHERE id_usuario = %s"
-        usuario_data = self.db_manager.execute_query(query_usuario, (id_usuario,))
+        # Una sola tarea: el combo de tipos debe estar lleno antes de
+        # seleccionar el tipo del empleado
+        def fetch():
+            tipos = self.db_manager.execute_query("SELECT id_tipo_documento, descripcion FROM Tipo_documento") or []
+            query_usuario = "SELECT usuario FROM Usuario WHERE id_usuario = %s"
+            usuario_data = self.db_manager.execute_query(query_usuario, (id_usuario,))
+            # Datos del empleado (nombre, documento, telefono, direccion, id_tipo_documento)
+            query_empleado = "SELECT documento, nombre, telefono, direccion, id_tipo_documento FROM Empleado WHERE id_empleado = %s"
+            empleado_data = self.db_manager.execute_query(query_empleado, (id_empleado,))
+            return tipos, usuario_data, empleado_data
+
+        self._queries.submit(self, "perfil", fetch, on_result=self._mostrar_datos_perfil)
+
+    def _mostrar_datos_perfil(self, result):
+        tipos, usuario_data, empleado_data = result
+        self._mostrar_tipos_documento(tipos)
+
+        # Datos del usuario (email)
         print(f"[DEBUG] Result of usuario query: {usuario_data}")
         if usuario_data:
             self.email_lineEdit.setText(usuario_data[0][0] or "")
 
-        # Cargar datos del empleado (nombre, documento, telefono, direccion, id_tipo_documento)
-        query_empleado = "SELECT documento, nombre, telefono, direccion, id_tipo_documento FROM Empleado WHERE id_empleado = %s"
-        empleado_data = self.db_manager.execute_query(query_empleado, (id_empleado,))
         print(f"[DEBUG] Result of empleado query: {empleado_data}")
         if empleado_data:
             documento, nombre, telefono, direccion, id_tipo_documento = empleado_data[0]
@@ -312,16 +370,14 @@ class EmpleadoMantenimientoView(QMainWindow):
             self.direccion_lineEdit.setText(direccion or "")
             
             # Set the correct type document in the combo box
-            if hasattr(self, 'tipos_documento_map') and id_tipo_documento is not None:
+            if id_tipo_documento is not None:
                 for desc, id_tipo in self.tipos_documento_map.items():
                     if id_tipo == id_tipo_documento:
                         self.tipo_documento_combo.setCurrentText(desc)
                         break
 
-    def _cargar_tipos_documento(self):
-        print("[DEBUG] _cargar_tipos_documento called.")
+    def _mostrar_tipos_documento(self, tipos):
         self.tipo_documento_combo.clear()
-        tipos = self.db_manager.execute_query("SELECT id_tipo_documento, descripcion FROM Tipo_documento") or []
         print(f"[DEBUG] Result of tipos documento query: {tipos}")
         self.tipos_documento_map = {t[1]: t[0] for t in tipos}
         self.tipo_documento_combo.addItems(list(self.tipos_documento_map.keys()))
@@ -423,6 +479,7 @@ class EmpleadoMantenimientoView(QMainWindow):
             QMessageBox.critical(self, "Error", f"Error al cambiar la contraseña: {e}")
 
     def logout(self):
+        self._queries.cancel(self)
         self.close()
         self.on_logout()
 
@@ -1,6 +1,7 @@
 import os
 from PyQt5.QtWidgets import QMainWindow, QLabel, QMessageBox, QTableWidgetItem, QHeaderView
 from PyQt5.uic import loadUi
+from src.views.query_executor import QueryExecutor, habilitar
 
 class EmpleadoVentasView(QMainWindow):
     def __init__(self, user_data, db_manager, auth_manager, on_logout):
@@ -11,6 +12,8 @@ class EmpleadoVentasView(QMainWindow):
         self.on_logout = on_logout
         self._cliente_sel = None
         self._selected_reserva_id = None
+        # Las consultas de carga corren en segundo plano
+        self._queries = QueryExecutor.shared()
 
         # Cargar la interfaz de usuario desde el archivo .ui
         ui_path = os.path.join(os.path.dirname(__file__), '..', '..', 'ui', 'empleado_ventas_view.ui')
@@ -40,10 +43,13 @@ class EmpleadoVentasView(QMainWindow):
         self._cargar_clientes()
 
     def _cargar_clientes(self):
-        self.clientes_list.clear()
-        rows = self.db_manager.execute_query(
-            "SELECT id_cliente, nombre, correo FROM Cliente"
+        self._queries.query(
+            self, "clientes", "SELECT id_cliente, nombre, correo FROM Cliente",
+            on_result=self._mostrar_clientes,
         )
+
+    def _mostrar_clientes(self, rows):
+        self.clientes_list.clear()
         if rows:
             for c in rows:
                 self.clientes_list.addItem(f"{c[0]} | {c[1]} | {c[2]}")
@@ -54,21 +60,36 @@ class EmpleadoVentasView(QMainWindow):
             return
         
         selected_item = selected_items[0]
-        self._cliente_sel = int(selected_item.text().split("|")[0].strip())
-        row = self.db_manager.execute_query(
-            f"SELECT documento, nombre, telefono, direccion, correo FROM Cliente WHERE id_cliente = %s",
-            (self._cliente_sel,),
+        id_cliente = int(selected_item.text().split("|")[0].strip())
+        # El id se asigna cuando llegan los datos: hasta entonces guardar o
+        # eliminar escribiría los campos del registro anterior sobre este id
+        self._cliente_sel = None
+        habilitar((self.guardar_cliente_button,), False)
+        self._queries.query(
+            self, "cliente_sel",
+            "SELECT documento, nombre, telefono, direccion, correo FROM Cliente WHERE id_cliente = %s",
+            (id_cliente,),
+            on_result=lambda row: self._mostrar_cliente(id_cliente, row),
+            on_error=lambda e: QMessageBox.warning(self, "Aviso", f"No se pudo cargar el cliente: {e}"),
         )
-        if row:
-            doc, nom, tel, dir_, cor = row[0]
-            self.doc_cliente_edit.setText(doc or "")
-            self.nombre_cliente_edit.setText(nom or "")
-            self.telefono_cliente_edit.setText(tel or "")
-            self.direccion_cliente_edit.setText(dir_ or "")
-            self.correo_cliente_edit.setText(cor or "")
+
+    def _mostrar_cliente(self, id_cliente, row):
+        if not row:
+            self._nuevo_cliente()
+            return
+        self._cliente_sel = id_cliente
+        doc, nom, tel, dir_, cor = row[0]
+        self.doc_cliente_edit.setText(doc or "")
+        self.nombre_cliente_edit.setText(nom or "")
+        self.telefono_cliente_edit.setText(tel or "")
+        self.direccion_cliente_edit.setText(dir_ or "")
+        self.correo_cliente_edit.setText(cor or "")
+        habilitar((self.guardar_cliente_button,), True)
 
     def _nuevo_cliente(self):
+        self._queries.cancel(self, "cliente_sel")
         self._cliente_sel = None
+        habilitar((self.guardar_cliente_button,), True)
         self.doc_cliente_edit.clear()
         self.nombre_cliente_edit.clear()
         self.telefono_cliente_edit.clear()
@@ -130,8 +151,14 @@ class EmpleadoVentasView(QMainWindow):
         self._cargar_vehiculos()
 
     def _cargar_vehiculos(self):
+        self._queries.submit(
+            self, "vehiculos", self.db_manager.get_all_vehiculos,
+            on_result=self._mostrar_vehiculos,
+        )
+
+    def _mostrar_vehiculos(self, result):
+        rows, headers = result
         self.vehiculos_table.setRowCount(0)
-        rows, headers = self.db_manager.get_all_vehiculos()
         if rows:
             self.vehiculos_table.setRowCount(len(rows))
             self.vehiculos_table.setColumnCount(len(headers))
@@ -155,7 +182,6 @@ class EmpleadoVentasView(QMainWindow):
             self._selected_reserva_id = None
 
     def _cargar_reservas_pendientes(self):
-        self.reservas_pendientes_list.clear()
         query = (
             "SELECT ra.id_reserva, c.nombre, v.placa, a.fecha_hora_salida, a.valor "
             "FROM Reserva_alquiler ra "
@@ -164,8 +190,14 @@ class EmpleadoVentasView(QMainWindow):
             "JOIN Vehiculo v ON a.id_vehiculo = v.placa "
             "WHERE ra.id_estado_reserva = 1 AND a.id_sucursal = %s"
         )
-        reservas = self.db_manager.execute_query(query, (self.user_data.get("id_sucursal"),)) or []
+        self._queries.query(
+            self, "reservas_pendientes", query, (self.user_data.get("id_sucursal"),),
+            on_result=self._mostrar_reservas_pendientes,
+        )
 
+    def _mostrar_reservas_pendientes(self, reservas):
+        self.reservas_pendientes_list.clear()
+        reservas = reservas or []
         if not reservas:
             self.reservas_pendientes_list.addItem("No hay reservas pendientes de aprobación.")
             return
@@ -202,7 +234,9 @@ class EmpleadoVentasView(QMainWindow):
     def _cargar_datos_perfil(self):
         id_empleado = self.user_data.get("id_empleado")
         query = "SELECT nombre, telefono, direccion, correo FROM Empleado WHERE id_empleado = %s"
-        datos = self.db_manager.execute_query(query, (id_empleado,))
+        self._queries.query(self, "perfil", query, (id_empleado,), on_result=self._mostrar_datos_perfil)
+
+    def _mostrar_datos_perfil(self, datos):
         if datos:
             nombre, telefono, direccion, correo = datos[0]
             self.nombre_perfil_edit.setText(nombre or "")
@@ -272,6 +306,7 @@ class EmpleadoVentasView(QMainWindow):
         self.status_label2.setText(f"BD Remota 2: {status2}")
 
     def logout(self):
+        self._queries.cancel(self)
         self.close()
         self.on_logout()
 
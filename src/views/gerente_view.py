@@ -2,6 +2,8 @@ import os
 from PyQt5.QtWidgets import QMainWindow, QLabel, QMessageBox, QMenu
 from PyQt5.uic import loadUi
 from PyQt5.QtCore import Qt
+from src.views.query_executor import QueryExecutor, habilitar
+from src.services.analytics import SalesAnalytics
 from src.services.roles import (
     puede_gestionar_gerentes,
     verificar_permiso_creacion_empleado,
@@ -16,6 +18,10 @@ class GerenteView(QMainWindow):
         self.auth_manager = auth_manager
         self.on_logout = on_logout
         self._emp_sel = None
+        # Las consultas de carga corren en segundo plano
+        self._queries = QueryExecutor.shared()
+        # Totales de los reportes en memoria (numpy); sin él se usa SQL
+        self._analytics = SalesAnalytics.shared(db_manager)
 
         # Cargar la interfaz de usuario desde el archivo .ui
         ui_path = os.path.join(os.path.dirname(__file__), '..', '..', 'ui', 'gerente_view.ui')
@@ -37,7 +43,9 @@ class GerenteView(QMainWindow):
     def _cargar_datos_perfil(self):
         id_empleado = self.user_data.get("id_empleado")
         query = "SELECT nombre, telefono, direccion, correo FROM Empleado WHERE id_empleado = %s"
-        datos = self.db_manager.execute_query(query, (id_empleado,))
+        self._queries.query(self, "perfil", query, (id_empleado,), on_result=self._mostrar_datos_perfil)
+
+    def _mostrar_datos_perfil(self, datos):
         if datos:
             nombre, telefono, direccion, correo = datos[0]
             self.nombre_perfil_edit.setText(nombre or "")
@@ -106,32 +114,38 @@ class GerenteView(QMainWindow):
         # self.reporte_output_textedit.setReadOnly(True)
 
     def _generar_reporte_ingresos_sucursal(self):
-        # Lógica para obtener ingresos por sucursal
+        # Ingresos por sucursal desde el agregado diario (no recorre Alquiler)
         query = """
             SELECT
                 s.nombre AS Sucursal,
-                SUM(a.valor) AS Total_Ingresos
-            FROM Alquiler a
-            JOIN Sucursal s ON a.id_sucursal = s.id_sucursal
+                SUM(vd.total) AS Total_Ingresos
+            FROM ventas_diarias vd
+            JOIN Sucursal s ON vd.id_sucursal = s.id_sucursal
             GROUP BY s.nombre
+            HAVING SUM(vd.n) > 0
             ORDER BY Total_Ingresos DESC
         """
-        rows, headers = self.db_manager.execute_query_with_headers(query)
-        self._display_report("Reporte de Ingresos por Sucursal", rows, headers)
+        self._lanzar_reporte_ingresos(
+            "Reporte de Ingresos por Sucursal", query,
+            "Sucursal", "id_sucursal", "SELECT id_sucursal, nombre FROM Sucursal",
+        )
 
     def _generar_reporte_ingresos_vendedor(self):
-        # Lógica para obtener ingresos por vendedor
+        # Ingresos por vendedor desde el agregado diario (no recorre Alquiler)
         query = """
             SELECT
                 e.nombre AS Vendedor,
-                SUM(a.valor) AS Total_Ingresos
-            FROM Alquiler a
-            JOIN Empleado e ON a.id_empleado = e.id_empleado
+                SUM(vd.total) AS Total_Ingresos
+            FROM ventas_diarias vd
+            JOIN Empleado e ON vd.id_empleado = e.id_empleado
             GROUP BY e.nombre
+            HAVING SUM(vd.n) > 0
             ORDER BY Total_Ingresos DESC
         """
-        rows, headers = self.db_manager.execute_query_with_headers(query)
-        self._display_report("Reporte de Ingresos por Vendedor", rows, headers)
+        self._lanzar_reporte_ingresos(
+            "Reporte de Ingresos por Vendedor", query,
+            "Vendedor", "id_empleado", "SELECT id_empleado, nombre FROM Empleado",
+        )
 
     def _generar_reporte_vehiculos_mas_alquilados(self):
         # Lógica para obtener vehículos más alquilados
@@ -146,8 +160,7 @@ class GerenteView(QMainWindow):
             ORDER BY Veces_Alquilado DESC
             LIMIT 10
         """
-        rows, headers = self.db_manager.execute_query_with_headers(query)
-        self._display_report("Reporte de Vehículos Más Alquilados", rows, headers)
+        self._lanzar_reporte("Reporte de Vehículos Más Alquilados", query)
 
     def _generar_reporte_abonos_realizados(self):
         # Lógica para obtener abonos realizados
@@ -162,8 +175,38 @@ class GerenteView(QMainWindow):
             JOIN Reserva_alquiler ra ON ar.id_reserva = ra.id_reserva
             ORDER BY ar.fecha_hora DESC
         """
-        rows, headers = self.db_manager.execute_query_with_headers(query)
-        self._display_report("Reporte de Abonos Realizados", rows, headers)
+        self._lanzar_reporte("Reporte de Abonos Realizados", query)
+
+    def _lanzar_reporte_ingresos(self, title, query, encabezado, columna, catalogo):
+        # Igual que _lanzar_reporte, pero con los totales de SalesAnalytics
+        # cuando tiene el historial completo cargado
+        self._queries.submit(
+            self, "reporte",
+            lambda: self._ingresos_agrupados(query, encabezado, columna, catalogo),
+            on_result=lambda result: self._display_report(title, *result),
+            on_error=lambda e: QMessageBox.critical(self, "Error", f"Error al generar el reporte: {e}"),
+        )
+
+    def _ingresos_agrupados(self, query, encabezado, columna, catalogo):
+        """Corre en el pool: ``(filas, encabezados)`` del reporte de ingresos."""
+        if not self._analytics.ready():
+            return self.db_manager.execute_query_with_headers(query)
+        nombres = dict(self.db_manager.execute_query(catalogo) or [])
+        # Mismo resultado que el JOIN ... GROUP BY nombre de la consulta SQL
+        totales = {}
+        for id_, total in self._analytics.ventas_agrupadas(columna):
+            if id_ in nombres:
+                totales[nombres[id_]] = totales.get(nombres[id_], 0.0) + total
+        filas = sorted(totales.items(), key=lambda fila: fila[1], reverse=True)
+        return filas, [encabezado, "Total_Ingresos"]
+
+    def _lanzar_reporte(self, title, query):
+        # Un solo reporte a la vez: pedir otro descarta el anterior
+        self._queries.query(
+            self, "reporte", query, headers=True,
+            on_result=lambda result: self._display_report(title, *result),
+            on_error=lambda e: QMessageBox.critical(self, "Error", f"Error al generar el reporte: {e}"),
+        )
 
     def _display_report(self, title, rows, headers):
         report_text = f"### {title}\n\n"
@@ -198,10 +241,13 @@ class GerenteView(QMainWindow):
         self._cargar_clientes()
 
     def _cargar_clientes(self):
-        self.clientes_list.clear()
-        rows = self.db_manager.execute_query(
-            "SELECT id_cliente, nombre, correo FROM Cliente"
+        self._queries.query(
+            self, "clientes", "SELECT id_cliente, nombre, correo FROM Cliente",
+            on_result=self._mostrar_clientes,
         )
+
+    def _mostrar_clientes(self, rows):
+        self.clientes_list.clear()
         if rows:
             for c in rows:
                 self.clientes_list.addItem(f"{c[0]} | {c[1]} | {c[2]}")
@@ -212,21 +258,36 @@ class GerenteView(QMainWindow):
             return
         
         selected_item = selected_items[0]
-        self._cliente_sel = int(selected_item.text().split("|")[0].strip())
-        row = self.db_manager.execute_query(
-            f"SELECT documento, nombre, telefono, direccion, correo FROM Cliente WHERE id_cliente = %s",
-            (self._cliente_sel,),
+        id_cliente = int(selected_item.text().split("|")[0].strip())
+        # El id se asigna cuando llegan los datos: hasta entonces guardar o
+        # eliminar escribiría los campos del registro anterior sobre este id
+        self._cliente_sel = None
+        habilitar((self.guardar_cliente_button, self.eliminar_cliente_button), False)
+        self._queries.query(
+            self, "cliente_sel",
+            "SELECT documento, nombre, telefono, direccion, correo FROM Cliente WHERE id_cliente = %s",
+            (id_cliente,),
+            on_result=lambda row: self._mostrar_cliente(id_cliente, row),
+            on_error=lambda e: QMessageBox.warning(self, "Aviso", f"No se pudo cargar el cliente: {e}"),
         )
-        if row:
-            doc, nom, tel, dir_, cor = row[0]
-            self.doc_cliente_edit.setText(doc or "")
-            self.nombre_cliente_edit.setText(nom or "")
-            self.telefono_cliente_edit.setText(tel or "")
-            self.direccion_cliente_edit.setText(dir_ or "")
-            self.correo_cliente_edit.setText(cor or "")
+
+    def _mostrar_cliente(self, id_cliente, row):
+        if not row:
+            self._nuevo_cliente()
+            return
+        self._cliente_sel = id_cliente
+        doc, nom, tel, dir_, cor = row[0]
+        self.doc_cliente_edit.setText(doc or "")
+        self.nombre_cliente_edit.setText(nom or "")
+        self.telefono_cliente_edit.setText(tel or "")
+        self.direccion_cliente_edit.setText(dir_ or "")
+        self.correo_cliente_edit.setText(cor or "")
+        habilitar((self.guardar_cliente_button, self.eliminar_cliente_button), True)
 
     def _nuevo_cliente(self):
+        self._queries.cancel(self, "cliente_sel")
         self._cliente_sel = None
+        habilitar((self.guardar_cliente_button, self.eliminar_cliente_button), True)
         self.doc_cliente_edit.clear()
         self.nombre_cliente_edit.clear()
         self.telefono_cliente_edit.clear()
@@ -289,48 +350,34 @@ class GerenteView(QMainWindow):
         self.guardar_vehiculo_button.clicked.connect(self._guardar_vehiculo)
         self._cargar_catalogos_vehiculos()
 
+    # Combo -> (atributo del mapa, consulta)
+    _CATALOGOS_VEHICULO = {
+        "marca_vehiculo": "SELECT id_marca, nombre_marca FROM Marca_vehiculo",
+        "color_vehiculo": "SELECT id_color, nombre_color FROM Color_vehiculo",
+        "tipo_vehiculo": "SELECT id_tipo, descripcion FROM Tipo_vehiculo",
+        "transmision_vehiculo": "SELECT id_transmision, descripcion FROM Transmision_vehiculo",
+        "blindaje_vehiculo": "SELECT id_blindaje, descripcion FROM Blindaje_vehiculo",
+        "seguro_vehiculo": "SELECT id_seguro, descripcion FROM Seguro_vehiculo WHERE estado = 'Activo'",
+        "proveedor_vehiculo": "SELECT id_proveedor, nombre FROM Proveedor_vehiculo",
+    }
+
     def _cargar_catalogos_vehiculos(self):
-        # Cargar marcas
-        marcas = self.db_manager.execute_query("SELECT id_marca, nombre_marca FROM Marca_vehiculo")
-        self.marca_vehiculo_map = {m[1]: m[0] for m in (marcas or [])}
-        self.marca_vehiculo_combo.clear()
-        self.marca_vehiculo_combo.addItems(list(self.marca_vehiculo_map.keys()))
-
-        # Cargar colores
-        colores = self.db_manager.execute_query("SELECT id_color, nombre_color FROM Color_vehiculo")
-        self.color_vehiculo_map = {c[1]: c[0] for c in (colores or [])}
-        self.color_vehiculo_combo.clear()
-        self.color_vehiculo_combo.addItems(list(self.color_vehiculo_map.keys()))
-
-        # Cargar tipos de vehículo
-        tipos = self.db_manager.execute_query("SELECT id_tipo, descripcion FROM Tipo_vehiculo")
-        self.tipo_vehiculo_map = {t[1]: t[0] for t in (tipos or [])}
-        self.tipo_vehiculo_combo.clear()
-        self.tipo_vehiculo_combo.addItems(list(self.tipo_vehiculo_map.keys()))
-
-        # Cargar transmisiones
-        transmisiones = self.db_manager.execute_query("SELECT id_transmision, descripcion FROM Transmision_vehiculo")
-        self.transmision_vehiculo_map = {t[1]: t[0] for t in (transmisiones or [])}
-        self.transmision_vehiculo_combo.clear()
-        self.transmision_vehiculo_combo.addItems(list(self.transmision_vehiculo_map.keys()))
-
-        # Cargar blindajes
-        blindajes = self.db_manager.execute_query("SELECT id_blindaje, descripcion FROM Blindaje_vehiculo")
-        self.blindaje_vehiculo_map = {b[1]: b[0] for b in (blindajes or [])}
-        self.blindaje_vehiculo_combo.clear()
-        self.blindaje_vehiculo_combo.addItems(list(self.blindaje_vehiculo_map.keys()))
-
-        # Cargar seguros
-        seguros = self.db_manager.execute_query("SELECT id_seguro, descripcion FROM Seguro_vehiculo WHERE estado = 'Activo'")
-        self.seguro_vehiculo_map = {s[1]: s[0] for s in (seguros or [])}
-        self.seguro_vehiculo_combo.clear()
-        self.seguro_vehiculo_combo.addItems(list(self.seguro_vehiculo_map.keys()))
-
-        # Cargar proveedores
-        proveedores = self.db_manager.execute_query("SELECT id_proveedor, nombre FROM Proveedor_vehiculo")
-        self.proveedor_vehiculo_map = {p[1]: p[0] for p in (proveedores or [])}
-        self.proveedor_vehiculo_combo.clear()
-        self.proveedor_vehiculo_combo.addItems(list(self.proveedor_vehiculo_map.keys()))
+        # Las siete consultas van en una sola tarea y los combos se llenan juntos
+        def fetch():
+            return {
+                nombre: self.db_manager.execute_query(query) or []
+                for nombre, query in self._CATALOGOS_VEHICULO.items()
+            }
+
+        self._queries.submit(self, "catalogos_vehiculos", fetch, on_result=self._mostrar_catalogos_vehiculos)
+
+    def _mostrar_catalogos_vehiculos(self, catalogos):
+        for nombre, rows in catalogos.items():
+            mapa = {r[1]: r[0] for r in rows}
+            setattr(self, f"{nombre}_map", mapa)
+            combo = getattr(self, f"{nombre}_combo")
+            combo.clear()
+            combo.addItems(list(mapa.keys()))
 
     def _guardar_vehiculo(self):
         placa = self.placa_vehiculo_edit.text().strip()
@@ -403,7 +450,7 @@ class GerenteView(QMainWindow):
         self._cargar_clientes()
         # No hay una función _cargar_reportes, los reportes se generan al hacer clic en el botón
         self._cargar_datos_perfil()
-        QMessageBox.information(self, "Recargar", "Datos recargados correctamente.")
+        QMessageBox.information(self, "Recargar", "Recarga de datos en curso.")
 
     def _setup_empleados_tab(self):
         # Conectar señales y slots
@@ -417,11 +464,15 @@ class GerenteView(QMainWindow):
         self._cargar_empleados()
 
     def _cargar_empleados(self):
-        self.empleados_list.clear()
-        rows = self.db_manager.execute_query(
+        self._queries.query(
+            self, "empleados",
             "SELECT id_empleado, nombre, cargo, documento, telefono, correo FROM Empleado "
-            "WHERE LOWER(cargo) NOT IN ('gerente','administrador')"
+            "WHERE LOWER(cargo) NOT IN ('gerente','administrador')",
+            on_result=self._mostrar_empleados,
         )
+
+    def _mostrar_empleados(self, rows):
+        self.empleados_list.clear()
         if rows:
             for r in rows:
                 id_e, nombre, cargo, doc, tel, cor = r
@@ -433,21 +484,36 @@ class GerenteView(QMainWindow):
             return
         
         selected_item = selected_items[0]
-        self._emp_sel = int(selected_item.text().split("|")[0].strip())
-        row = self.db_manager.execute_query(
-            f"SELECT documento, nombre, telefono, correo, cargo FROM Empleado WHERE id_empleado = %s",
-            (self._emp_sel,),
+        id_empleado = int(selected_item.text().split("|")[0].strip())
+        # El id se asigna cuando llegan los datos: hasta entonces guardar o
+        # eliminar escribiría los campos del registro anterior sobre este id
+        self._emp_sel = None
+        habilitar((self.guardar_empleado_button,), False)
+        self._queries.query(
+            self, "empleado_sel",
+            "SELECT documento, nombre, telefono, correo, cargo FROM Empleado WHERE id_empleado = %s",
+            (id_empleado,),
+            on_result=lambda row: self._mostrar_empleado(id_empleado, row),
+            on_error=lambda e: QMessageBox.warning(self, "Aviso", f"No se pudo cargar el empleado: {e}"),
         )
-        if row:
-            doc, nom, tel, cor, cargo = row[0]
-            self.doc_empleado_edit.setText(doc or "")
-            self.nombre_empleado_edit.setText(nom or "")
-            self.telefono_empleado_edit.setText(tel or "")
-            self.correo_empleado_edit.setText(cor or "")
-            self.cargo_empleado_combo.setCurrentText(cargo or cargos_permitidos_para_gerente()[0])
+
+    def _mostrar_empleado(self, id_empleado, row):
+        if not row:
+            self._nuevo_empleado()
+            return
+        self._emp_sel = id_empleado
+        doc, nom, tel, cor, cargo = row[0]
+        self.doc_empleado_edit.setText(doc or "")
+        self.nombre_empleado_edit.setText(nom or "")
+        self.telefono_empleado_edit.setText(tel or "")
+        self.correo_empleado_edit.setText(cor or "")
+        self.cargo_empleado_combo.setCurrentText(cargo or cargos_permitidos_para_gerente()[0])
+        habilitar((self.guardar_empleado_button,), True)
 
     def _nuevo_empleado(self):
+        self._queries.cancel(self, "empleado_sel")
         self._emp_sel = None
+        habilitar((self.guardar_empleado_button,), True)
         self.doc_empleado_edit.clear()
         self.nombre_empleado_edit.clear()
         self.telefono_empleado_edit.clear()
@@ -495,6 +561,7 @@ class GerenteView(QMainWindow):
         self.status_label2.setText(f"BD Remota 2: {status2}")
 
     def logout(self):
+        self._queries.cancel(self)
         self.close()
         self.on_logout()
 
@@ -10,6 +10,8 @@ from PyQt5.QtWidgets import (
 from PyQt5.uic import loadUi
 from PyQt5.QtCore import Qt
 
+from .signals import HealthSignals, SyncProgressSignals
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,7 +25,9 @@ class LoginView(QDialog):
         self.user_data = None
         self._status_label1 = None
         self._status_label2 = None
-        self._stop_status = False
+        self._health_signals = None
+        self._sync_label = None
+        self._sync_signals = None
         self._modern_stylesheet = """
             QDialog, QWidget {
                 background-color: #18191A;
@@ -92,6 +96,7 @@ class LoginView(QDialog):
             self.layout().insertWidget(0, self._status_label1)
             self._update_status_labels()
             self._start_status_updater()
+            self._start_sync_progress()
             self.showMaximized()
 
             # Centrar y modernizar campos y botones
@@ -197,11 +202,7 @@ class LoginView(QDialog):
         db = getattr(self.auth_manager, "db", None)
         if db is None:
             return
-        if hasattr(db, "ping_remotes"):
-            try:
-                db.ping_remotes()
-            except Exception as exc:
-                logger.error(f"Error pinging remotes: {exc}")
+        # Estado en caché del monitor de conexión: no abre conexiones
         r1 = getattr(
             db, "is_remote1_active", lambda: getattr(db, "remote1_active", False)
         )()
@@ -226,18 +227,61 @@ class LoginView(QDialog):
             )
 
     def _start_status_updater(self):
-        import threading, time
+        """Refrescar las etiquetas cuando el monitor compartido detecte cambios."""
+        db = getattr(self.auth_manager, "db", None)
+        monitor = getattr(db, "health", None)
+        if monitor is None:
+            return
+        self._health_signals = HealthSignals(monitor, self)
+        self._health_signals.status_changed.connect(
+            lambda _name, _online: self._update_status_labels()
+        )
 
-        def updater():
-            while not self._stop_status:
-                self._update_status_labels()
-                time.sleep(2)
+    def _stop_status_updater(self):
+        if self._health_signals is not None:
+            self._health_signals.detach()
+            self._health_signals = None
+        if self._sync_signals is not None:
+            self._sync_signals.detach()
+            self._sync_signals = None
 
-        t = threading.Thread(target=updater, daemon=True)
-        t.start()
+    def _start_sync_progress(self):
+        """Mostrar el avance de la sincronización de arranque, si está corriendo."""
+        db = getattr(self.auth_manager, "db", None)
+        if db is None or not hasattr(db, "add_sync_listener") or not db.is_syncing():
+            return
+        self._sync_label = QLabel(self)
+        self._sync_label.setAlignment(Qt.AlignCenter)
+        self._sync_label.setStyleSheet("color: #B0B3B8; font-size: 13px; margin-bottom: 10px;")
+        self.layout().insertWidget(2, self._sync_label)
+        self._sync_signals = SyncProgressSignals(db, self)
+        self._sync_signals.progress.connect(self._mostrar_progreso_sync)
+        self._sync_signals.finished.connect(self._ocultar_progreso_sync)
+        done, total = db.sync_progress()
+        self._mostrar_progreso_sync("", done, total)
+        if not db.is_syncing():
+            # Terminó antes de suscribirse
+            self._ocultar_progreso_sync({})
+
+    def _mostrar_progreso_sync(self, tabla, hechas, total):
+        if self._sync_label is not None:
+            detalle = f" ({tabla})" if tabla else ""
+            self._sync_label.setText(f"Sincronizando datos locales: {hechas}/{total}{detalle}")
+
+    def _ocultar_progreso_sync(self, _stats):
+        if self._sync_label is not None:
+            self._sync_label.hide()
+        if self._sync_signals is not None:
+            self._sync_signals.detach()
+            self._sync_signals = None
+
+    def done(self, result):
+        # accept()/reject() no pasan por closeEvent
+        self._stop_status_updater()
+        super().done(result)
 
     def closeEvent(self, event):
-        self._stop_status = True
+        self._stop_status_updater()
         super().closeEvent(event)
 
     def showEvent(self, event):
@@ -6,6 +6,7 @@ import logging
 from ..triple_db_manager import TripleDBManager
 from ..auth import AuthManager
 from ..styles import MODERN_QSS
+from .signals import HealthSignals
 
 
 class MainView(QtWidgets.QMainWindow):
@@ -43,15 +44,18 @@ class MainView(QtWidgets.QMainWindow):
         self._sync_timer.start(5 * 60 * 1000)
         self._update_status_bar()
 
-        # Timer para actualizar el estado de conexión cada 2 segundos
-        self._status_timer = QTimer(self)
-        self._status_timer.timeout.connect(self._update_status_bar)
-        self._status_timer.start(2000)
-
-        # Intentar reconexión periódica si está offline
-        self._reconnect_timer = QTimer(self)
-        self._reconnect_timer.timeout.connect(self._attempt_reconnect)
-        self._reconnect_timer.start(5000)
+        # Estado de conexión: el monitor compartido avisa de cada cambio, así
+        # que no hace falta consultar periódicamente. Los gestores sin monitor
+        # (DBManager) siguen intentando reconectar cada 5 segundos.
+        self._health_signals = None
+        monitor = getattr(self._db_manager, "health", None)
+        if monitor is not None:
+            self._health_signals = HealthSignals(monitor, self)
+            self._health_signals.status_changed.connect(self._on_connection_changed)
+        else:
+            self._reconnect_timer = QTimer(self)
+            self._reconnect_timer.timeout.connect(self._attempt_reconnect)
+            self._reconnect_timer.start(5000)
 
         # Setup status bar information
         if self.statusBar():
@@ -203,6 +207,9 @@ class MainView(QtWidgets.QMainWindow):
 
     def logout(self):
         """Emit logout signal and close the window."""
+        if self._health_signals is not None:
+            self._health_signals.detach()
+            self._health_signals = None
         self.logged_out.emit()
         self.close()
         self.deleteLater()
@@ -229,6 +236,9 @@ class MainView(QtWidgets.QMainWindow):
         self._db_manager.sync_pending_reservations()
         self._update_status_bar()
 
+    def _on_connection_changed(self, _name, _online):
+        self._update_status_bar()
+
     def _attempt_reconnect(self):
         """Intentar reconectar y actualizar el estado si tiene éxito."""
         if self._db_manager.offline and self._db_manager.try_reconnect():
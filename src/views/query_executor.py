@@ -0,0 +1,217 @@
+import logging
+import threading
+from itertools import count
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from src.config import Config
+
+
+class _QueryTask(QRunnable):
+    """Runs one request on the pool and reports back through the executor."""
+
+    def __init__(self, executor, request_id, func):
+        super().__init__()
+        # The executor keeps the Python reference until the result arrives
+        self.setAutoDelete(False)
+        self._executor = executor
+        self._request_id = request_id
+        self._func = func
+
+    def run(self):
+        if self._executor._is_cancelled(self._request_id):
+            # Still report back so the executor releases the task
+            self._executor._finished.emit(self._request_id, None)
+            return
+        try:
+            result = self._func()
+        except Exception as exc:
+            self._executor._failed.emit(self._request_id, exc)
+        else:
+            self._executor._finished.emit(self._request_id, result)
+
+
+class QueryExecutor(QObject):
+    """Shared background executor for view queries.
+
+    Views call :meth:`query` (or :meth:`submit` for any callable) instead of
+    ``db_manager.execute_query`` inside slots. The query runs on a
+    ``QThreadPool`` and ``on_result``/``on_error`` are called in the GUI
+    thread through queued signals, so the window keeps repainting while a
+    remote is slow or down.
+
+    Requests are identified by ``(owner, key)``, e.g. ``(self, "clientes")``.
+    Only the latest request per pair is applied. Submitting again supersedes
+    the previous one: it is removed from the queue if it has not started,
+    and its result is discarded otherwise. :meth:`cancel` does the same
+    without a replacement. Requests of a widget are cancelled when it is
+    destroyed.
+    """
+
+    _finished = pyqtSignal(int, object)
+    _failed = pyqtSignal(int, object)
+
+    _shared = None
+
+    def __init__(self, max_threads=None, parent=None):
+        super().__init__(parent)
+        self.logger = logging.getLogger(__name__)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(
+            max(1, Config.VIEW_QUERY_THREADS if max_threads is None else max_threads)
+        )
+        self._ids = count(1)
+        self._requests = {}  # request_id -> (slot, task, on_result, on_error)
+        self._latest = {}  # (id(owner), key) -> request_id
+        self._owners = set()
+        self._cancelled = set()
+        # Dropped tasks that were already running, kept alive until they end
+        self._orphans = {}
+        self._cancel_lock = threading.Lock()
+        self._stats = {"submitted": 0, "applied": 0, "failed": 0, "superseded": 0, "cancelled": 0}
+        self._finished.connect(self._on_finished)
+        self._failed.connect(self._on_failed)
+
+    @classmethod
+    def shared(cls):
+        """Executor shared by every view (created on first use)."""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def submit(self, owner, key, func, on_result=None, on_error=None):
+        """Run ``func()`` in the background; return the request id."""
+        slot = (id(owner), key)
+        self._watch(owner)
+        previous = self._latest.get(slot)
+        if previous is not None:
+            self._drop(previous)
+            self._stats["superseded"] += 1
+        request_id = next(self._ids)
+        task = _QueryTask(self, request_id, func)
+        self._requests[request_id] = (slot, task, on_result, on_error)
+        self._latest[slot] = request_id
+        self._stats["submitted"] += 1
+        self._pool.start(task)
+        return request_id
+
+    def query(self, owner, key, query, params=None, on_result=None, on_error=None,
+              headers=False, db=None):
+        """Run a SELECT with ``owner.db_manager`` (or ``db``) in the background.
+
+        ``headers=True`` uses ``execute_query_with_headers`` and passes
+        ``(rows, headers)`` to ``on_result``.
+        """
+        db = owner.db_manager if db is None else db
+        if headers:
+            func = lambda: db.execute_query_with_headers(query, params)
+        else:
+            func = lambda: db.execute_query(query, params)
+        return self.submit(owner, key, func, on_result, on_error)
+
+    def cancel(self, owner, key=None):
+        """Cancel the pending request ``(owner, key)`` or all of ``owner``."""
+        self._cancel_owner(id(owner), key)
+
+    def is_busy(self, owner, key):
+        return (id(owner), key) in self._latest
+
+    def stats(self):
+        data = dict(self._stats)
+        data["pending"] = len(self._requests)
+        data["threads"] = self._pool.maxThreadCount()
+        return data
+
+    def wait(self, msecs=-1):
+        """Block until every running task finishes (used on shutdown)."""
+        return self._pool.waitForDone(msecs)
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+    def _watch(self, owner):
+        owner_id = id(owner)
+        if owner_id in self._owners:
+            return
+        self._owners.add(owner_id)
+        destroyed = getattr(owner, "destroyed", None)
+        if destroyed is not None:
+            destroyed.connect(lambda *_args, owner_id=owner_id: self._forget_owner(owner_id))
+
+    def _forget_owner(self, owner_id):
+        self._cancel_owner(owner_id, None)
+        self._owners.discard(owner_id)
+
+    def _cancel_owner(self, owner_id, key):
+        for slot, request_id in list(self._latest.items()):
+            if slot[0] == owner_id and (key is None or slot[1] == key):
+                self._drop(request_id)
+                self._stats["cancelled"] += 1
+
+    def _drop(self, request_id):
+        entry = self._requests.pop(request_id, None)
+        if entry is None:
+            return
+        slot, task, _on_result, _on_error = entry
+        if self._latest.get(slot) == request_id:
+            del self._latest[slot]
+        with self._cancel_lock:
+            self._cancelled.add(request_id)
+        # Not started yet: take it off the queue
+        if self._pool.tryTake(task):
+            with self._cancel_lock:
+                self._cancelled.discard(request_id)
+        else:
+            self._orphans[request_id] = task
+
+    def _is_cancelled(self, request_id):
+        with self._cancel_lock:
+            return request_id in self._cancelled
+
+    def _complete(self, request_id):
+        with self._cancel_lock:
+            self._cancelled.discard(request_id)
+        self._orphans.pop(request_id, None)
+        entry = self._requests.pop(request_id, None)
+        if entry is None:
+            return None
+        slot = entry[0]
+        if self._latest.get(slot) == request_id:
+            del self._latest[slot]
+        return entry
+
+    def _on_finished(self, request_id, result):
+        entry = self._complete(request_id)
+        if entry is None:
+            return
+        self._stats["applied"] += 1
+        on_result = entry[2]
+        if on_result is not None:
+            try:
+                on_result(result)
+            except Exception:
+                self.logger.exception("Error applying query result")
+
+    def _on_failed(self, request_id, exc):
+        entry = self._complete(request_id)
+        if entry is None:
+            return
+        self._stats["failed"] += 1
+        on_error = entry[3]
+        if on_error is not None:
+            on_error(exc)
+        else:
+            self.logger.error("Background query failed: %s", exc)
+
+
+def habilitar(botones, habilitado):
+    """Activa o desactiva los botones de edición de un formulario.
+
+    Las vistas los desactivan mientras carga el registro seleccionado y los
+    vuelven a activar cuando llegan sus datos.
+    """
+    for boton in botones:
+        boton.setEnabled(habilitado)
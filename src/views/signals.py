@@ -0,0 +1,62 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class SyncProgressSignals(QObject):
+    """Re-emit sync progress callbacks as Qt signals.
+
+    ``source`` is a database manager with ``add_sync_listener`` (such as
+    :class:`~src.triple_db_manager.TripleDBManager`, whose startup sync
+    :class:`~src.views.login_view.LoginView` shows) or a
+    :class:`~src.local_sync.LocalSync` (``add_listener``). The callbacks
+    arrive on the sync thread; Qt queues the signals so connected slots run
+    in the GUI thread and can update widgets safely.
+    """
+
+    # tabla, tablas terminadas, total de tablas
+    progress = pyqtSignal(str, int, int)
+    # estadísticas por tabla de la sincronización completa
+    finished = pyqtSignal(dict)
+
+    def __init__(self, source, parent=None):
+        super().__init__(parent)
+        self._source = source
+        register = getattr(source, "add_sync_listener", None) or source.add_listener
+        register(self._on_progress)
+
+    def _on_progress(self, table, done, total, stats):
+        if table is None:
+            self.finished.emit(stats)
+        else:
+            self.progress.emit(table, done, total)
+
+    def detach(self):
+        """Stop listening to ``source``."""
+        unregister = getattr(self._source, "remove_sync_listener", None) or self._source.remove_listener
+        unregister(self._on_progress)
+
+
+class HealthSignals(QObject):
+    """Re-emit :class:`~src.health_monitor.HealthMonitor` changes as Qt signals.
+
+    Views connect to :attr:`status_changed` instead of polling the database
+    manager; the slot runs in the GUI thread.
+    """
+
+    # nombre del remoto ("remote1"/"remote2"), en línea
+    status_changed = pyqtSignal(str, bool)
+
+    def __init__(self, monitor, parent=None):
+        super().__init__(parent)
+        self._monitor = monitor
+        monitor.add_listener(self._on_change)
+
+    def _on_change(self, name, online):
+        self.status_changed.emit(name, online)
+
+    def status(self):
+        """Current ``{name: online}`` snapshot, for the initial paint."""
+        return self._monitor.status()
+
+    def detach(self):
+        """Stop listening to the monitor (call when the view closes)."""
+        self._monitor.remove_listener(self._on_change)
@@ -0,0 +1,81 @@
+import unittest
+
+from src.retry_compaction import compact_entries
+
+
+def _entries(*statements, target="remote1"):
+    """Number the statements like persisted retry_queue rows (ids from 1)."""
+    return [
+        (row_id, target, query, params)
+        for row_id, (query, params) in enumerate(statements, start=1)
+    ]
+
+
+class CompactEntriesTests(unittest.TestCase):
+    def test_delete_by_non_key_column_keeps_insert_and_delete(self):
+        entries = _entries(
+            ("INSERT INTO Abono_reserva (valor, id_reserva) VALUES (%s,%s)", [100, 7]),
+            ("DELETE FROM Abono_reserva WHERE id_reserva = %s", [7]),
+        )
+        kept, dropped = compact_entries(entries)
+        # The delete also removes abonos of reservation 7 already on the remote
+        self.assertEqual(kept, entries)
+        self.assertEqual(dropped, [])
+
+    def test_delete_by_primary_key_cancels_insert_and_updates(self):
+        entries = _entries(
+            ("INSERT INTO Abono_reserva (id_abono, valor, id_reserva) VALUES (%s,%s,%s)", [9, 100, 7]),
+            ("UPDATE Abono_reserva SET valor = %s WHERE id_abono = %s", [150, 9]),
+            ("DELETE FROM Abono_reserva WHERE id_abono = %s", [9]),
+        )
+        kept, dropped = compact_entries(entries)
+        self.assertEqual(kept, [])
+        self.assertEqual(dropped, [1, 2, 3])
+
+    def test_delete_by_unique_key_cancels_insert(self):
+        entries = _entries(
+            ("INSERT INTO Usuario (usuario, contrasena) VALUES (%s,%s)", ["ana", "x"]),
+            ("DELETE FROM Usuario WHERE usuario = %s", ["ana"]),
+        )
+        kept, dropped = compact_entries(entries)
+        self.assertEqual(kept, [])
+        self.assertEqual(dropped, [1, 2])
+
+    def test_delete_on_table_without_declared_keys_keeps_both(self):
+        entries = _entries(
+            ("INSERT INTO Bitacora (id, texto) VALUES (%s,%s)", [1, "a"]),
+            ("DELETE FROM Bitacora WHERE id = %s", [1]),
+        )
+        kept, dropped = compact_entries(entries)
+        self.assertEqual(kept, entries)
+        self.assertEqual(dropped, [])
+
+    def test_custom_key_map(self):
+        entries = _entries(
+            ("INSERT INTO Bitacora (id, texto) VALUES (%s,%s)", [1, "a"]),
+            ("DELETE FROM Bitacora WHERE id = %s", [1]),
+        )
+        kept, dropped = compact_entries(entries, table_keys={"bitacora": (("id",),)})
+        self.assertEqual(kept, [])
+        self.assertEqual(dropped, [1, 2])
+
+    def test_superseded_update_is_dropped(self):
+        entries = _entries(
+            ("UPDATE Cliente SET telefono = %s WHERE id_cliente = %s", ["1", 5]),
+            ("UPDATE Cliente SET telefono = %s, correo = %s WHERE id_cliente = %s", ["2", "a@b.c", 5]),
+        )
+        kept, dropped = compact_entries(entries)
+        self.assertEqual(kept, entries[1:])
+        self.assertEqual(dropped, [1])
+
+    def test_targets_are_compacted_separately(self):
+        entries = _entries(
+            ("INSERT INTO Alquiler (id_alquiler, valor) VALUES (%s,%s)", [3, 10]),
+        ) + [(2, "remote2", "DELETE FROM Alquiler WHERE id_alquiler = %s", [3])]
+        kept, dropped = compact_entries(entries)
+        self.assertEqual(kept, entries)
+        self.assertEqual(dropped, [])
+
+
+if __name__ == "__main__":
+    unittest.main()